@@ -1,4 +1,9 @@
 from src.chatbot import agent,memory
+from src.cassette import cassettes
+from src.helper import amadeus
+
+# CASSETTE_MODE=record saves each case's Groq/Amadeus/backend calls, CASSETTE_MODE=replay serves them offline
+cassettes.install(amadeus)
 # Testing the Agent
 session_id = "session_1"
 user_id = "user_1"
@@ -83,10 +88,11 @@ for i, query in enumerate(test_cases, 1):
     memory.clear()
 
     # Run chatbot response
-    print(
-        agent.print_response(
-            query,
-            session_id=session_id,
-            user_id=user_id
+    with cassettes.use(f"test_case_{i}"):
+        print(
+            agent.print_response(
+                query,
+                session_id=session_id,
+                user_id=user_id
+            )
         )
-    )
\ No newline at end of file
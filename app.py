@@ -1,13 +1,37 @@
-from fastapi import FastAPI, Request, status
+from dotenv import load_dotenv
+load_dotenv()  # before the src imports, which read their settings at import time
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from agno.agent import Message
-from typing import Optional
-from src.chatbot import agent
-from src.chatbot_1 import router_agent
-import os, shutil
+from agno.models.message import Message
+from typing import List, NamedTuple, Optional
+from collections import Counter
+from contextlib import AsyncExitStack
+from src.orchestrators import ORCHESTRATOR_PRELOAD, build_orchestrator, orchestrator_factory, run_member, run_streaming
+from src.concurrency import (
+    AdmissionGate, AgentPool, GateFull, SessionBusy, SessionLocks,
+    CHAT_MAX_IN_FLIGHT, CHAT_MAX_WAITING, CHAT_WAIT_TIMEOUT,
+    CHAT_BATCH_ITEM_WAIT, CHAT_BATCH_MAX_ITEMS, CHAT_BATCH_PARALLELISM, run_ordered,
+)
+from src.prerouter import prerouter
+from src.fast_path import faq_fast_path
+from src.faq_store import faq_store
+from src.helper import flight_search_cache, bookings_cache, backend, amadeus
+from src.streaming import StreamTranslator, sse
+from src.response_cache import response_cache
+from src.result_store import result_store
+from src.agent_output import output_parser
+from src.history import session_summaries
+from src.memory_worker import user_memories
+from src.passthrough import envelope_from_tools, tool_envelope
+from src import metrics
+from src.cassette import cassettes
+from src.rate_limit import RateLimited, rate_limiter
+import asyncio
 import json
+import time
 
 app = FastAPI(title="Flight Agent API", version="1.0.0")
 
@@ -23,6 +47,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ Record/replay of Groq, Amadeus and backend calls (CASSETTE_MODE=record|replay, off by default)
+cassettes.install(amadeus)
+
+# ✅ Bounded concurrency: agent runs happen on a sized thread pool so the event loop stays free
+chat_gate = AdmissionGate(CHAT_MAX_IN_FLIGHT, CHAT_MAX_WAITING, CHAT_WAIT_TIMEOUT)
+router_pool = AgentPool(build_orchestrator, size=CHAT_MAX_IN_FLIGHT)   # ORCHESTRATOR=team|single, built on first use
+# ✅ Turns of one session run one at a time so they don't overwrite each other's history
+session_locks = SessionLocks()
+
+
+@app.on_event("startup")
+async def preload_orchestrator():
+    # import the agent stack off the event loop so /health answers at once and the first /chat doesn't pay for it
+    if ORCHESTRATOR_PRELOAD:
+        asyncio.get_running_loop().run_in_executor(None, orchestrator_factory)
+
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    router_pool.shutdown()
+    # finish queued summary and memory updates before the process exits
+    await asyncio.to_thread(session_summaries.worker.stop)
+    await asyncio.to_thread(user_memories.worker.stop)
+    backend.close()
+
 
 # ✅ Data model
 class ChatInput(BaseModel):
@@ -47,76 +96,262 @@ class ChatInput(BaseModel):
 def health_check():
     return {"status": "ok"}
 
-# ✅ Main chat endpoint with proper status codes
-@app.post("/chat")
-async def chat_handler(data: ChatInput):
-    message = data.message
-    token = data.access_token
-    user_id = data.user_id
-    session_id = data.session_id
+# ✅ Runtime counters
+@app.get("/stats")
+def stats():
+    from src.model_registry import model_registry   # imports the Groq SDK, so not at startup
+    from src.hedging import hedger
+    return {
+        "chat_gate": chat_gate.stats(),
+        "session_locks": session_locks.stats(),
+        "router_pool": router_pool.stats(),
+        "prerouter": prerouter.stats(),
+        "faq_fast_path": faq_fast_path.stats(),
+        "faq_store": {"path": faq_store.path, "reloads": faq_store.reloads},
+        "search_cache": flight_search_cache.stats(),
+        "bookings_cache": bookings_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "result_store": result_store.stats(),
+        "agent_output": output_parser.stats(),
+        "session_summaries": session_summaries.stats(),
+        "user_memories": user_memories.stats(),
+        "backend_http": backend.stats(),
+        "cassettes": cassettes.stats(),
+        "models": model_registry.stats(),
+        "hedging": hedger.stats(),
+        "rate_limits": rate_limiter.stats(),
+    }
 
-    if not message:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={
-                "response": {
-                    "type": "no_tool_call",
-                    "success": False,
-                    "message": "Message is required",
-                    "login": False,
-                    "data": None
-                }
-            }
-        )
+# ✅ Prometheus metrics
+@app.get("/metrics")
+def prometheus_metrics():
+    if not metrics.enabled():
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+# ✅ Shared chat pipeline for /chat and /chat/stream
+class ChatReply(NamedTuple):
+    status_code: int
+    response: dict
+    headers: Optional[dict] = None
 
-    msg = Message(
+
+def envelope(type_: str, message: str, success: bool = False, login: bool = False, data=None) -> dict:
+    return {
+        "type": type_,
+        "success": success,
+        "message": message,
+        "login": login,
+        "data": data
+    }
+
+
+def build_message(data: ChatInput) -> Message:
+    token = data.access_token
+    return Message(
         role="user",
-        content=message + (f" my_access token : {token}" if token else ""),
+        content=data.message + (f" my_access token : {token}" if token else ""),
         context={"access_token": token} if token else {}
     )
 
-    try:
-        response = router_agent.run(msg, user_id=user_id, session_id=session_id)
-        raw = response.content.strip()
 
-        if raw.startswith("```json"):
-            raw = raw[len("```json"):].strip()
-        elif raw.startswith("```"):
-            raw = raw[len("```"):].strip()
+def parse_reply(tool_reply: Optional[dict], content: Optional[str]) -> dict:
+    # ✅ A passthrough tool's envelope is the reply as-is, no reformatting pass
+    if tool_reply is not None:
+        metrics.count(metrics.AGENT_OUTPUT, "passthrough")
+        return tool_reply
+    return output_parser.parse(content)
 
-        if raw.endswith("```"):
-            raw = raw[:-3].strip()
 
-        parsed = json.loads(raw)
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={"response": parsed}
+def observe_chat(endpoint: str, reply: ChatReply, started: float):
+    metrics.observe(metrics.CHAT_LATENCY, time.perf_counter() - started, endpoint, reply.response.get("type") or "unknown")
+
+
+def reply_for_exception(e: Exception) -> ChatReply:
+    if isinstance(e, RateLimited):
+        return ChatReply(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            envelope("rate_limited", "You're sending messages too quickly, please wait a moment and try again."),
+            {"Retry-After": str(e.retry_after)}
         )
+    if isinstance(e, SessionBusy):
+        return ChatReply(
+            status.HTTP_409_CONFLICT,
+            envelope("error", "I'm still working on your previous message, please try again in a moment."),
+            {"Retry-After": str(e.retry_after)}
+        )
+    if isinstance(e, GateFull):
+        return ChatReply(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            envelope("error", "We're handling a lot of requests right now, please try again in a moment."),
+            {"Retry-After": str(e.retry_after)}
+        )
+    if isinstance(e, json.JSONDecodeError):
+        return ChatReply(status.HTTP_400_BAD_REQUEST, envelope("json_error", "Please enter your request again."))
+    return ChatReply(
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        envelope("error", "An unexpected error occurred, please try again later.")
+    )
+
+
+def precheck(data: ChatInput) -> Optional[ChatReply]:
+    """Replies that need no agent run: missing message, FAQ fast-path and cached answers."""
+    if not data.message:
+        return ChatReply(status.HTTP_400_BAD_REQUEST, envelope("no_tool_call", "Message is required"))
+
+    # ✅ Clear FAQ questions are answered straight from the FAQ store, no model calls
+    faq_reply = faq_fast_path.answer(data.message)
+    if faq_reply is not None:
+        return ChatReply(status.HTTP_200_OK, faq_reply)
+
+    cached = response_cache.lookup(data.message, data.access_token)
+    if cached is not None:
+        return ChatReply(status.HTTP_200_OK, cached)
+    return None
 
-    except json.JSONDecodeError:
+
+async def run_chat(data: ChatInput, batch: bool = False) -> ChatReply:
+    reply = precheck(data)
+    if reply is not None:
+        return reply
+
+    msg = build_message(data)
+    try:
+        # ✅ Per-user, per-session and global rate limits, checked before any model work;
+        # batch items only take from the global bucket, behind interactive requests
+        if batch:
+            await rate_limiter.admit_batch(CHAT_BATCH_ITEM_WAIT)
+        else:
+            await rate_limiter.admit(data.user_id, data.session_id, logged_in=bool(data.access_token))
+        route = prerouter.route(data.message)
+        async with session_locks.hold(data.session_id), chat_gate.slot():
+            with cassettes.use(data.session_id):
+                if route:
+                    response = await router_pool.call(run_member, route, msg, user_id=data.user_id, session_id=data.session_id)
+                else:
+                    response = await router_pool.run(msg, user_id=data.user_id, session_id=data.session_id)
+        metrics.observe_run(response)
+        parsed = parse_reply(tool_envelope(response), response.content)
+        response_cache.store(data.message, data.access_token, parsed)
+        session_summaries.record(data.session_id, data.user_id, data.message, parsed.get("message"))
+        user_memories.record(data.user_id, data.message)
+        return ChatReply(status.HTTP_200_OK, result_store.attach(parsed))
+
+    except Exception as e:
+        return reply_for_exception(e)
+
+
+# ✅ Main chat endpoint with proper status codes
+@app.post("/chat")
+async def chat_handler(data: ChatInput):
+    started = time.perf_counter()
+    reply = await run_chat(data)
+    observe_chat("/chat", reply, started)
+    return JSONResponse(
+        status_code=reply.status_code,
+        headers=reply.headers,
+        content={"response": reply.response}
+    )
+
+
+# ✅ Batch endpoint: many conversations in one request, results streamed back as NDJSON as they finish
+@app.post("/chat/batch")
+async def chat_batch_handler(items: List[ChatInput], parallelism: Optional[int] = None):
+    if not items or len(items) > CHAT_BATCH_MAX_ITEMS:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content={
-                "response": {
-                    "type": "json_error",
-                    "success": False,
-                    "message": "Please enter your request again.",
-                    "login": False,
-                    "data": None
-                }
-            }
+            content={"response": envelope("error", f"A batch needs between 1 and {CHAT_BATCH_MAX_ITEMS} items")}
         )
+    lanes = max(1, min(parallelism or CHAT_BATCH_PARALLELISM, CHAT_MAX_IN_FLIGHT))
+
+    async def results():
+        batch_started = time.perf_counter()
+        codes = Counter()
+        # turns of one session run in list order; different sessions run side by side
+        finished = run_ordered(items, lambda item: item.session_id, lambda item: run_chat(item, batch=True), lanes)
+        async for index, reply, started, seconds in finished:
+            if isinstance(reply, Exception):
+                reply = reply_for_exception(reply)
+            codes[reply.status_code] += 1
+            observe_chat("/chat/batch", reply, started)
+            yield json.dumps({
+                "event": "item", "index": index, "session_id": items[index].session_id,
+                "status_code": reply.status_code, "started": round(started - batch_started, 3),
+                "seconds": round(seconds, 3), "response": reply.response,
+            }, default=str) + "\n"
+        yield json.dumps({
+            "event": "summary", "items": len(items), "parallelism": lanes,
+            "seconds": round(time.perf_counter() - batch_started, 3), "status_codes": dict(codes),
+        }) + "\n"
 
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+# ✅ Streaming chat endpoint (server-sent events)
+def final_event(reply: ChatReply) -> str:
+    return sse({"event": "final", "status_code": reply.status_code, "response": reply.response})
+
+
+async def stream_chat(data: ChatInput, slot: AsyncExitStack, started: float):
+    translator = StreamTranslator()
+    # from here on the stream owns the slot; the response's background close has nothing left to release
+    slot = slot.pop_all()
+    handed_over = False
+    try:
+        route = prerouter.route(data.message)
+        if route:
+            yield sse({"event": "routed", "agent": route, "by": "local"})
+        with cassettes.use(data.session_id):
+            # the pooled run releases the slot and session lock when it ends, even if the client left
+            events = router_pool.stream(
+                run_streaming, build_message(data), member_name=route,
+                user_id=data.user_id, session_id=data.session_id, hold=slot
+            )
+            handed_over = True
+            async for event in events:
+                for progress in translator.translate(event):
+                    yield sse(progress)
+        parsed = parse_reply(envelope_from_tools(translator.tools), translator.final_content())
+        response_cache.store(data.message, data.access_token, parsed)
+        session_summaries.record(data.session_id, data.user_id, data.message, parsed.get("message"))
+        user_memories.record(data.user_id, data.message)
+        reply = ChatReply(status.HTTP_200_OK, result_store.attach(parsed))
     except Exception as e:
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "response": {
-                    "type": "error",
-                    "success": False,
-                    "message": "An unexpected error occurred, please try again later.",
-                    "login": False,
-                    "data": None
-                }
-            }
-        )
+        reply = reply_for_exception(e)
+    finally:
+        if not handed_over:
+            await slot.aclose()
+    observe_chat("/chat/stream", reply, started)
+    yield final_event(reply)
+
+
+@app.post("/chat/stream")
+async def chat_stream_handler(data: ChatInput):
+    sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    started = time.perf_counter()
+
+    reply = precheck(data)
+    if reply is not None:
+        observe_chat("/chat/stream", reply, started)
+
+        async def single():
+            yield final_event(reply)
+        return StreamingResponse(single(), media_type="text/event-stream", headers=sse_headers)
+
+    # take the slot before answering so an overloaded server still returns a real 503 (or 429/409)
+    slot = AsyncExitStack()
+    try:
+        await rate_limiter.admit(data.user_id, data.session_id, logged_in=bool(data.access_token))
+        await slot.enter_async_context(session_locks.hold(data.session_id))
+        await slot.enter_async_context(chat_gate.slot())
+    except (RateLimited, SessionBusy, GateFull) as e:
+        await slot.aclose()
+        busy = reply_for_exception(e)
+        observe_chat("/chat/stream", busy, started)
+        return JSONResponse(status_code=busy.status_code, headers=busy.headers, content={"response": busy.response})
+
+    # the background close releases the slot and session lock if the client leaves before the stream starts;
+    # once it has started, stream_chat owns them
+    return StreamingResponse(stream_chat(data, slot, started), media_type="text/event-stream", headers=sse_headers,
+                             background=BackgroundTask(slot.aclose))
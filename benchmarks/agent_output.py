@@ -0,0 +1,88 @@
+"""Regression suite and microbenchmark for the agent output parser.
+
+Each case in agent_outputs.json is model output seen in chat logs together
+with the expected outcome (clean / extracted / repaired / defaulted / failed).
+The script checks every case, compares with the old fence-strip + json.loads
+parse and times both.
+
+    python -m benchmarks.agent_output
+"""
+import json
+import os
+import timeit
+
+from src.agent_output import AgentOutputParser
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent_outputs.json")
+
+
+def legacy_parse(content):
+    """chat_handler's parse before the tolerant extractor."""
+    raw = content.strip()
+    if raw.startswith("```json"):
+        raw = raw[len("```json"):].strip()
+    elif raw.startswith("```"):
+        raw = raw[len("```"):].strip()
+    if raw.endswith("```"):
+        raw = raw[:-3].strip()
+    return json.loads(raw)
+
+
+def outcome(parser, output):
+    before = dict(parser.counts)
+    try:
+        parser.parse(output)
+    except json.JSONDecodeError:
+        pass
+    return next(name for name, count in parser.counts.items() if count != before[name])
+
+
+def legacy_ok(output):
+    try:
+        return isinstance(legacy_parse(output), dict)
+    except ValueError:
+        return False
+
+
+def main():
+    with open(CORPUS, encoding="utf-8") as f:
+        cases = json.load(f)
+
+    parser = AgentOutputParser()
+    failures = []
+    print(f"{'case':<24} {'legacy':<8} {'expected':<10} got")
+    for case in cases:
+        got = outcome(parser, case["output"])
+        mark = "" if got == case["expect"] else "  <-- MISMATCH"
+        if mark:
+            failures.append(case["name"])
+        print(f"{case['name']:<24} {'ok' if legacy_ok(case['output']) else 'error':<8} {case['expect']:<10} {got}{mark}")
+
+    stats = parser.stats()
+    legacy_errors = sum(not legacy_ok(case["output"]) for case in cases)
+    print(f"\nlegacy json_error: {legacy_errors}/{len(cases)}   new json_error: {stats['failed']}/{len(cases)}")
+    print(f"repair rate: {stats['repair_rate']:.1%}  ({stats['extracted']} extracted, {stats['repaired']} repaired, {stats['defaulted']} defaulted)")
+
+    number = 200
+    outputs = [case["output"] for case in cases]
+    clean = [case["output"] for case in cases if case["expect"] == "clean"]
+    bench = AgentOutputParser()
+
+    def run_all(fn, items):
+        for item in items:
+            try:
+                fn(item)
+            except ValueError:
+                pass
+
+    for label, items in (("clean outputs", clean), ("whole corpus", outputs)):
+        old = timeit.timeit(lambda: run_all(legacy_parse, items), number=number) / (number * len(items))
+        new = timeit.timeit(lambda: run_all(bench.parse, items), number=number) / (number * len(items))
+        print(f"{label:<14} legacy {old * 1e6:6.1f} µs/parse   new {new * 1e6:6.1f} µs/parse")
+
+    if failures:
+        raise SystemExit(f"unexpected outcome for: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Runs a scripted suite through /chat one request at a time and through /chat/batch.
+
+The suite is the Test_cases.py queries plus a few agent queries, split into
+conversations of `--turns` messages. Models, Amadeus and the backend are
+`benchmarks.standins`. The batch run must return every item exactly once,
+with each session's turns finishing in the order they were sent, and every
+request of both runs must return 200; the report compares wall time of the
+two runs.
+
+    python -m benchmarks.batch_check --conversations 20 --turns 4 --parallelism 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.load import AGENT_QUERIES, ROOT, free_port, test_case_queries, wait_until_up
+from benchmarks.standins import client_env
+
+
+def suite(conversations: int, turns: int, tag: str) -> list:
+    queries = test_case_queries() + AGENT_QUERIES
+    items = []
+    for c in range(conversations):
+        for t in range(turns):
+            message = queries[(c * turns + t) % len(queries)]
+            # unique per run so the response cache doesn't answer the second run
+            items.append({"message": f"{message} ({tag} {c}.{t})", "user_id": f"qa-{c}",
+                          "session_id": f"qa-{tag}-{c}", "access_token": "t0k3n" if c % 2 else None})
+    return items
+
+
+async def main(args):
+    import httpx
+
+    import app as app_module
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=None) as client:
+        items = suite(args.conversations, args.turns, "seq")
+        sequential_codes = Counter()
+        started = time.perf_counter()
+        for item in items:
+            sequential_codes[(await client.post("/chat", json=item)).status_code] += 1
+        sequential = time.perf_counter() - started
+
+        items = suite(args.conversations, args.turns, "batch")
+        lines = []
+        started = time.perf_counter()
+        async with client.stream("POST", "/chat/batch", params={"parallelism": args.parallelism},
+                                 json=items) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    lines.append(json.loads(line))
+        batch = time.perf_counter() - started
+
+    results, summary = lines[:-1], lines[-1]
+    indexes = [r["index"] for r in results]
+    order = defaultdict(list)
+    for r in results:
+        order[r["session_id"]].append(r["index"])
+    out_of_order = [s for s, seen in order.items() if seen != sorted(seen)]
+    codes = Counter(r["status_code"] for r in results)
+    print(f"{len(items)} items, {args.conversations} conversations of {args.turns} turns")
+    print(f"  one at a time: {sequential:.2f}s")
+    print(f"  /chat/batch:   {batch:.2f}s (parallelism {summary['parallelism']}), {sequential / batch:.1f}x")
+    print(f"  status codes: one at a time {dict(sequential_codes)}, batch {dict(codes)}; item seconds p50 "
+          f"{sorted(r['seconds'] for r in results)[len(results) // 2]:.3f}")
+    if sorted(indexes) != list(range(len(items))) or out_of_order:
+        sys.exit(f"missing or duplicated items, or sessions out of order: {out_of_order}")
+    failed = [r for r in results if r["status_code"] != 200]
+    if failed or set(sequential_codes) != {200}:
+        first = failed[0] if failed else {}
+        sys.exit(f"not every request returned 200: one at a time {dict(sequential_codes)}, batch {dict(codes)}"
+                 + (f"; item {first['index']}: {json.dumps(first.get('response'))[:300]}" if first else ""))
+    print("ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--parallelism", type=int, default=8)
+    parser.add_argument("--llm-latency", default="lognormal:0.3,0.4")
+    args = parser.parse_args()
+
+    port = free_port()
+    standins = subprocess.Popen([sys.executable, "-m", "benchmarks.standins", "--port", str(port),
+                                 "--llm-latency", args.llm_latency, "--amadeus-latency", "lognormal:0.3,0.3",
+                                 "--backend-latency", "const:0.02"], cwd=ROOT)
+    os.environ.update({**client_env(port), "STORAGE_DIR": tempfile.mkdtemp(prefix="batch-check-storage-"),
+                       "RATE_LIMIT_ENABLED": "false", "SUMMARY_ENABLED": "false",
+                       "MEMORY_WORKER_ENABLED": "false", "ORCHESTRATOR_PRELOAD": "false"})
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/standin/stats")
+        asyncio.run(main(args))
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
@@ -0,0 +1,96 @@
+"""Records a conversation against the stand-ins, replays it offline and shows a mismatch diff.
+
+1. record: the app talks to `benchmarks.standins` with CASSETTE_MODE=record.
+2. replay: the stand-ins are gone and CASSETTE_MODE=replay; the replies must
+   be the same as when recording.
+3. a changed message is replayed to show the diff a mismatch produces.
+
+Each phase runs in its own process with fresh session storage, as a real
+replay would.
+
+    python -m benchmarks.cassette_check
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load import ROOT, free_port, wait_until_up
+from benchmarks.standins import client_env
+
+CONVERSATION = [
+    "Find flights from CAI to DXB on 2025-09-01",
+    "What flights have I booked?",
+    "Cancel my booking REF001",
+]
+
+
+def phase(messages):
+    """Runs inside the phase subprocess: sends `messages` as one conversation, prints the replies."""
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+    from src.cassette import cassettes
+
+    client = TestClient(app_module.app)
+    replies = []
+    for message in messages:
+        payload = {"message": message, "access_token": "t0k3n", "user_id": "u1", "session_id": "check-session"}
+        replies.append(client.post("/chat", json=payload).json()["response"])
+    print(json.dumps({"replies": replies, "cassettes": cassettes.stats(), "mismatches": cassettes.mismatches}))
+
+
+def run_phase(mode: str, messages, env: dict) -> dict:
+    env = {**env, "CASSETTE_MODE": mode,
+           "STORAGE_DIR": tempfile.mkdtemp(prefix="cassette-storage-")}
+    out = subprocess.run([sys.executable, "-m", "benchmarks.cassette_check", "--phase", json.dumps(messages)],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--phase", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.phase:
+        phase(json.loads(args.phase))
+        return
+
+    directory = tempfile.mkdtemp(prefix="cassettes-")
+    port = free_port()
+    env = {**os.environ, **client_env(port), "CASSETTE_DIR": directory, "CASSETTE_LATENCY": "none",
+           "SUMMARY_ENABLED": "false", "MEMORY_WORKER_ENABLED": "false", "RESPONSE_CACHE_ENABLED": "false",
+           "RATE_LIMIT_ENABLED": "false"}
+    standins = subprocess.Popen([sys.executable, "-m", "benchmarks.standins", "--port", str(port),
+                                 "--llm-latency", "const:0.02", "--amadeus-latency", "const:0.02",
+                                 "--backend-latency", "const:0.01"], cwd=ROOT)
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/standin/stats")
+        recorded = run_phase("record", CONVERSATION, env)
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
+
+    cassette = os.path.join(directory, "check-session.json")
+    with open(cassette) as f:
+        interactions = json.load(f)["interactions"]
+    print(f"recorded {recorded['cassettes']['recorded']} calls into {cassette}: "
+          + ", ".join(sorted({f"{i['request']['target']} {i['request']['path']}" for i in interactions})))
+
+    replayed = run_phase("replay", CONVERSATION, env)
+    assert replayed["replies"] == recorded["replies"], "replayed replies differ from the recorded ones"
+    assert not replayed["mismatches"], replayed["mismatches"]
+    assert not replayed["cassettes"]["unused"], replayed["cassettes"]["unused"]
+    print(f"ok: replayed {replayed['cassettes']['replayed']} calls offline, "
+          f"{len(replayed['replies'])} replies identical to the recording")
+
+    changed = run_phase("replay", CONVERSATION[:1] + ["What flights have I booked for next week?"], env)
+    assert changed["mismatches"], "a changed message should not match the cassette"
+    print("ok: a changed message is reported as a mismatch:\n")
+    print("\n".join(changed["mismatches"][0].splitlines()[:14]))
+
+
+if __name__ == "__main__":
+    main()
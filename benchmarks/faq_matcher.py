@@ -0,0 +1,121 @@
+"""Microbenchmark and accuracy table: FAQ store matcher vs the old keyword chain.
+
+Queries come from Test_cases.py (read with ast, nothing is executed) plus a
+few overlap cases the old chain got wrong.
+
+    python -m benchmarks.faq_matcher
+"""
+import ast
+import json
+import os
+import timeit
+
+from src.faq_store import faq_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTENTS = ["baggage policy", "refund rules", "rescheduling", "excess baggage",
+           "visa requirements", "check-in policy", "pet policy", "meal options"]
+AIRLINES = ["emirates", "qatar airways", "saudi airlines", "etihad", "flydubai"]
+
+OVERLAP_CASES = [
+    ("My bag is too heavy, what do I pay?", "excess baggage", None),
+    ("Can I change to a bigger excess baggage allowance on Emirates?", "excess baggage", "emirates"),
+    ("How do I reschedule my Qatar flight?", "rescheduling", "qatar airways"),
+    ("Can I take my cat in the cabin with Etihad?", "pet policy", "etihad"),
+]
+
+
+def legacy_match(query):
+    """customer_service's keyword chain before the FAQ store."""
+    normalized_query = query.lower()
+    matched_airline = None
+    airline_keywords = {
+        "emirates": "emirates", "qatar": "qatar airways", "qatar airways": "qatar airways",
+        "saudi": "saudi airlines", "saudi airlines": "saudi airlines", "etihad": "etihad", "flydubai": "flydubai"
+    }
+    for key in airline_keywords:
+        if key in normalized_query:
+            matched_airline = airline_keywords[key]
+            break
+    if any(word in normalized_query for word in ["laptop", "bag", "personal item", "carry-on", "cabin bag", "hand luggage"]):
+        intent = "baggage policy"
+    elif any(word in normalized_query for word in ["refund", "money back", "cancel my ticket"]):
+        intent = "refund rules"
+    elif any(word in normalized_query for word in ["reschedul", "change", "change my ticket", "change flight", "modify booking"]):
+        intent = "rescheduling"
+    elif any(word in normalized_query for word in ["excess", "extra weight", "too heavy", "overweight", "bag too heavy"]):
+        intent = "excess baggage"
+    elif any(word in normalized_query for word in ["visa", "travel document", "entry permit"]):
+        intent = "visa requirements"
+    elif any(word in normalized_query for word in ["check-in", "check in", "boarding pass", "when can I check"]):
+        intent = "check-in policy"
+    elif any(word in normalized_query for word in ["pet", "dog", "cat", "animal", "bring my pet"]):
+        intent = "pet policy"
+    elif any(word in normalized_query for word in ["meal", "food", "vegetarian", "special meal", "kosher", "halal"]):
+        intent = "meal options"
+    else:
+        intent = None
+    return intent, matched_airline
+
+
+def store_match(query):
+    match = faq_store.match(query)
+    return match.intent, match.airline
+
+
+def labelled_cases():
+    """Test_cases.py queries with their expected (intent, airline)."""
+    with open(os.path.join(ROOT, "Test_cases.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    queries = next(
+        ast.literal_eval(node.value) for node in tree.body
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "test_cases"
+    )
+    # 8 defaults, then 8 intents x 5 airlines, then one gibberish query
+    expected = [(intent, None) for intent in INTENTS]
+    expected += [(intent, airline) for intent in INTENTS for airline in AIRLINES]
+    expected += [(None, None)]
+    return list(zip(queries, expected)) + [(q, (i, a)) for q, i, a in OVERLAP_CASES]
+
+
+def accuracy(matcher, cases):
+    per_intent = {}
+    for query, (intent, airline) in cases:
+        got_intent, got_airline = matcher(query)
+        row = per_intent.setdefault(str(intent), [0, 0])
+        row[0] += got_intent == intent and got_airline == airline
+        row[1] += 1
+    return per_intent
+
+
+def main():
+    cases = labelled_cases()
+    queries = [query for query, _ in cases]
+    legacy, store = accuracy(legacy_match, cases), accuracy(store_match, cases)
+
+    print(f"{'intent':<20}{'cases':>6}{'legacy':>9}{'store':>9}")
+    for intent in legacy:
+        print(f"{intent:<20}{legacy[intent][1]:>6}{legacy[intent][0]:>9}{store[intent][0]:>9}")
+    total = len(cases)
+    legacy_ok = sum(row[0] for row in legacy.values())
+    store_ok = sum(row[0] for row in store.values())
+    print(f"{'total':<20}{total:>6}{legacy_ok:>9}{store_ok:>9}")
+
+    misses = [(q, e, store_match(q)) for q, e in cases if store_match(q) != e]
+    for query, expected, got in misses:
+        print(f"store miss: {query!r} expected={expected} got={got}")
+
+    runs = 200
+    timings = {}
+    for name, matcher in (("legacy", legacy_match), ("store", store_match)):
+        seconds = timeit.timeit(lambda: [matcher(q) for q in queries], number=runs)
+        timings[name] = round(seconds / (runs * len(queries)) * 1e6, 2)
+    print(json.dumps({
+        "queries": total,
+        "accuracy": {"legacy": round(legacy_ok / total, 3), "store": round(store_ok / total, 3)},
+        "us_per_query": timings,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compares a flexible-date, two-destination search done one search at a time with search_flights_flexible.
+
+Amadeus, the models and the backend are `benchmarks.standins`.
+
+1. tool level: the same `--days` x 2 routes queried one after another
+   through fetch_flight_offers, then through search_flights_flexible with
+   FLEX_SEARCH_CONCURRENCY queries at a time, then once more from the cache.
+2. /chat: one "cheapest day ... to DXB or DOH" message, which the stand-in
+   model answers with one search_flights_flexible call, against one
+   search_flights message per route and day, as the model used to do it.
+
+    python -m benchmarks.flexible_search --days 7 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.load import ROOT, free_port, wait_until_up
+from benchmarks.standins import client_env
+
+ROUTES = [("CAI", "DXB"), ("CAI", "DOH")]
+
+
+def days_from(first: str, n: int) -> list:
+    start = date.fromisoformat(first)
+    return [(start + timedelta(days=i)).isoformat() for i in range(n)]
+
+
+def tool_level(days: int):
+    from src.helper import fetch_flight_offers, search_flights_flexible
+
+    dates = days_from("2025-09-01", days)
+    started = time.perf_counter()
+    for origin, destination in ROUTES:
+        for day in dates:
+            fetch_flight_offers({"originLocationCode": origin, "destinationLocationCode": destination,
+                                 "departureDate": day, "adults": 1, "max": 3})
+    sequential = time.perf_counter() - started
+
+    # different dates so the fan-out doesn't start from the cache
+    dates = days_from("2025-10-01", days)
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        reply = search_flights_flexible.entrypoint(
+            originLocationCodes=["CAI"], destinationLocationCodes=["DXB", "DOH"],
+            departureDateFrom=dates[0], departureDateTo=dates[-1])
+        timings.append(time.perf_counter() - started)
+    print(reply["message"])
+    print(f"\n{len(ROUTES) * days} Amadeus searches")
+    print(f"  one at a time:           {sequential:.2f}s")
+    print(f"  search_flights_flexible: {timings[0]:.2f}s, {sequential / timings[0]:.1f}x")
+    print(f"  again, from the cache:   {timings[1]:.3f}s")
+    if not reply["success"] or not reply["data"]:
+        sys.exit("flexible search failed")
+
+
+async def chat_level(days: int):
+    import httpx
+
+    import app as app_module
+
+    dates = days_from("2025-11-01", days)
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=None) as client:
+        started = time.perf_counter()
+        for origin, destination in ROUTES:
+            for day in dates:
+                await client.post("/chat", json={"message": f"search flights {origin} to {destination} on {day}",
+                                                 "user_id": "flex", "session_id": "flex-one-by-one"})
+        one_by_one = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post("/chat", json={
+            "message": f"cheapest day flights CAI to DXB or DOH between {dates[0]} and {dates[-1]}",
+            "user_id": "flex", "session_id": "flex-once"})
+        once = time.perf_counter() - started
+    body = response.json().get("response") or {}
+    print(f"\n/chat, {len(ROUTES) * days} route-days")
+    print(f"  one search_flights turn each: {one_by_one:.2f}s")
+    print(f"  one flexible turn:            {once:.2f}s, {one_by_one / once:.1f}x")
+    if not body.get("success") or not body.get("data"):
+        sys.exit(f"flexible /chat turn failed: {body.get('message')}")
+    if not isinstance(body["data"], dict):
+        sys.exit(f"flexible /chat turn returned data as a {type(body['data']).__name__}, not the offers object")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=4, help="FLEX_SEARCH_CONCURRENCY")
+    parser.add_argument("--amadeus-latency", default="lognormal:0.5,0.3")
+    parser.add_argument("--llm-latency", default="lognormal:0.3,0.3")
+    args = parser.parse_args()
+
+    port = free_port()
+    standins = subprocess.Popen([sys.executable, "-m", "benchmarks.standins", "--port", str(port),
+                                 "--llm-latency", args.llm_latency, "--amadeus-latency", args.amadeus_latency,
+                                 "--backend-latency", "const:0"], cwd=ROOT)
+    os.environ.update({**client_env(port), "STORAGE_DIR": tempfile.mkdtemp(prefix="flexible-search-storage-"),
+                       "FLEX_SEARCH_CONCURRENCY": str(args.concurrency),
+                       "FLEX_SEARCH_MAX_QUERIES": str(max(14, len(ROUTES) * args.days)),
+                       "RATE_LIMIT_ENABLED": "false", "RESPONSE_CACHE_ENABLED": "false", "SUMMARY_ENABLED": "false",
+                       "MEMORY_WORKER_ENABLED": "false", "ORCHESTRATOR_PRELOAD": "false"})
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/standin/stats")
+        tool_level(args.days)
+        asyncio.run(chat_level(args.days))
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
+    print("ok")
@@ -0,0 +1,96 @@
+"""Tokens the model must generate for a search_flights reply, before and after out-of-band data.
+
+Before: the model copied the whole Amadeus body into "data". After: it copies a
+result id and /chat attaches the body. The body is stored as Amadeus returns it,
+a JSON string, and the attached data must still be the object. Token counts use the common ~4
+characters/token estimate; latency assumes the given decode speed.
+
+    python -m benchmarks.flight_payload --offers 2 --tokens-per-second 300
+"""
+import argparse
+import json
+import time
+
+from src.result_store import result_store
+
+
+def amadeus_offer(i):
+    segment = {
+        "departure": {"iataCode": "CAI", "terminal": "2", "at": "2025-08-01T03:15:00"},
+        "arrival": {"iataCode": "DXB", "terminal": "3", "at": "2025-08-01T08:05:00"},
+        "carrierCode": "EK", "number": str(924 + i), "aircraft": {"code": "77W"},
+        "operating": {"carrierCode": "EK"}, "duration": "PT3H50M", "id": str(i + 1),
+        "numberOfStops": 0, "blacklistedInEU": False,
+    }
+    return {
+        "type": "flight-offer", "id": str(i + 1), "source": "GDS", "instantTicketingRequired": False,
+        "nonHomogeneous": False, "oneWay": False, "lastTicketingDate": "2025-07-20", "numberOfBookableSeats": 9,
+        "itineraries": [{"duration": "PT3H50M", "segments": [segment]}],
+        "price": {"currency": "USD", "total": f"{412.5 + i * 37:.2f}", "base": "301.00",
+                  "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}],
+                  "grandTotal": f"{412.5 + i * 37:.2f}"},
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": True},
+        "validatingAirlineCodes": ["EK"],
+        "travelerPricings": [{
+            "travelerId": "1", "fareOption": "STANDARD", "travelerType": "ADULT",
+            "price": {"currency": "USD", "total": f"{412.5 + i * 37:.2f}", "base": "301.00"},
+            "fareDetailsBySegment": [{"segmentId": str(i + 1), "cabin": "ECONOMY", "fareBasis": "TLSOPEG1",
+                                      "brandedFare": "ECOSAVER", "class": "T",
+                                      "includedCheckedBags": {"quantity": 1}}],
+        }],
+    }
+
+
+def amadeus_body(offers):
+    return {
+        "meta": {"count": offers, "links": {"self": "https://test.api.amadeus.com/v2/shopping/flight-offers?..."}},
+        "data": [amadeus_offer(i) for i in range(offers)],
+        "dictionaries": {"locations": {"CAI": {"cityCode": "CAI", "countryCode": "EG"},
+                                       "DXB": {"cityCode": "DXB", "countryCode": "AE"}},
+                         "aircraft": {"77W": "BOEING 777-300ER"}, "currencies": {"USD": "US DOLLAR"},
+                         "carriers": {"EK": "EMIRATES"}},
+    }
+
+
+def reply(data, offers):
+    message = "✈️ Flight options from CAI to DXB on 2025-08-01:\n\n" + "".join(
+        f"Option {i + 1}:\n  • Flight: EK{924 + i}\n  • From: CAI at 2025-08-01 03:15\n"
+        f"  • To: DXB at 2025-08-01 08:05\n  • Duration: 3h50m\n  • Price: USD {412.5 + i * 37:.2f}\n\n"
+        for i in range(offers)
+    )
+    return {"type": "search_flights", "success": True, "message": message.strip(), "login": False, "data": data}
+
+
+def tokens(text):
+    return max(1, round(len(text) / 4))
+
+
+def main(args):
+    body = amadeus_body(args.offers)
+    before = json.dumps(reply(body, args.offers), ensure_ascii=False)
+    result_id = result_store.put(json.dumps(body))   # Amadeus' response.body is a string
+    after = json.dumps(reply(result_id, args.offers), ensure_ascii=False)
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        result_store.attach(json.loads(after))
+    attach_us = (time.perf_counter() - start) * 1000
+
+    attached = result_store.attach(json.loads(after))["data"]
+    assert isinstance(attached, dict), f"data is a {type(attached).__name__}, not the offers object"
+    assert attached == body
+    report = {}
+    for name, text in (("before", before), ("after", after)):
+        n = tokens(text)
+        report[name] = {"reply_chars": len(text), "output_tokens": n,
+                        "decode_seconds": round(n / args.tokens_per_second, 2)}
+    report["output_tokens_saved"] = report["before"]["output_tokens"] - report["after"]["output_tokens"]
+    report["attach_us_per_reply"] = round(attach_us, 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=2)
+    parser.add_argument("--tokens-per-second", type=float, default=300.0)
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+"""Load test: /health latency while /chat is saturated.
+
+Replaces the router team with a stand-in whose blocking `run` sleeps for
+CHAT_LATENCY seconds (like a slow Groq round trip), fires CHAT_CLIENTS
+concurrent /chat requests and probes /health in parallel.
+
+    python -m benchmarks.health_under_load --clients 64 --chat-latency 2
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+
+import app as app_module
+from src.concurrency import AgentPool
+
+
+class SlowTeam:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def run(self, message, user_id=None, session_id=None):
+        time.sleep(self.latency)
+        return SimpleNamespace(content=json.dumps({
+            "type": "no_tool_call", "success": True, "message": "ok", "login": False, "data": None
+        }))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def probe_health(client, stop, samples, interval):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def main(args):
+    app_module.router_pool = AgentPool(lambda: SlowTeam(args.chat_latency), size=app_module.chat_gate.max_in_flight)
+    app_module.rate_limiter.enabled = False   # measures the admission gate, not the rate limits
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        idle, stop = [], asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop, idle, args.probe_interval))
+        await asyncio.sleep(1)
+        stop.set()
+        await probe
+
+        loaded, stop = [], asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop, loaded, args.probe_interval))
+        payload = {"message": "what can you do for me?", "user_id": "bench", "session_id": "bench"}
+        start = time.perf_counter()
+        chats = await asyncio.gather(*[
+            client.post("/chat", json={**payload, "session_id": str(i)}) for i in range(args.clients)
+        ])
+        wall = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    codes = {}
+    for r in chats:
+        codes[r.status_code] = codes.get(r.status_code, 0) + 1
+    report = {
+        "clients": args.clients,
+        "chat_latency_s": args.chat_latency,
+        "chat_wall_s": round(wall, 2),
+        "chat_status_codes": codes,
+        "health_idle_ms": {"p50": round(statistics.median(idle), 2), "p99": round(percentile(idle, 0.99), 2)},
+        "health_loaded_ms": {"p50": round(statistics.median(loaded), 2), "p99": round(percentile(loaded, 0.99), 2),
+                             "max": round(max(loaded), 2), "samples": len(loaded)},
+        "gate": app_module.chat_gate.stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--chat-latency", type=float, default=2.0)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
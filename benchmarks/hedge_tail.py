@@ -0,0 +1,92 @@
+"""Compares /chat tail latency with model-call hedging off and on.
+
+The stand-ins give every role's primary model a long tail (`--tail`, by
+default 5% of calls take 3 s) and the backup model a plain fast latency.
+The same workload runs in one process, alternating `hedger.enabled` off and
+on per request so both see the same storage growth; the report has p50/p95/p99 for both and the share of model calls
+that fired a backup request, which must stay under HEDGE_MAX_RATIO.
+
+    python -m benchmarks.hedge_tail --requests 200 --deadline 0.5 --max-ratio 0.1
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load import ROOT, free_port, percentile, wait_until_up
+from benchmarks.standins import client_env
+
+BACKUP = "llama-3.1-8b-instant"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--tail", default="tail:0.05,0.05,3.0", help="latency spec for the primary models")
+    parser.add_argument("--backup-latency", default="const:0.08")
+    parser.add_argument("--deadline", type=float, default=0.5, help="HEDGE_DEADLINE")
+    parser.add_argument("--max-ratio", type=float, default=0.1, help="HEDGE_MAX_RATIO")
+    parser.add_argument("--stream-share", type=float, default=0.25, help="share of requests sent to /chat/stream")
+    args = parser.parse_args()
+
+    port = free_port()
+    standins = subprocess.Popen([sys.executable, "-m", "benchmarks.standins", "--port", str(port),
+                                 "--llm-latency", args.tail, "--amadeus-latency", "const:0",
+                                 "--backend-latency", "const:0", f"--model-latency={BACKUP}={args.backup_latency}"],
+                                cwd=ROOT)
+    os.environ.update({**client_env(port), "STORAGE_DIR": tempfile.mkdtemp(prefix="hedge-tail-storage-"),
+                       "HEDGE_BACKUP": f"groq:{BACKUP}", "HEDGE_DEADLINE": str(args.deadline),
+                       "HEDGE_MAX_RATIO": str(args.max_ratio), "MODEL_MIN_SAMPLES": "1000000",
+                       "RESPONSE_CACHE_ENABLED": "false", "ORCHESTRATOR_PRELOAD": "false",
+                       "SUMMARY_ENABLED": "false", "MEMORY_WORKER_ENABLED": "false", "RATE_LIMIT_ENABLED": "false"})
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/standin/stats")
+        from fastapi.testclient import TestClient
+
+        import app as app_module
+        from src.hedging import hedger
+
+        client = TestClient(app_module.app)
+        stream_every = round(1 / args.stream_share) if args.stream_share else 0
+
+        def request(label, i):
+            payload = {"message": f"Can you help me plan a trip? ({label} {i})", "user_id": "hedge",
+                       "session_id": f"hedge-{label}-{i}"}
+            hedger.enabled = label == "on"
+            started = time.perf_counter()
+            if stream_every and i % stream_every == 0:
+                with client.stream("POST", "/chat/stream", json=payload) as response:
+                    response.raise_for_status()
+                    for _ in response.iter_lines():
+                        pass
+            else:
+                client.post("/chat", json=payload).raise_for_status()
+            return time.perf_counter() - started
+
+        hedger.counts.clear()
+        samples = {"off": [], "on": []}
+        for i in range(args.requests):
+            for label in ("off", "on") if i % 2 else ("on", "off"):
+                samples[label].append(request(label, i))
+        off, on = ({"p50": percentile(s, 0.5), "p95": percentile(s, 0.95), "p99": percentile(s, 0.99),
+                    "max": max(s)} for s in (samples["off"], samples["on"]))
+        stats = hedger.stats()
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
+
+    print(f"{'':<12}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+    for label, report in (("hedging off", off), ("hedging on", on)):
+        print(f"{label:<12}" + "".join(f"{report[k]:>8.3f}" for k in ("p50", "p95", "p99", "max")))
+    print(json.dumps(stats, indent=2))
+    hedged_share = stats.get("hedged", 0) / max(1, stats.get("calls", 0))
+    print(f"backup requests: {hedged_share:.1%} of model calls (cap {args.max_ratio:.0%})")
+    if hedged_share > args.max_ratio:
+        sys.exit("hedge ratio over the cap")
+
+
+if __name__ == "__main__":
+    main()
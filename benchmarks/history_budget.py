@@ -0,0 +1,88 @@
+"""Replayed-history tokens per turn over a 30-turn scripted session.
+
+Compares agno's window (last 3 runs verbatim, the default, and last
+HISTORY_MAX_RUNS verbatim), with the summary regenerated inside every request,
+against BudgetedMemory (up to HISTORY_MAX_RUNS runs trimmed to
+HISTORY_TOKEN_BUDGET, summary updated after the reply). Runs are built the
+way the route-mode team stores them; no model is called.
+
+    python -m benchmarks.history_budget
+"""
+import statistics
+
+from agno.memory.v2.memory import Memory
+from agno.models.message import Message
+from agno.run.response import RunResponse, RunStatus
+
+import src.history as history
+from src.history import BudgetedMemory, HISTORY_MAX_RUNS, HISTORY_TOKEN_BUDGET, estimate_tokens
+
+SESSION = "bench-session"
+SUMMARY = ("The user, based in Cairo, searched flights from CAI to DXB and JED for early August, "
+           "asked about Emirates baggage allowance and refund rules, listed their bookings and "
+           "cancelled booking ABC123. They prefer morning departures and economy class.")
+
+FLIGHTS = "\n".join(
+    f"{i}. EK92{i} CAI 0{i}:15 → DXB 1{i}:40, 3h25m, nonstop, economy, 1 x 23 kg bag, USD {310 + 17 * i}.00"
+    for i in range(1, 9)
+)
+SCRIPT = [
+    ("Find me a flight from Cairo to Dubai on August 1st", "search_flights",
+     f"Here are the available flights from CAI to DXB on 2025-08-01:\n{FLIGHTS}", "flt_3f2a9c0d11b84e27"),
+    ("What's the baggage allowance on Emirates?", "customer_service",
+     "Emirates economy allows 1 x 23 kg checked bag and 7 kg cabin baggage. Business allows 2 x 32 kg.", None),
+    ("Show my bookings", "booked_flight",
+     "Here are your confirmed bookings:\n\n" + "\n".join(
+         f"{i}. Cairo → Dubai on 2025-08-0{i} | Ref: ABC12{i} | Status: confirmed | Paid: USD 41{i}.00"
+         for i in range(1, 6)), None),
+    ("Cancel ABC123", "cancel_flight", "✅ Booking ABC123 has been successfully cancelled.", None),
+    ("hi, thanks!", "no_tool_call", "You're welcome! Anything else I can help with?", None),
+]
+
+
+def turn(n):
+    question, tool, message, data = SCRIPT[n % len(SCRIPT)]
+    envelope = {"type": tool, "success": True, "message": message, "login": False, "data": data}
+    forward = {"id": f"call_{n}", "type": "function",
+               "function": {"name": "forward_task_to_member",
+                            "arguments": f'{{"member_id": "flight_agent", "expected_output": "{tool} envelope"}}'}}
+    return RunResponse(
+        run_id=f"run-{n}", session_id=SESSION, status=RunStatus.running,
+        messages=[
+            Message(role="user", content=question),
+            Message(role="assistant", tool_calls=[forward]),
+            Message(role="tool", tool_call_id=f"call_{n}", content=str(envelope) + ","),
+        ],
+    )
+
+
+def tokens(messages):
+    return sum(estimate_tokens(m) for m in messages)
+
+
+def main():
+    history.session_summaries.get = lambda session_id: SUMMARY  # no storage or model in the bench
+    before_memory, after_memory = Memory(), BudgetedMemory()
+    before, wide, after = [], [], []
+    print(f"{'turn':>4} {'last 3':>8} {'last ' + str(HISTORY_MAX_RUNS):>8} {'budgeted':>9}")
+    for n in range(30):
+        # agno's summary goes into the system message every turn; ours arrives as a history message
+        summary_tokens = len(SUMMARY) // 4 if n else 0
+        before.append(tokens(before_memory.get_messages_from_last_n_runs(SESSION, last_n=3)) + summary_tokens)
+        wide.append(tokens(before_memory.get_messages_from_last_n_runs(SESSION, last_n=HISTORY_MAX_RUNS)) + summary_tokens)
+        after.append(tokens(after_memory.get_messages_from_last_n_runs(SESSION, last_n=HISTORY_MAX_RUNS)))
+        if (n + 1) % 5 == 0 or n == 0:
+            print(f"{n + 1:>4} {before[-1]:>8} {wide[-1]:>8} {after[-1]:>9}")
+        run = turn(n)
+        before_memory.runs.setdefault(SESSION, []).append(run)
+        after_memory.runs.setdefault(SESSION, []).append(run)
+
+    print("\nhistory tokens / turn (mean, max)")
+    for label, values in (("agno, last 3", before), (f"agno, last {HISTORY_MAX_RUNS}", wide),
+                          (f"budgeted ({HISTORY_TOKEN_BUDGET})", after)):
+        print(f"  {label:<16} {statistics.mean(values):6.0f} {max(values):6}")
+    print("summary model calls inside the request: before 30, after 0 (queued after the reply)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Load and latency benchmark for /chat, fully offline.
+
+Groq, Amadeus and the backend API are replaced by `benchmarks.standins`
+running in a subprocess with the given latency distributions. The app runs
+either in this process (driven through httpx's ASGI transport) or as a
+uvicorn subprocess on localhost. Queries are the ones in Test_cases.py plus a
+few that go through the agents and tools.
+
+Reports p50/p95/p99, throughput, the mix of status codes and response types,
+and the app's peak RSS. `--json` writes the same report for comparing runs;
+`--baseline` prints the change against an earlier report.
+
+    python -m benchmarks.load --concurrency 16 --requests 400 --json tmp/load.json
+    python -m benchmarks.load --mode localhost --llm-latency tail:0.9,0.03,10
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.standins import add_latency_args, client_env
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# queries that go past the FAQ fast path to the agents and their tools
+AGENT_QUERIES = [
+    "Find flights from CAI to DXB on 2025-09-01",
+    "Search flights from JED to DOH on 2025-10-12 for 2 adults",
+    "What flights have I booked?",
+    "Show my bookings please",
+    "Cancel my booking REF001",
+    "I forgot my password, please reset it",
+    "Hi, how are you?",
+    "Can you help me plan a trip?",
+]
+
+
+def test_case_queries(path: str = os.path.join(ROOT, "Test_cases.py")) -> list:
+    """The `test_cases` list from Test_cases.py, read without running the script."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "test_cases" for t in node.targets):
+            return ast.literal_eval(node.value)
+    return []
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def peak_rss_mb(pid=None) -> float:
+    if pid is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def build_workload(args) -> list:
+    rng = random.Random(args.seed)
+    pool = test_case_queries() * args.faq_weight + AGENT_QUERIES * args.agent_weight
+    workload = []
+    for i in range(args.requests):
+        message = rng.choice(pool)
+        if not args.repeat:
+            message = f"{message} (#{i})"  # keep the response cache out of the picture
+        workload.append({
+            "message": message,
+            "access_token": f"token-{i % args.users}" if rng.random() < args.logged_in else None,
+            "user_id": f"load-user-{i % args.users}",
+            "session_id": f"load-session-{i % args.sessions}",
+        })
+    return workload
+
+
+async def drive(client: httpx.AsyncClient, workload: list, concurrency: int) -> list:
+    queue: "asyncio.Queue" = asyncio.Queue()
+    for item in workload:
+        queue.put_nowait(item)
+    samples = []
+
+    async def worker():
+        while not queue.empty():
+            payload = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.post("/chat", json=payload)
+                status = response.status_code
+                kind = (response.json().get("response") or {}).get("type", "unknown")
+            except Exception as e:
+                status, kind = "exception", type(e).__name__
+            samples.append({"ms": (time.perf_counter() - started) * 1000, "status": status, "type": kind})
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = [s["ms"] for s in samples]
+    ok = [s for s in samples if s["status"] == 200]
+    return {
+        "requests": len(samples),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+            "mean": round(statistics.mean(latencies), 1) if latencies else 0.0,
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "status": dict(Counter(str(s["status"]) for s in samples)),
+        "types": dict(Counter(s["type"] for s in samples)),
+    }
+
+
+async def run_inprocess(args, workload):
+    import app as app_module
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await drive(client, workload[:args.warmup], args.concurrency)
+        started = time.perf_counter()
+        samples = await drive(client, workload[args.warmup:], args.concurrency)
+        elapsed = time.perf_counter() - started
+    return samples, elapsed, peak_rss_mb()
+
+
+async def run_localhost(args, workload, env):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/health")
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            await drive(client, workload[:args.warmup], args.concurrency)
+            started = time.perf_counter()
+            samples = await drive(client, workload[args.warmup:], args.concurrency)
+            elapsed = time.perf_counter() - started
+        return samples, elapsed, peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def print_report(report: dict, baseline=None):
+    lat = report["latency_ms"]
+    print(f"{report['config']['mode']}, concurrency {report['config']['concurrency']}: "
+          f"{report['requests']} requests in {report['duration_s']}s")
+    rows = [("throughput (req/s)", report["throughput_rps"], ("throughput_rps",)),
+            ("p50 (ms)", lat["p50"], ("latency_ms", "p50")),
+            ("p95 (ms)", lat["p95"], ("latency_ms", "p95")),
+            ("p99 (ms)", lat["p99"], ("latency_ms", "p99")),
+            ("error rate", report["error_rate"], ("error_rate",)),
+            ("peak RSS (MB)", report["peak_rss_mb"], ("peak_rss_mb",))]
+    for label, value, path in rows:
+        line = f"  {label:<20}{value:>10}"
+        if baseline:
+            before = baseline
+            for key in path:
+                before = before.get(key, {}) if isinstance(before, dict) else {}
+            if isinstance(before, (int, float)) and before:
+                line += f"   ({(value - before) / before * 100:+.1f}% vs baseline {before})"
+        print(line)
+    print(f"  status: {report['status']}")
+    print(f"  types:  {report['types']}")
+    print(f"  stand-in calls: {report['standins'].get('calls', {})}")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "localhost"], default="inprocess")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--logged-in", type=float, default=0.5, help="share of requests with an access token")
+    parser.add_argument("--faq-weight", type=int, default=1, help="times the Test_cases.py queries are in the mix")
+    parser.add_argument("--agent-weight", type=int, default=4, help="times the agent queries are in the mix")
+    parser.add_argument("--repeat", action="store_true", help="send messages verbatim, so repeats hit the response cache")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier --json report to compare against")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the app's rate limits on")
+    add_latency_args(parser)
+    args = parser.parse_args()
+
+    standin_port = free_port()
+    standins = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.standins", "--port", str(standin_port),
+         "--llm-latency", args.llm_latency, "--amadeus-latency", args.amadeus_latency,
+         "--backend-latency", args.backend_latency, "--error-rate", str(args.error_rate),
+         *(f"--model-latency={spec}" for spec in args.model_latency)],
+        cwd=ROOT,
+    )
+    env = {**os.environ, **client_env(standin_port), "STORAGE_DIR": tempfile.mkdtemp(prefix="load-storage-"),
+           "RATE_LIMIT_ENABLED": "true" if args.rate_limits else "false"}
+    os.environ.update(env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{standin_port}/standin/stats")
+        workload = build_workload(args)
+        if args.mode == "inprocess":
+            samples, elapsed, rss = asyncio.run(run_inprocess(args, workload))
+        else:
+            samples, elapsed, rss = asyncio.run(run_localhost(args, workload, env))
+        standin_stats = httpx.get(f"http://127.0.0.1:{standin_port}/standin/stats").json()
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("json", "baseline")}
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "config": config,
+        **summarize(samples, elapsed),
+        "peak_rss_mb": round(rss, 1),
+        "standins": standin_stats,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measures what the Prometheus instrumentation costs per /chat request.
+
+First the observations one routed request makes (router, member, two tool
+calls, two outbound HTTP calls, three model calls, parse outcome, chat
+latency) are timed with metrics on and off. Then /chat is driven through
+TestClient with the scripted stand-in team from stream_check, so no model or
+backend is contacted, and the mean request time is compared.
+
+    python -m benchmarks.metrics_overhead [requests]
+"""
+import statistics
+import sys
+import time
+
+from agno.models.message import Message, MessageMetrics
+from fastapi.testclient import TestClient
+
+import app as app_module
+from benchmarks.stream_check import ScriptedTeam
+from src import metrics
+from src.concurrency import AgentPool
+
+
+def fake_tool(**kwargs):
+    return {"type": "booked_flight", "success": True, "message": "ok", "login": False, "data": None}
+
+
+class FakeRun:
+    model = "qwen-qwq-32b"
+    messages = [Message(role="assistant", content="", metrics=MessageMetrics(input_tokens=900, output_tokens=60, time=0.8))
+                for _ in range(3)]
+    member_responses = []
+
+
+def one_request():
+    metrics.observe(metrics.ROUTER_LATENCY, 0.0001, "local")
+    for name in ("booked_flight", "search_flights"):
+        metrics.tool_hook(name, fake_tool, {"access_token": "t"})
+    metrics.observe_http("backend", "GET", "/booking/my-bookings", 200, 0.12)
+    metrics.observe_http("amadeus", "GET", "/v2/shopping/flight-offers", 200, 0.9)
+    metrics.observe(metrics.MEMBER_LATENCY, 2.1, "flight_agent")
+    metrics.observe_run(FakeRun())
+    metrics.count(metrics.AGENT_OUTPUT, "clean")
+    metrics.observe(metrics.CHAT_LATENCY, 2.4, "/chat", "booked_flight")
+
+
+def micro(n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        one_request()
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def end_to_end(client: TestClient, n: int) -> float:
+    payload = {"message": "what do I have booked?", "access_token": "t", "user_id": "u", "session_id": "s"}
+    samples = []
+    for i in range(n):
+        payload["message"] = f"what do I have booked? #{i}"  # miss the response cache
+        started = time.perf_counter()
+        client.post("/chat", json=payload)
+        samples.append(time.perf_counter() - started)
+    return statistics.mean(samples) * 1e3
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app_module.router_pool = AgentPool(ScriptedTeam, size=2)
+    app_module.prerouter.min_confidence = 2.0
+    app_module.session_summaries.enabled = False  # no background model calls
+    app_module.user_memories.enabled = False
+    app_module.rate_limiter.enabled = False
+    client = TestClient(app_module.app)
+    end_to_end(client, 20)  # warm up
+
+    print(f"{'':<10}{'observations/request':>22}{'/chat mean':>14}")
+    results = {}
+    for flag in (False, True, False, True):
+        metrics.set_enabled(flag)
+        results[flag] = (micro(n * 10), end_to_end(client, n))
+    for flag, label in ((False, "disabled"), (True, "enabled")):
+        us, ms = results[flag]
+        print(f"{label:<10}{us:>19.1f} µs{ms:>11.3f} ms")
+    overhead = results[True][0] - results[False][0]
+    print(f"\ninstrumentation adds ~{overhead:.1f} µs per request "
+          f"({overhead / 1e3 / results[False][1] * 100:.2f}% of the stand-in /chat, far less of a real one)")
+    print(f"/metrics payload: {len(metrics.render()[0])} bytes")
+
+
+if __name__ == "__main__":
+    main()
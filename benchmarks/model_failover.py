@@ -0,0 +1,82 @@
+"""Shows `src.model_registry` moving a role off a slow model and back.
+
+The stand-ins answer the router's primary model slowly (over its p95
+budget); after MODEL_MIN_SAMPLES calls the registry should switch the router
+to its fallback, and /chat latency should drop. Once the slow calls age out
+of MODEL_WINDOW_SECONDS the primary is tried again.
+
+    python -m benchmarks.model_failover --slow 1.0 --budget 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load import ROOT, free_port, wait_until_up
+from benchmarks.standins import client_env
+
+PRIMARY = "llama-3.3-70b-versatile"
+FALLBACK = "llama-3.1-8b-instant"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--slow", type=float, default=1.0, help="seconds per call to the router's primary")
+    parser.add_argument("--budget", type=float, default=0.5, help="router p95 budget in seconds")
+    parser.add_argument("--window", type=float, default=30.0, help="MODEL_WINDOW_SECONDS")
+    args = parser.parse_args()
+
+    port = free_port()
+    standins = subprocess.Popen([sys.executable, "-m", "benchmarks.standins", "--port", str(port),
+                                 "--llm-latency", "const:0.02", "--amadeus-latency", "const:0",
+                                 "--backend-latency", "const:0", f"--model-latency={PRIMARY}=const:{args.slow}"],
+                                cwd=ROOT)
+    roles = {"router": {"models": [PRIMARY, FALLBACK], "p95_budget": args.budget}}
+    os.environ.update({**client_env(port), "STORAGE_DIR": tempfile.mkdtemp(prefix="model-failover-storage-"),
+                       "MODEL_ROLES": json.dumps(roles), "MODEL_MIN_SAMPLES": "3",
+                       "MODEL_WINDOW_SECONDS": str(args.window), "ORCHESTRATOR_PRELOAD": "false",
+                       "SUMMARY_ENABLED": "false", "MEMORY_WORKER_ENABLED": "false", "RATE_LIMIT_ENABLED": "false"})
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/standin/stats")
+        from fastapi.testclient import TestClient
+
+        import app as app_module
+        from src.model_registry import model_registry
+
+        client = TestClient(app_module.app)
+
+        def chat(i):
+            started = time.perf_counter()
+            response = client.post("/chat", json={"message": "Can you help me plan a trip?",
+                                                  "user_id": "failover", "session_id": f"failover-{i}"})
+            response.raise_for_status()
+            return time.perf_counter() - started, model_registry.stats()["roles"]["router"]["current"]
+
+        runs = [chat(i) for i in range(args.requests)]
+        print(f"{'#':>3}  {'seconds':>8}  router model")
+        for i, (seconds, model) in enumerate(runs):
+            print(f"{i:>3}  {seconds:>8.3f}  {model}")
+        on_primary = [s for s, m in runs if m == PRIMARY]
+        on_fallback = [s for s, m in runs if m == FALLBACK]
+        print()
+        print(f"median /chat on {PRIMARY}: {statistics.median(on_primary):.3f}s" if on_primary else "")
+        print(f"median /chat on {FALLBACK}: {statistics.median(on_fallback):.3f}s" if on_fallback else "")
+
+        time.sleep(args.window + 0.5)
+        _, model = chat(args.requests)
+        print(f"after the window expired the router uses {model}")
+        print(json.dumps(model_registry.stats()["models"], indent=2))
+        if not on_fallback:
+            sys.exit("router never switched to its fallback")
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Exercises the /chat rate limits against a scripted team (no model calls).
+
+1. retry loop: one user fires a burst of requests at once; the burst size
+   goes through, requests whose token comes within RATE_LIMIT_MAX_WAIT queue,
+   the rest get a 429 with Retry-After.
+2. priority: with a tight global limit, anonymous and logged-in requests
+   arrive together; logged-in ones are admitted first.
+3. reload: RATE_LIMITS_FILE is rewritten with higher limits and the next
+   burst goes through without a restart.
+
+    python -m benchmarks.rate_limit_check
+"""
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+LIMITS = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False).name
+os.environ.update({"RATE_LIMITS_FILE": LIMITS, "RATE_LIMITS_RELOAD_INTERVAL": "0",
+                   "RESPONSE_CACHE_ENABLED": "false"})
+
+
+def write_limits(settings: dict):
+    with open(LIMITS, "w") as f:
+        json.dump(settings, f)
+    # make sure the mtime changes even within the filesystem's timestamp resolution
+    os.utime(LIMITS, (time.time() + 1, time.time() + 1))
+
+
+write_limits({"max_wait": 1.0, "user": {"per_minute": 120, "burst": 3}, "session": {"per_minute": 0},
+              "global": {"per_minute": 0}})
+
+import httpx  # noqa: E402
+
+import app as app_module  # noqa: E402
+from benchmarks.stream_check import ScriptedTeam  # noqa: E402
+from src.concurrency import AgentPool  # noqa: E402
+from src.rate_limit import rate_limiter  # noqa: E402
+
+
+async def send(client, i, user="u1", token=None):
+    started = time.perf_counter()
+    response = await client.post("/chat", json={"message": f"what do I have booked? #{i}", "access_token": token,
+                                                "user_id": user, "session_id": f"{user}-{i}"})
+    return response.status_code, time.perf_counter() - started, response.headers.get("retry-after")
+
+
+async def main():
+    app_module.router_pool = AgentPool(ScriptedTeam, size=8)
+    app_module.session_summaries.enabled = False
+    app_module.user_memories.enabled = False
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=None) as client:
+        results = await asyncio.gather(*(send(client, i) for i in range(12)))
+        codes = Counter(code for code, _, _ in results)
+        queued = sum(1 for code, seconds, _ in results if code == 200 and seconds > 0.2)
+        print(f"retry loop, 12 at once (burst 3, 2/s, max wait 1s): {dict(codes)}, {queued} of the 200s queued, "
+              f"Retry-After {sorted({r for _, _, r in results if r})}")
+        assert codes[429] and codes[200] >= 3
+
+        write_limits({"max_wait": 10.0, "user": {"per_minute": 0}, "session": {"per_minute": 0},
+                      "global": {"per_minute": 300, "burst": 1}})
+        await send(client, 99, user="warmup")   # picks up the new file and spends the global burst
+        tasks = [send(client, i, user=f"anon{i}") for i in range(8)]
+        tasks += [send(client, 100 + i, user=f"member{i}", token="t0k3n") for i in range(8)]
+        results = await asyncio.gather(*tasks)
+        anon = statistics.median(seconds for _, seconds, _ in results[:8])
+        member = statistics.median(seconds for _, seconds, _ in results[8:])
+        print(f"global 5/s, 8 anonymous + 8 logged-in at once: median wait anonymous {anon:.2f}s, "
+              f"logged-in {member:.2f}s")
+        assert member < anon
+
+        write_limits({"max_wait": 1.0, "user": {"per_minute": 6000, "burst": 50}, "session": {"per_minute": 0},
+                      "global": {"per_minute": 0}})
+        results = await asyncio.gather(*(send(client, 200 + i, user="u2") for i in range(12)))
+        codes = Counter(code for code, _, _ in results)
+        print(f"after raising the limits in the file: {dict(codes)}")
+        assert codes == {200: 12}
+    print(json.dumps(rate_limiter.stats(), indent=2))
+    print("ok")
+    os.unlink(LIMITS)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""Stress check that concurrent turns on one session are all kept, in order.
+
+Fires `--turns` messages per session for `--sessions` sessions all at once
+through /chat, against the real router team and session storage with the
+models served by `benchmarks.standins`. Afterwards every session's stored
+runs are read back: each turn must be there exactly once, in the order sent,
+whether the router team or a pre-routed member answered it.
+The same load runs first with SESSION_SERIALIZE off, to show the lost turns
+it prevents, and then on, where nothing may be lost. Sessions are timed too,
+to show that different sessions still run in parallel.
+
+    python -m benchmarks.session_order_check --sessions 8 --turns 6
+"""
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load import ROOT, free_port, wait_until_up
+from benchmarks.standins import client_env
+
+TURN = re.compile(r"turn #(\d+)")
+# the router team's turns and pre-routed ones (run by one member directly) must all land in the session
+MESSAGES = [
+    "Can you help me plan a trip? turn #{i}",
+    "Search flights from CAI to DXB on 2025-09-01, turn #{i}",
+    "I forgot my password, please reset it, turn #{i}",
+]
+
+
+def stored_turns(storage, session_id: str) -> list:
+    session = storage.read(session_id)
+    runs = ((session.memory or {}).get("runs") or []) if session else []
+    turns = []
+    for run in runs:
+        # a run's messages start with the history it was given; its own turn is the last user message
+        for message in reversed(run.get("messages") or []):
+            if message.get("role") == "user":
+                match = TURN.search(str(message.get("content")))
+                if match:
+                    turns.append(int(match.group(1)))
+                break
+    return turns
+
+
+async def fire(client, session_ids, turns):
+    async def turn(session_id, i):
+        # a few ms apart, like a double-fired request or a quick second message
+        await asyncio.sleep(i * 0.005)
+        response = await client.post("/chat", json={
+            "message": MESSAGES[i % len(MESSAGES)].format(i=i), "user_id": session_id, "session_id": session_id})
+        return response.status_code
+
+    started = time.perf_counter()
+    codes = await asyncio.gather(*(turn(s, i) for s in session_ids for i in range(turns)))
+    return codes, time.perf_counter() - started
+
+
+async def main(args):
+    import httpx
+
+    import app as app_module
+    from src.storage import shared_session_storage
+
+    storage = shared_session_storage(table_name="agent_sessions")
+    transport = httpx.ASGITransport(app=app_module.app)
+    failed = False
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=None) as client:
+        for serialize in (False, True):
+            app_module.session_locks.enabled = serialize
+            label = "on" if serialize else "off"
+            session_ids = [f"order-{label}-{n}" for n in range(args.sessions)]
+            codes, seconds = await fire(client, session_ids, args.turns)
+            lost = out_of_order = 0
+            for session_id in session_ids:
+                turns = stored_turns(storage, session_id)
+                lost += args.turns - len(set(turns))
+                out_of_order += turns != sorted(turns)
+            total = args.sessions * args.turns
+            print(f"SESSION_SERIALIZE {label:<3}: {total} turns in {seconds:.2f}s, "
+                  f"non-200: {sum(code != 200 for code in codes)}, lost: {lost}, "
+                  f"sessions out of order: {out_of_order}")
+            if serialize and (lost or out_of_order or any(code != 200 for code in codes)):
+                failed = True
+        # one session alone, serialized: all sessions together should take well under `sessions` times as long
+        _, alone = await fire(client, ["order-alone"], args.turns)
+        print(f"{args.turns} turns of one session alone: {alone:.2f}s; "
+              f"{args.sessions} sessions together: {seconds:.2f}s")
+    print(f"session_locks: {app_module.session_locks.stats()}")
+    if failed:
+        sys.exit("turns were lost or reordered with serialization on")
+    print("ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--llm-latency", default="uniform:0.05,0.15")
+    args = parser.parse_args()
+
+    port = free_port()
+    standins = subprocess.Popen([sys.executable, "-m", "benchmarks.standins", "--port", str(port),
+                                 "--llm-latency", args.llm_latency, "--amadeus-latency", "const:0",
+                                 "--backend-latency", "const:0"], cwd=ROOT)
+    storage_dir = tempfile.mkdtemp(prefix="session-order-storage-")
+    os.environ.update({**client_env(port), "STORAGE_DIR": storage_dir, "RATE_LIMIT_ENABLED": "false",
+                       "RESPONSE_CACHE_ENABLED": "false", "SUMMARY_ENABLED": "false",
+                       "MEMORY_WORKER_ENABLED": "false", "ORCHESTRATOR_PRELOAD": "false"})
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/standin/stats")
+        asyncio.run(main(args))
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
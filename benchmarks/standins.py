@@ -0,0 +1,305 @@
+"""Local stand-ins for Groq, Amadeus and the backend API, with configurable latency.
+
+One FastAPI app serves all three, so the real clients can be pointed at it
+through their usual settings (see `client_env`):
+
+- Groq's chat completions (plain and streamed). The stand-in model routes the
+  team leader to a member by keywords, has members call the matching tool once
+  and then answers with a JSON envelope, like the real agents do.
+- Amadeus' OAuth token and flight-offers search.
+- The backend's booking and user endpoints.
+
+`--model-latency MODEL=SPEC` gives one model its own latency, e.g. a slow
+primary to exercise `src.model_registry` failover.
+
+Latency specs: `const:S`, `uniform:LO,HI`, `lognormal:MEDIAN,SIGMA` and
+`tail:MEDIAN,P,SLOW` (lognormal around MEDIAN, with probability P of taking
+SLOW seconds instead), all in seconds.
+
+    python -m benchmarks.standins --port 8765 --llm-latency lognormal:0.9,0.4
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.flight_payload import amadeus_offer
+
+
+class Latency:
+    def __init__(self, spec: str = "const:0"):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a]
+        if kind not in ("const", "uniform", "lognormal", "tail"):
+            raise ValueError(f"unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        a = self.args
+        if self.kind == "const":
+            return a[0] if a else 0.0
+        if self.kind == "uniform":
+            return random.uniform(a[0], a[1])
+        if self.kind == "lognormal":
+            return random.lognormvariate(math.log(a[0]), a[1])
+        if random.random() < a[1]:
+            return a[2]
+        return random.lognormvariate(math.log(a[0]), 0.3)
+
+    def __str__(self):
+        return self.spec
+
+
+# ---- stand-in model -------------------------------------------------------
+
+_FLIGHT = re.compile(r"\b(flights?|fly|book(ed|ing|ings)?|cancel|ticket|trip|DXB|CAI|DOH)\b", re.IGNORECASE)
+_USER = re.compile(r"\b(password|profile|reset|email|account)\b", re.IGNORECASE)
+_IATA = re.compile(r"\b[A-Z]{3}\b")
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_REF = re.compile(r"\b[A-Z0-9]{6}\b")
+_TOKEN = re.compile(r"my_access token : (\S+)")
+
+
+def _text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def _member_ids(messages: list) -> list:
+    system = " ".join(_text(m) for m in messages if m.get("role") == "system")
+    return re.findall(r"- ID: (\S+)", system)
+
+
+def _route(user_text: str, members: list) -> str:
+    wanted = "flight" if _FLIGHT.search(user_text) else "user" if _USER.search(user_text) else "customer"
+    return next((m for m in members if m.startswith(wanted)), members[-1] if members else "unknown")
+
+
+def _tool_call(user_text: str, tools: list):
+    """(name, arguments) for the first tool that fits the message, or None."""
+    token = (_TOKEN.search(user_text) or [None, ""])[1]
+    lowered = user_text.lower()
+    if "search_flights_flexible" in tools and "cheapest" in lowered:
+        codes = [c for c in _IATA.findall(user_text) if c not in ("USD", "THE")] + ["CAI", "DXB", "DOH"]
+        dates = _DATE.findall(user_text) or ["2025-09-01", "2025-09-07"]
+        return "search_flights_flexible", {"originLocationCodes": codes[:1], "destinationLocationCodes": codes[1:3],
+                                           "departureDateFrom": dates[0], "departureDateTo": dates[-1]}
+    if "search_flights" in tools and ("search" in lowered or "find" in lowered or " to " in lowered):
+        codes = [c for c in _IATA.findall(user_text) if c not in ("USD", "THE")] + ["CAI", "DXB"]
+        date = (_DATE.findall(user_text) or ["2025-09-01"])[0]
+        return "search_flights", {"originLocationCode": codes[0], "destinationLocationCode": codes[1],
+                                  "departureDate": date}
+    if "cancel_flight" in tools and "cancel" in lowered:
+        ref = (_REF.findall(user_text.replace(token, "")) or ["ABC123"])[0]
+        return "cancel_flight", {"access_token": token, "bookingRef": ref}
+    if "booked_flight" in tools:
+        return "booked_flight", {"access_token": token}
+    if "request_password_reset" in tools and "reset" in lowered:
+        return "request_password_reset", {"email": "user@example.com"}
+    if "customer_service" in tools:
+        return "customer_service", {"query": user_text}
+    return None
+
+
+def _envelope(type_: str, message: str) -> str:
+    return json.dumps({"type": type_, "success": True, "message": message, "login": False, "data": None})
+
+
+def decide(body: dict) -> dict:
+    """The stand-in model's reply: {"content": str} or {"tool": (name, arguments)}."""
+    messages = body.get("messages") or []
+    tools = [t["function"]["name"] for t in body.get("tools") or [] if "function" in t]
+    last = messages[-1] if messages else {}
+    user_text = next((_text(m) for m in reversed(messages) if m.get("role") == "user"), "")
+
+    if body.get("response_format"):  # session summarizer
+        return {"content": json.dumps({"summary": f"The user asked: {user_text[:80]}", "topics": ["flights"]})}
+    if "add_memory" in tools or "update_memory" in tools:  # memory manager
+        return {"content": "No new memories."}
+    if last.get("role") == "tool":
+        result = _text(last)
+        return {"content": result if result.lstrip().startswith("{") else _envelope("no_tool_call", result[:200])}
+    if "forward_task_to_member" in tools:
+        member = _route(user_text, _member_ids(messages))
+        return {"tool": ("forward_task_to_member", {"member_id": member, "expected_output": "a JSON envelope"})}
+    call = _tool_call(user_text, tools)
+    if call:
+        return {"tool": call}
+    return {"content": _envelope("no_tool_call", "Hello! How can I help with your trip today?")}
+
+
+def _usage(body: dict, completion: str) -> dict:
+    prompt = sum(len(_text(m)) for m in body.get("messages") or []) // 4
+    out = len(completion) // 4
+    return {"prompt_tokens": prompt, "completion_tokens": out, "total_tokens": prompt + out,
+            "prompt_time": 0.01, "completion_time": 0.01, "queue_time": 0.0, "total_time": 0.02}
+
+
+def _completion(body: dict, reply: dict) -> dict:
+    message = {"role": "assistant", "content": reply.get("content")}
+    if "tool" in reply:
+        name, arguments = reply["tool"]
+        message["tool_calls"] = [{"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                                  "function": {"name": name, "arguments": json.dumps(arguments)}}]
+    text = message["content"] or json.dumps(message.get("tool_calls"))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion", "created": int(time.time()),
+        "model": body.get("model", "standin"),
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if "tool" in reply else "stop",
+                     "logprobs": None}],
+        "usage": _usage(body, text),
+    }
+
+
+def _chunks(body: dict, reply: dict):
+    base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": body.get("model", "standin")}
+
+    def chunk(delta, finish=None, **extra):
+        return "data: " + json.dumps({**base, **extra, "choices": [
+            {"index": 0, "delta": delta, "finish_reason": finish, "logprobs": None}]}) + "\n\n"
+
+    if "tool" in reply:
+        name, arguments = reply["tool"]
+        yield chunk({"role": "assistant", "tool_calls": [{
+            "index": 0, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)}}]})
+        text, finish = json.dumps(arguments), "tool_calls"
+    else:
+        text, finish = reply["content"], "stop"
+        yield chunk({"role": "assistant", "content": ""})
+        for i in range(0, len(text), 16):
+            yield chunk({"content": text[i:i + 16]})
+    yield chunk({}, finish, x_groq={"id": base["id"], "usage": _usage(body, text)})
+    yield "data: [DONE]\n\n"
+
+
+# ---- app ------------------------------------------------------------------
+
+def _bookings(n: int = 2) -> list:
+    return [{"_id": f"b{i}", "bookingRef": f"REF{i:03d}", "status": "confirmed", "originCity": "Cairo",
+             "destinationCity": "Dubai", "departureDate": "2025-09-01T03:15:00"} for i in range(n)]
+
+
+def _offers(query, count: int) -> list:
+    """`count` offers for the queried route and day, priced differently per route and day."""
+    origin, destination = query.get("originLocationCode", "CAI"), query.get("destinationLocationCode", "DXB")
+    day = query.get("departureDate", "2025-08-01")
+    shift = sum(map(ord, f"{origin}{destination}{day}")) % 17 * 11
+    offers = []
+    for i in range(count):
+        offer = amadeus_offer(i)
+        segment = offer["itineraries"][0]["segments"][0]
+        segment["departure"].update(iataCode=origin, at=f"{day}T03:15:00")
+        segment["arrival"].update(iataCode=destination, at=f"{day}T08:05:00")
+        total = f"{float(offer['price']['total']) + shift:.2f}"
+        offer["price"].update(total=total, grandTotal=total)
+        offers.append(offer)
+    return offers
+
+
+def build_app(llm: Latency, amadeus: Latency, backend: Latency, error_rate: float = 0.0,
+              model_latency: dict = None) -> FastAPI:
+    app = FastAPI(title="stand-ins")
+    model_latency = model_latency or {}
+    calls = Counter()
+
+    async def delay(kind: str, latency: Latency):
+        calls[kind] += 1
+        await asyncio.sleep(latency.sample())
+        if error_rate and random.random() < error_rate:
+            calls[f"{kind}_injected_errors"] += 1
+            return JSONResponse({"error": {"message": "injected failure"}}, status_code=503)
+        return None
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        calls[f"llm:{body.get('model')}"] += 1
+        failed = await delay("llm", model_latency.get(body.get("model"), llm))
+        if failed:
+            return failed
+        reply = decide(body)
+        if body.get("stream"):
+            return StreamingResponse(_chunks(body, reply), media_type="text/event-stream")
+        return _completion(body, reply)
+
+    @app.post("/v1/security/oauth2/token")
+    async def amadeus_token():
+        calls["amadeus_token"] += 1
+        return {"type": "amadeusOAuth2Token", "access_token": "standin", "token_type": "Bearer",
+                "expires_in": 1799, "state": "approved"}
+
+    @app.get("/v2/shopping/flight-offers")
+    async def flight_offers(request: Request):
+        failed = await delay("amadeus", amadeus)
+        if failed:
+            return failed
+        count = int(request.query_params.get("max", "2"))
+        return {"meta": {"count": count}, "data": _offers(request.query_params, count), "dictionaries": {}}
+
+    @app.get("/booking/my-bookings")
+    async def my_bookings():
+        return await delay("backend", backend) or {"data": {"bookings": _bookings()}}
+
+    @app.api_route("/{path:path}", methods=["POST", "PUT", "PATCH"])
+    async def backend_write(path: str):
+        return await delay("backend", backend) or {"success": True, "message": "ok"}
+
+    @app.get("/standin/stats")
+    def stats():
+        return {"calls": dict(calls), "llm": str(llm), "amadeus": str(amadeus), "backend": str(backend),
+                "models": {model: str(latency) for model, latency in model_latency.items()}}
+
+    return app
+
+
+def client_env(port: int, host: str = "127.0.0.1") -> dict:
+    """Environment that points the app's Groq, Amadeus and backend clients at the stand-ins."""
+    base = f"http://{host}:{port}"
+    return {
+        "GROQ_BASE_URL": base, "GROQ_API_KEY": "standin",
+        "AMADEUS_HOST": host, "AMADEUS_PORT": str(port), "AMADEUS_SSL": "false",
+        "AMADEUS_API_KEY": "standin", "AMADEUS_API_SECRET": "standin",
+        "BASE_URL": base,
+    }
+
+
+def add_latency_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--llm-latency", default="lognormal:0.9,0.4", help="per model call")
+    parser.add_argument("--amadeus-latency", default="lognormal:0.8,0.3", help="per flight-offers search")
+    parser.add_argument("--backend-latency", default="lognormal:0.08,0.3", help="per backend API call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stand-in calls answered 503")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="latency for one model instead of --llm-latency; repeatable")
+
+
+def model_latencies(specs: list) -> dict:
+    return {model: Latency(spec) for model, _, spec in (s.partition("=") for s in specs)}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    add_latency_args(parser)
+    args = parser.parse_args()
+    app = build_app(Latency(args.llm_latency), Latency(args.amadeus_latency), Latency(args.backend_latency),
+                    args.error_rate, model_latencies(args.model_latency))
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
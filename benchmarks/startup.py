@@ -0,0 +1,130 @@
+"""Import-time and cold-start report for the app, checked against a budget.
+
+- `import app` time, median of a few fresh interpreters, with an
+  `-X importtime` breakdown by package.
+- time from launching uvicorn to the first 200 from /health.
+- time from launching uvicorn to the first 200 from /chat, with Groq, Amadeus
+  and the backend replaced by `benchmarks.standins` (no latency), so it
+  measures building the agent stack, not the network.
+
+Exits with status 1 when a measurement is over its budget.
+
+    python -m benchmarks.startup --budget-import 1.0 --budget-health 2.5 --budget-chat 4.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.load import ROOT, free_port, wait_until_up
+from benchmarks.standins import client_env
+
+
+def import_seconds(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def importtime_breakdown(env: dict) -> dict:
+    """Self time (ms) per package while importing app; src modules are listed one by one."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    totals = defaultdict(float)
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        parts = name.split(".")
+        group = ".".join(parts[:2]) if parts[0] == "src" else parts[0]
+        totals[group] += int(self_us) / 1000
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+
+def first_200(env: dict, chat: bool) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+                               "--port", str(port), "--log-level", "warning"], cwd=ROOT, env=env)
+    try:
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                if not chat:
+                    response = httpx.get(f"{url}/health", timeout=1.0)
+                else:
+                    response = httpx.post(f"{url}/chat", timeout=30.0, json={
+                        "message": "Can you help me plan a trip?", "user_id": "startup", "session_id": "startup"})
+                if response.status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError("no 200 within 60s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-import", type=float, default=1.0, help="seconds for `import app`")
+    parser.add_argument("--budget-health", type=float, default=2.5, help="seconds to the first /health 200")
+    parser.add_argument("--budget-chat", type=float, default=4.0, help="seconds to the first /chat 200")
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    standin_port = free_port()
+    standins = subprocess.Popen([sys.executable, "-m", "benchmarks.standins", "--port", str(standin_port),
+                                 "--llm-latency", "const:0", "--amadeus-latency", "const:0",
+                                 "--backend-latency", "const:0"], cwd=ROOT)
+    env = {**os.environ, **client_env(standin_port), "STORAGE_DIR": tempfile.mkdtemp(prefix="startup-storage-"),
+           "SUMMARY_ENABLED": "false", "MEMORY_WORKER_ENABLED": "false"}
+    try:
+        wait_until_up(f"http://127.0.0.1:{standin_port}/standin/stats")
+        imports = [import_seconds(env) for _ in range(args.runs)]
+        breakdown = importtime_breakdown(env)
+        health = statistics.median(first_200(env, chat=False) for _ in range(args.runs))
+        chat = statistics.median(first_200(env, chat=True) for _ in range(max(1, args.runs // 2)))
+    finally:
+        standins.terminate()
+        standins.wait(timeout=10)
+
+    report = {
+        "import_s": round(statistics.median(imports), 3),
+        "first_health_200_s": round(health, 3),
+        "first_chat_200_s": round(chat, 3),
+        "budget": {"import_s": args.budget_import, "first_health_200_s": args.budget_health,
+                   "first_chat_200_s": args.budget_chat},
+        "importtime_ms": {k: round(v, 1) for k, v in list(breakdown.items())[:args.top]},
+    }
+    print("import breakdown (self time, ms):")
+    for name, ms in report["importtime_ms"].items():
+        print(f"  {name:<28}{ms:>8.1f}")
+    print()
+    over = []
+    for key, label in (("import_s", "import app"), ("first_health_200_s", "first /health 200"),
+                       ("first_chat_200_s", "first /chat 200")):
+        ok = report[key] <= report["budget"][key]
+        over += [] if ok else [label]
+        print(f"  {label:<20}{report[key]:>7.3f}s   budget {report['budget'][key]:.1f}s   {'ok' if ok else 'OVER'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if over:
+        sys.exit(f"over budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
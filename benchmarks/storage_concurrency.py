@@ -0,0 +1,73 @@
+"""Session storage under concurrent workers: N processes x M sessions each.
+
+Every turn reads the session and writes it back with one more run, like an
+agent run does. Compares agno's default SqliteStorage (rollback journal) with
+the WAL engine from src.storage, unsharded and sharded. Nothing outside a
+temporary directory is touched.
+
+    python -m benchmarks.storage_concurrency [workers] [sessions] [turns]
+"""
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from agno.storage.session.agent import AgentSession
+
+RUN = {"role": "assistant", "content": "x" * 1500}
+
+
+def make_storage(config, directory):
+    if config == "default":
+        from agno.storage.sqlite import SqliteStorage
+        return SqliteStorage(table_name="agent_sessions", db_file=os.path.join(directory, "session_memory.db"))
+    from src.storage import session_storage
+    shards = int(config.split(" x")[1]) if " x" in config else 1
+    return session_storage(table_name="agent_sessions", backend="sqlite", directory=directory, shards=shards)
+
+
+def worker(config, directory, worker_id, sessions, turns):
+    storage = make_storage(config, directory)
+    latencies, errors = [], 0
+    for turn in range(turns):
+        for s in range(sessions):
+            session_id = f"w{worker_id}-s{s}"
+            started = time.perf_counter()
+            try:
+                session = storage.read(session_id) or AgentSession(
+                    session_id=session_id, user_id=f"u{worker_id}-{s}", agent_id="bench", memory={"runs": []}
+                )
+                session.memory = {"runs": (session.memory or {}).get("runs", []) + [RUN]}
+                storage.upsert(session)
+            except Exception:  # "database is locked" and friends
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def run(config, workers, sessions, turns):
+    with tempfile.TemporaryDirectory() as directory:
+        make_storage(config, directory).create()
+        started = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(worker, [(config, directory, w, sessions, turns) for w in range(workers)])
+        elapsed = time.perf_counter() - started
+    latencies = sorted(l for result in results for l in result[0])
+    errors = sum(result[1] for result in results)
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{config:<10} {len(latencies) / elapsed:8.0f} ops/s   p50 {q[49] * 1000:6.1f} ms   "
+          f"p95 {q[94] * 1000:6.1f} ms   p99 {q[98] * 1000:7.1f} ms   errors {errors}")
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:4]]
+    workers, sessions, turns = args + [8, 10, 10][len(args):]
+    print(f"{workers} workers x {sessions} sessions x {turns} turns")
+    for config in ("default", "wal", "wal x4"):
+        run(config, workers, sessions, turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Checks that /chat/stream events reassemble into the same envelope /chat returns.
+
+The router team is replaced by a stand-in that replays a scripted agno event
+sequence (route -> tool call -> streamed tokens -> completion), so no model or
+backend is contacted. A second script ends on a passthrough tool, where the
+tool's envelope is the reply and no tokens are generated. A third, slow
+script checks that a client leaving mid-stream doesn't release the session
+lock: the next turn on that session must start after the abandoned run ends.
+
+    python -m benchmarks.stream_check
+"""
+import asyncio
+import json
+import threading
+import time
+from contextlib import AsyncExitStack
+
+import httpx
+from agno.models.response import ToolExecution
+from agno.run import response as agent_events
+from agno.run import team as team_events
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.concurrency import AgentPool
+
+REPLY = json.dumps({
+    "type": "booked_flight",
+    "success": True,
+    "message": "Here are your confirmed bookings:\n\n1. Cairo → Dubai on 2025-08-01 | Ref: ABC123",
+    "login": False,
+    "data": None,
+})
+
+
+class ScriptedTeam:
+    members = []
+
+    def events(self):
+        forward = ToolExecution(tool_name="forward_task_to_member", tool_args={"member_id": "flight_agent"})
+        tool = ToolExecution(tool_name="booked_flight", tool_args={"access_token": "t"})
+        yield team_events.RunResponseStartedEvent()
+        yield team_events.ToolCallStartedEvent(tool=forward)
+        yield agent_events.ToolCallStartedEvent(tool=tool)
+        yield agent_events.ToolCallCompletedEvent(tool=tool)
+        for i in range(0, len(REPLY), 7):
+            yield agent_events.RunResponseContentEvent(content=REPLY[i:i + 7])
+        yield agent_events.RunResponseCompletedEvent(content=REPLY)
+        yield team_events.ToolCallCompletedEvent(tool=forward)
+        yield team_events.RunResponseContentEvent(content=REPLY)
+        yield team_events.RunResponseCompletedEvent(content=REPLY)
+
+    def run(self, message, stream=False, **kwargs):
+        if stream:
+            return self.events()
+        return type("Response", (), {"content": REPLY})()
+
+
+class PassthroughTeam:
+    """The member stops after a passthrough tool; agno bubbles up str(result) as content."""
+    members = []
+    envelope = json.loads(REPLY)
+
+    def tool(self):
+        return ToolExecution(tool_name="booked_flight", tool_args={"access_token": "t"},
+                             result=str(self.envelope), stop_after_tool_call=True)
+
+    def events(self):
+        forward = ToolExecution(tool_name="forward_task_to_member", tool_args={"member_id": "flight_agent"})
+        tool = self.tool()
+        yield team_events.RunResponseStartedEvent()
+        yield team_events.ToolCallStartedEvent(tool=forward)
+        yield agent_events.ToolCallStartedEvent(tool=tool)
+        yield agent_events.ToolCallCompletedEvent(tool=tool)
+        yield agent_events.RunResponseCompletedEvent(content=None)
+        yield team_events.ToolCallCompletedEvent(tool=forward)
+        yield team_events.RunResponseContentEvent(content=tool.result + ",")
+        yield team_events.RunResponseCompletedEvent(content=tool.result + ",")
+
+    def run(self, message, stream=False, **kwargs):
+        if stream:
+            return self.events()
+        member = type("Response", (), {"tools": [self.tool()]})()
+        return type("Response", (), {"content": str(self.envelope) + ",", "tools": [], "member_responses": [member]})()
+
+
+class SlowTeam(ScriptedTeam):
+    """ScriptedTeam that takes a while and records when each run starts and ends."""
+    runs = []
+    _lock = threading.Lock()
+
+    def _timed(self, events):
+        started = time.perf_counter()
+        yield from events
+        with self._lock:
+            self.runs.append((started, time.perf_counter()))
+
+    def events(self):
+        for event in super().events():
+            time.sleep(0.02)
+            yield event
+
+    def run(self, message, stream=False, **kwargs):
+        if stream:
+            return self._timed(self.events())
+        for _ in self._timed(self.events()):
+            pass
+        return type("Response", (), {"content": REPLY})()
+
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        data = next(line[len("data: "):] for line in block.splitlines() if line.startswith("data: "))
+        events.append(json.loads(data))
+    return events
+
+
+def check(team_cls):
+    app_module.router_pool = AgentPool(team_cls, size=2)
+    app_module.prerouter.min_confidence = 2.0  # force the LLM-router path
+    client = TestClient(app_module.app)
+    payload = {"message": "what do I have booked?", "access_token": "t", "user_id": "u", "session_id": "s"}
+
+    plain = client.post("/chat", json=payload).json()
+    events = parse_sse(client.post("/chat/stream", json=payload).text)
+
+    kinds = [event["event"] for event in events]
+    tokens = "".join(event["content"] for event in events if event["event"] == "token")
+    final = events[-1]
+
+    assert kinds[0] == "routed" and events[0]["agent"] == "flight_agent", kinds
+    assert "tool_started" in kinds and "tool_finished" in kinds, kinds
+    assert kinds[-1] == "final" and final["status_code"] == 200, final
+    if team_cls is PassthroughTeam:
+        assert not tokens, "raw tool result was streamed"
+        assert plain["response"] == PassthroughTeam.envelope, plain
+    else:
+        assert json.loads(tokens) == plain["response"], "streamed tokens differ from /chat"
+    assert {"response": final["response"]} == plain, "final event differs from /chat"
+    print(f"ok ({team_cls.__name__}): {len(events)} events, {kinds.count('token')} tokens, final == /chat response")
+
+
+async def check_disconnect():
+    app_module.router_pool = AgentPool(SlowTeam, size=2)
+    data = app_module.ChatInput(message="what do I have booked?", access_token="t", user_id="u", session_id="left")
+    slot = AsyncExitStack()
+    await slot.enter_async_context(app_module.session_locks.hold(data.session_id))
+    stream = app_module.stream_chat(data, slot, time.perf_counter())
+    await stream.__anext__()
+    # the client goes away: the generator is closed and the response's background task runs
+    await stream.aclose()
+    await slot.aclose()
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        response = await client.post("/chat", json=data.model_dump())
+    (first_start, first_end), (second_start, _) = sorted(SlowTeam.runs)
+    assert response.status_code == 200, response.text
+    assert second_start >= first_end, "the next turn ran alongside the abandoned stream"
+    print(f"ok (disconnect): next turn started {second_start - first_end:.3f}s after the abandoned run ended")
+
+
+def main():
+    check(ScriptedTeam)
+    check(PassthroughTeam)
+    asyncio.run(check_disconnect())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import json
+import re
+import threading
+from typing import Any, Iterator, Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from src import metrics
+
+_THINK = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+# filled in when the model's JSON object is missing envelope fields or has them as null
+_DEFAULTS = {"type": "no_tool_call", "success": False, "message": "", "login": False, "data": None}
+
+
+class AgentReply(BaseModel):
+    """The response envelope every agent reply must follow."""
+    model_config = ConfigDict(extra="allow")
+
+    type: str
+    success: bool = False
+    message: str
+    login: bool = False
+    data: Any = None
+
+
+def _with_defaults(value: dict) -> dict:
+    filled = {**value, **{key: default for key, default in _DEFAULTS.items() if value.get(key) is None}}
+    try:
+        return AgentReply.model_validate(filled).model_dump()
+    except ValidationError:
+        return filled
+
+
+def _strip_fences(text: str) -> str:
+    return _FENCE.sub("", text.strip())
+
+
+def _balanced_objects(text: str) -> Iterator[str]:
+    """Every top-level {...} span in `text`, skipping braces inside quoted strings."""
+    start = depth = 0
+    quote: Optional[str] = None
+    escaped = False
+    for i, ch in enumerate(text):
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif depth and ch in "\"'":
+            quote = ch
+        elif depth and ch == "}":
+            depth -= 1
+            if depth == 0:
+                yield text[start:i + 1]
+
+
+def _repair(candidate: str) -> str:
+    """Cheap fixes in one pass: single-quoted strings, Python literals, comments, trailing commas."""
+    out = []
+    i, n = 0, len(candidate)
+    while i < n:
+        ch = candidate[i]
+        if ch in "\"'":
+            # copy the string, re-quoting single-quoted ones
+            j, buf = i + 1, []
+            while j < n and candidate[j] != ch:
+                if candidate[j] == "\\" and j + 1 < n:
+                    buf.append(candidate[j + 1] if candidate[j + 1] == "'" else candidate[j:j + 2])
+                    j += 2
+                    continue
+                buf.append('\\"' if candidate[j] == '"' else candidate[j])
+                j += 1
+            out.append('"' + "".join(buf) + '"')
+            i = j + 1
+        elif candidate.startswith("//", i):
+            end = candidate.find("\n", i)
+            i = n if end < 0 else end
+        elif candidate.startswith("/*", i):
+            end = candidate.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        elif ch == ",":
+            j = i + 1
+            while j < n and candidate[j].isspace():
+                j += 1
+            if j < n and candidate[j] in "}]":
+                i = j
+                continue
+            out.append(ch)
+            i += 1
+        elif ch.isalpha():
+            j = i
+            while j < n and (candidate[j].isalnum() or candidate[j] == "_"):
+                j += 1
+            word = candidate[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+class AgentOutputParser:
+    """Turns raw model text into a validated response envelope.
+
+    Tries the fenced reply as-is first, then every balanced {...} object in the
+    text (after dropping <think> blocks) as-is and with cheap repairs. If no
+    object validates as an AgentReply, the first JSON object found is used
+    with its missing or null envelope fields filled in, as the plain
+    json.loads parse used to return it. Raises json.JSONDecodeError only when
+    there is no JSON object at all, so callers keep answering json_error for
+    truly unusable output.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"clean": 0, "extracted": 0, "repaired": 0, "defaulted": 0, "failed": 0}
+
+    def _count(self, outcome: str):
+        metrics.count(metrics.AGENT_OUTPUT, outcome)
+        with self._lock:
+            self.counts[outcome] += 1
+
+    @staticmethod
+    def _load(raw: str) -> Optional[dict]:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+
+    @staticmethod
+    def _validate(value: Optional[dict]) -> Optional[dict]:
+        if value is None:
+            return None
+        try:
+            return AgentReply.model_validate(value).model_dump()
+        except ValidationError:
+            return None
+
+    def parse(self, content: Optional[str]) -> dict:
+        text = content or ""
+        fallback = self._load(_strip_fences(text))
+        reply = self._validate(fallback)
+        if reply is not None:
+            self._count("clean")
+            return reply
+
+        text = _THINK.sub("", text)
+        if "</think>" in text:  # opening tag cut off by the provider
+            text = text.rsplit("</think>", 1)[1]
+        for candidate in _balanced_objects(text):
+            for raw, outcome in ((candidate, "extracted"), (_repair(candidate), "repaired")):
+                value = self._load(raw)
+                reply = self._validate(value)
+                if reply is not None:
+                    self._count(outcome)
+                    return reply
+                if fallback is None:
+                    fallback = value
+
+        if fallback is not None:
+            self._count("defaulted")
+            return _with_defaults(fallback)
+        self._count("failed")
+        raise json.JSONDecodeError("no valid response object in agent output", text, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        recovered = counts["extracted"] + counts["repaired"] + counts["defaulted"]
+        return {
+            **counts,
+            "total": total,
+            "repair_rate": round(recovered / total, 4) if total else 0.0,
+            "failure_rate": round(counts["failed"] / total, 4) if total else 0.0,
+        }
+
+
+output_parser = AgentOutputParser()
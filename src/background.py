@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List
+
+
+class QueueWorker:
+    """A daemon thread that drains a bounded queue in batches, off the request path.
+
+    `submit()` never blocks: when the queue is full the item is dropped and
+    counted. `handler(batch)` gets up to `batch_size` items at a time; its
+    exceptions are counted and the worker keeps going. `flush()` waits for
+    everything queued so far, `stop()` flushes and ends the thread.
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[Any]], None], maxsize: int = 1000,
+                 batch_size: int = 16, batch_wait: float = 0.05):
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.submitted = 0
+        self.processed = 0
+        self.batches = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item: Any) -> bool:
+        if self._stopping:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((time.monotonic(), item))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _take_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            items = [entry[1] for entry in batch if entry is not None]
+            try:
+                if items:
+                    self.handler(items)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+            finally:
+                now = time.monotonic()
+                with self._lock:
+                    self.batches += bool(items)
+                    self.processed += len(items)
+                    for entry in batch:
+                        if entry is not None:
+                            self.last_lag = now - entry[0]
+                            self.max_lag = max(self.max_lag, self.last_lag)
+                for _ in batch:
+                    self._queue.task_done()
+            if any(entry is None for entry in batch):
+                return
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Waits until every queued item has been handled; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Flushes the queue and stops the thread; later submits are refused."""
+        self._stopping = True
+        if self._thread is None or not self._thread.is_alive():
+            return not self._queue.unfinished_tasks
+        flushed = self.flush(timeout)
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=1.0)
+        return flushed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "depth": self._queue.qsize(),
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "batches": self.batches,
+                "errors": self.errors,
+                "dropped": self.dropped,
+                "lag_ms_last": round(self.last_lag * 1000, 1),
+                "lag_ms_max": round(self.max_lag * 1000, 1),
+            }
@@ -0,0 +1,148 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+# shared by every cache for stale-while-revalidate refreshes
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTL, stale-while-revalidate and single-flight loads.
+
+    - entries younger than `ttl` are served as hits;
+    - entries younger than `ttl + stale_ttl` are served immediately while one
+      background refresh replaces them;
+    - concurrent `get_or_load` calls for the same missing key share one loader call.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0.0, name: str = ""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.load_errors = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _store(self, key, value):
+        # caller holds the lock
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the fresh value for `key` or None; never calls a loader."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _load(self, key, loader, cacheable, future: Future):
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self.load_errors += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if cacheable(value):
+                self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def _refresh(self, key, loader, cacheable, future: Future):
+        try:
+            self._load(key, loader, cacheable, future)
+        except Exception:
+            pass  # the stale entry keeps serving until it expires
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        """Returns the cached value for `key`, calling `loader()` at most once per key at a time.
+
+        Values for which `cacheable(value)` is false are returned but not stored;
+        loader exceptions propagate to every waiting caller and are not cached.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        self.refreshes += 1
+                        future = self._inflight[key] = Future()
+                        # the refresh keeps the caller's cassette scope and metrics labels
+                        ctx = contextvars.copy_context()
+                        _refresh_executor.submit(ctx.run, self._refresh, key, loader, cacheable, future)
+                    return value
+                del self._data[key]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                leader = True
+
+        if leader:
+            return self._load(key, loader, cacheable, future)
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "load_errors": self.load_errors,
+        }
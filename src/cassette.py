@@ -0,0 +1,406 @@
+import asyncio
+import contextvars
+import difflib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# off | record | replay
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "tmp/cassettes")
+# replay delay: "none", "recorded" (each call takes as long as it did when recorded) or fixed seconds
+CASSETTE_LATENCY = os.getenv("CASSETTE_LATENCY", "none")
+
+# calls made outside any conversation (background summaries and memories) go here
+UNSCOPED = "_unscoped"
+
+_SECRET = re.compile(
+    r"(?i)((?:access[_ ]?token|client_secret|password|oldPassword|newPassword)[\"']?\s*[:=]\s*[\"']?)([^\s\"'&,}\\]+)"
+)
+_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+_active: contextvars.ContextVar = contextvars.ContextVar("cassette", default=None)
+
+
+class CassetteMismatch(Exception):
+    """A replayed request has no matching recorded interaction; the message holds the diff."""
+
+
+def redact(text: str) -> str:
+    return _SECRET.sub(lambda m: m.group(1) + "<redacted>", text)
+
+
+def _body(raw: bytes, content_type: str):
+    """A request body as stored in a cassette: JSON or form fields when they parse, text otherwise."""
+    text = redact(raw.decode("utf-8", errors="replace")) if raw else ""
+    if "json" in (content_type or ""):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    if "x-www-form-urlencoded" in (content_type or ""):
+        return dict(parse_qsl(text))
+    return text
+
+
+def _pretty(request: dict) -> List[str]:
+    return json.dumps(request, indent=2, sort_keys=True, ensure_ascii=False).splitlines()
+
+
+class Cassette:
+    """The recorded interactions of one conversation, kept in `<directory>/<name>.json`."""
+
+    def __init__(self, name: str, path: str, interactions: Optional[list] = None):
+        self.name = name
+        self.path = path
+        self.interactions = interactions or []
+        self.used = [False] * len(self.interactions)
+        self._lock = threading.Lock()
+
+    def add(self, interaction: dict):
+        with self._lock:
+            self.interactions.append(interaction)
+            self.used.append(True)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"name": self.name, "interactions": self.interactions}, f, indent=1, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def take(self, request: dict) -> dict:
+        """The first unused interaction whose request equals `request`; CassetteMismatch otherwise."""
+        with self._lock:
+            for i, interaction in enumerate(self.interactions):
+                if not self.used[i] and interaction["request"] == request:
+                    self.used[i] = True
+                    return interaction
+            closest = next((interaction["request"] for i, interaction in enumerate(self.interactions)
+                            if not self.used[i] and interaction["request"]["target"] == request["target"]
+                            and interaction["request"]["path"] == request["path"]), None)
+        if closest is None:
+            raise CassetteMismatch(
+                f"cassette {self.name!r} has no unused {request['method']} {request['target']} {request['path']}; "
+                f"request was:\n" + "\n".join(_pretty(request))
+            )
+        diff = difflib.unified_diff(_pretty(closest), _pretty(request), "recorded", "replayed", lineterm="")
+        raise CassetteMismatch(f"cassette {self.name!r}: request differs from the next recorded "
+                               f"{request['method']} {request['path']}\n" + "\n".join(diff))
+
+    def unused(self) -> int:
+        with self._lock:
+            return self.used.count(False)
+
+
+class Cassettes:
+    """Record and replay of Groq, Gemini, Amadeus and backend HTTP traffic, one cassette per conversation.
+
+    `install()` hooks httpx and requests transports and the Amadeus client; only
+    requests to those hosts are recorded or replayed. `use(name)` selects the
+    cassette for the current context, so concurrent conversations don't mix;
+    calls outside any conversation use the `_unscoped` cassette. In replay, a
+    request that matches no recorded one raises CassetteMismatch with a diff
+    against the closest candidate, which is also written to `<name>.mismatch.diff`.
+    """
+
+    def __init__(self, mode: str = CASSETTE_MODE, directory: str = CASSETTE_DIR, latency: str = CASSETTE_LATENCY):
+        self.mode = mode
+        self.directory = directory
+        self.latency = latency
+        self._cassettes: Dict[str, Cassette] = {}
+        self._lock = threading.Lock()
+        self._installed = False
+        self.recorded = 0
+        self.replayed = 0
+        self.mismatches: List[str] = []
+
+    def configure(self, mode: Optional[str] = None, directory: Optional[str] = None, latency: Optional[str] = None):
+        if mode is not None:
+            self.mode = mode
+        if directory is not None:
+            self.directory = directory
+        if latency is not None:
+            self.latency = latency
+        with self._lock:
+            self._cassettes.clear()
+
+    @property
+    def active(self) -> bool:
+        return self.mode in ("record", "replay")
+
+    # ---- cassettes ------------------------------------------------------------
+
+    def get(self, name: str) -> Cassette:
+        name = _NAME.sub("_", name) or UNSCOPED
+        with self._lock:
+            cassette = self._cassettes.get(name)
+            if cassette is None:
+                path = os.path.join(self.directory, f"{name}.json")
+                interactions = []
+                if self.mode == "replay":
+                    if not os.path.exists(path):
+                        raise CassetteMismatch(f"no cassette recorded for {name!r} at {path}")
+                    with open(path, encoding="utf-8") as f:
+                        interactions = json.load(f)["interactions"]
+                elif os.path.exists(path):
+                    os.remove(path)  # re-recording a conversation starts a fresh cassette
+                cassette = self._cassettes[name] = Cassette(name, path, interactions)
+            return cassette
+
+    @contextmanager
+    def use(self, name: Optional[str]):
+        """Routes the external calls made in this context to the cassette `name`."""
+        if not (self.active and name):
+            yield None
+            return
+        token = _active.set(self.get(name))
+        try:
+            yield _active.get()
+        finally:
+            _active.reset(token)
+
+    def _current(self) -> Cassette:
+        return _active.get() or self.get(UNSCOPED)
+
+    def unused(self) -> Dict[str, int]:
+        """Recorded interactions per cassette that a replay has not consumed."""
+        with self._lock:
+            cassettes = list(self._cassettes.values())
+        return {c.name: c.unused() for c in cassettes if c.unused()}
+
+    # ---- request matching -----------------------------------------------------
+
+    @staticmethod
+    def _hosts() -> List[Tuple[str, str]]:
+        """(host, target) pairs of the services that are recorded."""
+        hosts = [("api.groq.com", "groq"), ("generativelanguage.googleapis.com", "gemini"),
+                 ("test.api.amadeus.com", "amadeus"), ("api.amadeus.com", "amadeus")]
+        for env, target in (("GROQ_BASE_URL", "groq"), ("BASE_URL", "backend")):
+            if os.getenv(env):
+                hosts.append((urlsplit(os.environ[env]).netloc, target))
+        if os.getenv("AMADEUS_HOST"):
+            port = os.getenv("AMADEUS_PORT")
+            hosts.append((os.environ["AMADEUS_HOST"] + (f":{port}" if port else ""), "amadeus"))
+        return hosts
+
+    def target_of(self, url: str) -> Optional[str]:
+        parts = urlsplit(url)
+        targets = {target for host, target in self._hosts() if host in (parts.netloc, parts.hostname)}
+        if len(targets) <= 1:
+            return targets.pop() if targets else None
+        # several services behind one host (local stand-ins): tell them apart by path
+        if parts.path.startswith("/openai/"):
+            return "groq"
+        if re.match(r"/v\d/", parts.path) and "amadeus" in targets:
+            return "amadeus"
+        return "backend" if "backend" in targets else sorted(targets)[0]
+
+    @staticmethod
+    def _request(target: str, method: str, url: str, body: bytes, content_type: str) -> dict:
+        parts = urlsplit(url)
+        return {
+            "target": target,
+            "method": method.upper(),
+            "path": parts.path,
+            "query": redact("&".join(sorted(parts.query.split("&")))) if parts.query else "",
+            "body": _body(body, content_type),
+        }
+
+    def _replay(self, request: dict) -> dict:
+        cassette = self._current()
+        try:
+            interaction = cassette.take(request)
+        except CassetteMismatch as e:
+            self.mismatches.append(str(e))
+            del self.mismatches[:-20]
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{cassette.name}.mismatch.diff"), "a", encoding="utf-8") as f:
+                f.write(str(e) + "\n\n")
+            raise
+        self.replayed += 1
+        return interaction
+
+    def _record(self, request: dict, status: int, content_type: str, raw: bytes, elapsed: float):
+        # kept as text, so a replay hands back the exact bytes the client parsed when recording
+        response = redact(raw.decode("utf-8", errors="replace")) if raw else ""
+        self._current().add({
+            "request": request,
+            "response": {"status": status, "content_type": content_type, "body": response},
+            "elapsed": round(elapsed, 4),
+        })
+        self.recorded += 1
+
+    def _delay(self, interaction: dict) -> float:
+        if self.latency == "recorded":
+            return interaction.get("elapsed", 0.0)
+        if self.latency in ("", "none"):
+            return 0.0
+        return float(self.latency)
+
+    @staticmethod
+    def _content(interaction: dict) -> bytes:
+        return interaction["response"]["body"].encode("utf-8")
+
+    # ---- hooks ----------------------------------------------------------------
+
+    def install(self, *amadeus_clients):
+        """Hooks httpx, requests and the given Amadeus clients; a no-op when mode is "off"."""
+        if not self.active:
+            return
+        for client in amadeus_clients:
+            if not getattr(client.http, "_cassette", False):
+                client.http = self._wrap_urlopen(client.http)
+        if self._installed:
+            return
+        self._installed = True
+        self._patch_httpx()
+        self._patch_requests()
+
+    def _patch_httpx(self):
+        cassettes = self
+        sync_send = httpx.HTTPTransport.handle_request
+        async_send = httpx.AsyncHTTPTransport.handle_async_request
+
+        def prepare(request: httpx.Request):
+            target = cassettes.target_of(str(request.url)) if cassettes.active else None
+            if target is None:
+                return None
+            return cassettes._request(target, request.method, str(request.url), request.read(),
+                                      request.headers.get("content-type", ""))
+
+        def replayed(request: httpx.Request, interaction: dict) -> httpx.Response:
+            response = interaction["response"]
+            return httpx.Response(response["status"], headers={"content-type": response["content_type"]},
+                                  content=cassettes._content(interaction), request=request)
+
+        def handle_request(transport, request):
+            recorded = prepare(request)
+            if recorded is None:
+                return sync_send(transport, request)
+            if cassettes.mode == "replay":
+                interaction = cassettes._replay(recorded)
+                time.sleep(cassettes._delay(interaction))
+                return replayed(request, interaction)
+            started = time.perf_counter()
+            response = sync_send(transport, request)
+            raw = response.read()
+            content_type = response.headers.get("content-type", "")
+            cassettes._record(recorded, response.status_code, content_type, raw, time.perf_counter() - started)
+            return httpx.Response(response.status_code, headers={"content-type": content_type}, content=raw,
+                                  request=request)
+
+        async def handle_async_request(transport, request):
+            recorded = prepare(request)
+            if recorded is None:
+                return await async_send(transport, request)
+            if cassettes.mode == "replay":
+                interaction = cassettes._replay(recorded)
+                await asyncio.sleep(cassettes._delay(interaction))
+                return replayed(request, interaction)
+            started = time.perf_counter()
+            response = await async_send(transport, request)
+            raw = await response.aread()
+            content_type = response.headers.get("content-type", "")
+            cassettes._record(recorded, response.status_code, content_type, raw, time.perf_counter() - started)
+            return httpx.Response(response.status_code, headers={"content-type": content_type}, content=raw,
+                                  request=request)
+
+        httpx.HTTPTransport.handle_request = handle_request
+        httpx.AsyncHTTPTransport.handle_async_request = handle_async_request
+
+    def _patch_requests(self):
+        cassettes = self
+        send = HTTPAdapter.send
+
+        def handle(adapter, request, **kwargs):
+            target = cassettes.target_of(request.url) if cassettes.active else None
+            if target is None:
+                return send(adapter, request, **kwargs)
+            body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body or b""
+            recorded = cassettes._request(target, request.method, request.url, body,
+                                          request.headers.get("Content-Type", ""))
+            if cassettes.mode == "replay":
+                interaction = cassettes._replay(recorded)
+                time.sleep(cassettes._delay(interaction))
+                response = requests.Response()
+                response.status_code = interaction["response"]["status"]
+                response.headers = CaseInsensitiveDict({"Content-Type": interaction["response"]["content_type"]})
+                response._content = cassettes._content(interaction)
+                response.encoding = "utf-8"
+                response.url = request.url
+                response.request = request
+                return response
+            started = time.perf_counter()
+            response = send(adapter, request, **kwargs)
+            cassettes._record(recorded, response.status_code, response.headers.get("Content-Type", ""),
+                              response.content, time.perf_counter() - started)
+            return response
+
+        HTTPAdapter.send = handle
+
+    def _wrap_urlopen(self, urlopen):
+        cassettes = self
+
+        def http(request):
+            target = cassettes.target_of(request.full_url) if cassettes.active else None
+            if target is None:
+                return urlopen(request)
+            data = request.data or b""
+            recorded = cassettes._request(target, request.get_method(), request.full_url, data,
+                                          request.get_header("Content-type", ""))
+            if cassettes.mode == "replay":
+                interaction = cassettes._replay(recorded)
+                time.sleep(cassettes._delay(interaction))
+                response = interaction["response"]
+                return _UrllibResponse(response["status"], response["content_type"], cassettes._content(interaction))
+            started = time.perf_counter()
+            try:
+                raw_response = urlopen(request)
+            except HTTPError as e:  # the Amadeus SDK reads error responses from the HTTPError itself
+                raw_response = e
+            status = getattr(raw_response, "status", None) or raw_response.code
+            content_type = raw_response.headers.get("Content-Type", "")
+            raw = raw_response.read()
+            cassettes._record(recorded, status, content_type, raw, time.perf_counter() - started)
+            return _UrllibResponse(status, content_type, raw)
+
+        http._cassette = True
+        return http
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "directory": self.directory,
+            "latency": self.latency,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "mismatches": len(self.mismatches),
+            "unused": self.unused() if self.mode == "replay" else {},
+        }
+
+
+class _UrllibResponse:
+    """Just enough of urllib's response for the Amadeus SDK's parser."""
+
+    def __init__(self, status: int, content_type: str, body: bytes):
+        self.status = self.code = status
+        self._headers = {"Content-Type": content_type}
+        self._body = body
+
+    def getheaders(self):
+        return list(self._headers.items())
+
+    def read(self) -> bytes:
+        return self._body
+
+
+cassettes = Cassettes()
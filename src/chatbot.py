@@ -1,36 +1,50 @@
 from agno.agent import Agent
-from agno.models.groq import Groq 
-from agno.memory.v2.db.sqlite import SqliteMemoryDb 
-from agno.memory.v2.memory import Memory 
-from dotenv import load_dotenv 
-from agno.storage.sqlite import SqliteStorage 
+from src.model_registry import role_model
+from src.history import HISTORY_MAX_RUNS, session_memory, shared_memory
+from src import metrics
+from src.storage import shared_memory_database, shared_session_storage
 from src.helper import *
 from src.instructions import Instructions
-from agno.models.groq import Groq
-from agno.models.google import Gemini
-import os
-load_dotenv()
-groq_key = os.getenv("GROQ_API_KEY")
-gemini_key = os.getenv("GEMINI_API_KEY")
-memory_db = SqliteMemoryDb(table_name="users_memory", 
-                           db_file="tmp/User_preferences_memory.db")
-memory = Memory(db=memory_db) # user prefernces memory
-storage =SqliteStorage(table_name="agent_sessions", 
-                    db_file="tmp/session_memory.db")
-flight_tools = [search_flights, booked_flight, cancel_flight]
+flight_tools = [search_flights, search_flights_flexible, booked_flight, cancel_flight]
 user_tools = [change_user_password, request_password_reset, reset_password_with_code,customer_service,update_user_profile]
-agent = Agent(
-    model=Groq(id = "llama-3.3-70b-versatile",api_key=groq_key),
-    # Memory Config
-    add_history_to_messages=True,         # short-term memory (session memory)
-    storage=storage,                      # sesisons Database
-    memory=memory,                        # user preference memory
-    enable_agentic_memory=True,           # enables autonomous user memory management
-    enable_session_summaries=True,        # summary memory
-    # Tools & Instructions
-    tools=flight_tools + user_tools,      # combined tool list
-    instructions=Instructions,    # system prompt / persona
-    show_tool_calls=False,
-    # UX Config
-    markdown=False                        # disables markdown output formatting
-)
\ No newline at end of file
+
+
+def build_agent() -> Agent:
+    """Builds the single-agent orchestrator (ORCHESTRATOR=single); storage and the memory database are shared."""
+    return Agent(
+        model=role_model("single"),           # model, max_tokens and reasoning from src.model_registry
+        # Memory Config
+        add_history_to_messages=True,         # short-term memory (session memory)
+        num_history_runs=HISTORY_MAX_RUNS,    # trimmed to HISTORY_TOKEN_BUDGET by BudgetedMemory
+        storage=shared_session_storage(table_name="agent_sessions"),   # sesisons Database
+        memory=session_memory(),              # own Memory over the shared user preference database
+        enable_agentic_memory=False,          # memories are extracted after the reply by src.memory_worker
+        add_memory_references=True,           # stored memories still go into the prompt
+        enable_session_summaries=False,       # summaries are updated after the reply by src.history
+        # Tools & Instructions
+        tools=flight_tools + user_tools,      # combined tool list
+        instructions=Instructions,    # system prompt / persona
+        show_tool_calls=False,
+        tool_hooks=[metrics.tool_hook],       # per-tool latency and outcome metrics
+        # UX Config
+        markdown=False                        # disables markdown output formatting
+    )
+
+
+_agent = None
+
+
+def __getattr__(name):
+    # scripts still do `from src.chatbot import agent, memory`; build them on first access
+    global _agent
+    if name == "agent":
+        if _agent is None:
+            _agent = build_agent()
+        return _agent
+    if name == "memory":
+        return shared_memory()
+    if name == "memory_db":
+        return shared_memory_database(table_name="users_memory")
+    if name == "storage":
+        return shared_session_storage(table_name="agent_sessions")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
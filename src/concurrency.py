@@ -0,0 +1,293 @@
+import asyncio
+import contextvars
+import functools
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Optional, Sequence, Tuple
+
+CHAT_MAX_IN_FLIGHT = int(os.getenv("CHAT_MAX_IN_FLIGHT", "32"))
+CHAT_MAX_WAITING = int(os.getenv("CHAT_MAX_WAITING", "64"))
+CHAT_WAIT_TIMEOUT = float(os.getenv("CHAT_WAIT_TIMEOUT", "10"))
+# run the turns of one session one at a time, in arrival order
+SESSION_SERIALIZE = os.getenv("SESSION_SERIALIZE", "true").lower() == "true"
+# seconds a turn may wait for the session's previous turn before it is refused
+SESSION_WAIT_TIMEOUT = float(os.getenv("SESSION_WAIT_TIMEOUT", "60"))
+# /chat/batch: items run at once (capped at CHAT_MAX_IN_FLIGHT), items per request, and how long
+# an item may queue for the global rate limit
+CHAT_BATCH_PARALLELISM = int(os.getenv("CHAT_BATCH_PARALLELISM", "8"))
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "1000"))
+CHAT_BATCH_ITEM_WAIT = float(os.getenv("CHAT_BATCH_ITEM_WAIT", "60"))
+
+
+class GateFull(Exception):
+    """Raised when a request can't get a slot; carries the Retry-After hint in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"server busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Caps how many chat runs are in flight and how many requests may queue for a slot.
+
+    Requests beyond `max_in_flight` wait up to `wait_timeout` seconds; once
+    `max_waiting` requests are already queued new ones are rejected straight away.
+    """
+
+    def __init__(self, max_in_flight: int, max_waiting: int, wait_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._avg_run_seconds = 1.0
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + 1) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(self._avg_run_seconds * backlog))
+
+    @asynccontextmanager
+    async def slot(self):
+        # counted before awaiting so a burst of arrivals can't all slip into the queue
+        if self.in_flight + self.waiting >= self.max_in_flight + self.max_waiting:
+            self.rejected += 1
+            raise GateFull(self.retry_after())
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise GateFull(self.retry_after())
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            # exponential moving average keeps the Retry-After hint close to current latency
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * elapsed
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_waiting": self.max_waiting,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_run_seconds": round(self._avg_run_seconds, 3),
+        }
+
+
+class SessionBusy(Exception):
+    """Raised when a session's previous turn is still running after the wait timeout."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"previous turn still running, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SessionLocks:
+    """One FIFO lock per session id, so turns of a session run one at a time and in order.
+
+    agno reads a session's history when a run starts and writes it back when
+    it ends, so two overlapping turns would each drop the other's run. Locks
+    exist only while a turn holds or waits for them; the entry is removed
+    when the last one leaves, so idle sessions cost nothing.
+    """
+
+    def __init__(self, enabled: bool = SESSION_SERIALIZE, wait_timeout: float = SESSION_WAIT_TIMEOUT):
+        self.enabled = enabled
+        self.wait_timeout = wait_timeout
+        self._locks = {}      # session id -> [asyncio.Lock, holders and waiters]
+        self.serialized = 0
+        self.timeouts = 0
+        self.max_queue = 0
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        if not self.enabled:
+            yield
+            return
+        entry = self._locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            if entry[0].locked():
+                self.serialized += 1
+                self.max_queue = max(self.max_queue, entry[1] - 1)
+            try:
+                await asyncio.wait_for(entry[0].acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise SessionBusy(max(1, math.ceil(self.wait_timeout / 4)))
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "active_sessions": len(self._locks),
+            "waiting": sum(count - 1 for lock, count in self._locks.values() if lock.locked()),
+            "serialized": self.serialized,
+            "timeouts": self.timeouts,
+            "max_queue": self.max_queue,
+        }
+
+
+async def run_ordered(items: Sequence, key: Callable[[Any], Hashable], run: Callable[[Any], Awaitable],
+                      parallelism: int) -> AsyncIterator[Tuple[int, Any, float, float]]:
+    """Runs `run(item)` for every item, at most `parallelism` at a time, and yields as each finishes.
+
+    Items with the same key run one after another in list order; different
+    keys run concurrently. Yields (index, result, started, seconds) with
+    `started` from time.perf_counter(); an exception from `run` is yielded as
+    the result. Leaving the iterator early cancels the items still running.
+    """
+    done: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+    lanes = {}
+    for index, item in enumerate(items):
+        lanes.setdefault(key(item), []).append(index)
+
+    async def lane(indexes):
+        for index in indexes:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await run(items[index])
+                except Exception as e:
+                    result = e
+                done.put_nowait((index, result, started, time.perf_counter() - started))
+
+    tasks = [asyncio.ensure_future(lane(indexes)) for indexes in lanes.values()]
+    try:
+        for _ in range(len(items)):
+            yield await done.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class AgentPool:
+    """Runs blocking agent calls on a dedicated thread pool.
+
+    Each worker checks out its own agent instance built by `factory`, so
+    concurrent runs never share agno's per-run state. Instances are built on
+    demand, up to `size`.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int):
+        self.factory = factory
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="agent")
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        self._built = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._built < self.size:
+                    self._built += 1
+                    build = True
+                else:
+                    build = False
+            if build:
+                try:
+                    return self.factory()
+                except BaseException:
+                    # give the slot back, or after `size` failed builds every worker waits on _idle forever
+                    with self._lock:
+                        self._built -= 1
+                    raise
+            try:
+                return self._idle.get(timeout=1.0)
+            except queue.Empty:
+                continue     # a build that was in progress may have failed and freed its slot
+
+    def _call(self, fn: Callable, *args, **kwargs):
+        instance = self._checkout()
+        try:
+            return fn(instance, *args, **kwargs)
+        finally:
+            self._idle.put(instance)
+
+    async def call(self, fn: Callable, *args, **kwargs):
+        """Runs `fn(instance, *args, **kwargs)` on the pool with a checked-out instance."""
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, self._call, fn, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    async def run(self, *args, **kwargs):
+        """Awaitable equivalent of `instance.run(*args, **kwargs)`."""
+        return await self.call(lambda instance, *a, **kw: instance.run(*a, **kw), *args, **kwargs)
+
+    def stream(self, fn: Callable, *args, hold: Optional[AsyncExitStack] = None, **kwargs) -> AsyncIterator[Any]:
+        """Async iterator over `fn(instance, *args, **kwargs)`, which is iterated on the pool.
+
+        The run starts right away and the instance stays checked out until it
+        ends. If the consumer stops early the run still finishes in the
+        background; `hold`, when given, is closed when the run has actually
+        finished, so whatever it holds (a session lock, a gate slot) outlives
+        a consumer that left.
+        """
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def produce(instance, *a, **kw):
+            try:
+                for item in fn(instance, *a, **kw):
+                    loop.call_soon_threadsafe(items.put_nowait, (item, None))
+            except BaseException as e:
+                loop.call_soon_threadsafe(items.put_nowait, (done, e))
+            else:
+                loop.call_soon_threadsafe(items.put_nowait, (done, None))
+
+        producer = asyncio.ensure_future(self.call(produce, *args, **kwargs))
+        if hold is not None:
+            producer.add_done_callback(lambda _: asyncio.ensure_future(hold.aclose()))
+
+        async def consume():
+            while True:
+                item, error = await items.get()
+                if item is done:
+                    await producer
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+
+        return consume()
+
+    def stats(self) -> dict:
+        return {"size": self.size, "built": self._built, "idle": self._idle.qsize()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+FAQ_DATA_FILE = os.getenv("FAQ_DATA_FILE", os.path.join(os.path.dirname(__file__), "faq_data.json"))
+FAQ_RELOAD_INTERVAL = float(os.getenv("FAQ_RELOAD_INTERVAL", "2"))
+
+
+@dataclass
+class FAQMatch:
+    intent: Optional[str]
+    airline: Optional[str]
+    confidence: float
+    scores: Dict[str, float]
+    # share of the query's words that are FAQ keywords, airline names or neutral words
+    coverage: float = 0.0
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> Tuple[str, ...]:
+    # "check-in" and "check in" both become ("check", "in")
+    return tuple(_WORD.findall(text.lower()))
+
+
+class _Index:
+    """Phrase table over every intent keyword and airline alias.
+
+    The query is tokenised once and scanned left to right; at each position the
+    longest phrase wins and its words are consumed, so "bag too heavy" scores
+    excess baggage instead of "bag" scoring baggage policy. Keywords ending in
+    "*" are stems ("reschedul*"); other keywords also match their plural.
+    Words in the data's "neutral" list ("how", "policy", ...) score nothing but
+    count towards the match's coverage.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.phrases: Dict[Tuple[str, ...], tuple] = {}
+        self.stems: Dict[Tuple[str, ...], Dict[str, tuple]] = {}
+        # first word of a multi-word phrase -> its longest phrase length
+        self.starts: Dict[str, int] = {}
+        self.neutral = frozenset(data.get("neutral", ()))
+        self.answers = frozenset(
+            answer for spec in data["intents"].values()
+            for answer in [spec.get("default")] + list(spec.get("specific", {}).values()) if answer
+        )
+        for airline, aliases in data["airlines"].items():
+            for alias in aliases:
+                self._add(alias, ("airline", airline, 0.0))
+        for intent, spec in data["intents"].items():
+            for keyword, weight in spec["keywords"].items():
+                self._add(keyword, ("intent", intent, float(weight)))
+
+    def _add(self, keyword: str, target: tuple):
+        words = _words(keyword)
+        if keyword.endswith("*"):
+            self.stems.setdefault(words[:-1], {})[words[-1]] = target
+        else:
+            self.phrases[words] = target
+            for suffix in ("s", "es"):
+                self.phrases.setdefault(words[:-1] + (words[-1] + suffix,), target)
+        if len(words) > 1:
+            self.starts[words[0]] = max(self.starts.get(words[0], 0), len(words))
+
+    def _lookup(self, words: Tuple[str, ...]):
+        target = self.phrases.get(words)
+        if target:
+            return target
+        stems = self.stems.get(words[:-1])
+        if stems:
+            for stem, target in stems.items():
+                if words[-1].startswith(stem):
+                    return target
+        return None
+
+    def match(self, query: str) -> FAQMatch:
+        words = _words(query)
+        scores: Dict[str, float] = {}
+        airline = None
+        covered = 0
+        i = 0
+        while i < len(words):
+            longest = min(self.starts.get(words[i], 1), len(words) - i)
+            for n in range(longest, 0, -1):
+                target = self._lookup(words[i:i + n])
+                if target:
+                    break
+            else:
+                covered += words[i] in self.neutral
+                i += 1
+                continue
+            covered += n
+            kind, name, weight = target
+            if kind == "airline":
+                airline = airline or name
+            else:
+                scores[name] = scores.get(name, 0.0) + weight
+            i += n
+
+        coverage = round(covered / len(words), 3) if words else 0.0
+        if not scores:
+            return FAQMatch(None, airline, 0.0, scores, coverage)
+        intent = max(scores, key=scores.get)
+        return FAQMatch(intent, airline, round(scores[intent] / sum(scores.values()), 3), scores, coverage)
+
+
+class FAQStore:
+    """FAQ answers and keywords loaded from a JSON file, reloaded when the file changes."""
+
+    def __init__(self, path: str = FAQ_DATA_FILE, reload_interval: float = FAQ_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self.reloads = 0
+        self._index = self._load()
+
+    def _load(self) -> _Index:
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            index = _Index(json.load(f))
+        self._mtime = mtime
+        return index
+
+    def reload(self):
+        """Re-reads the data file; the old index keeps serving if the new file is invalid."""
+        with self._lock:
+            self._index = self._load()
+            self.reloads += 1
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return
+        if changed:
+            try:
+                self.reload()
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def match(self, query: str) -> FAQMatch:
+        self._maybe_reload()
+        return self._index.match(query)
+
+    def is_answer(self, text: Optional[str]) -> bool:
+        """Whether `text` is one of the FAQ answers word for word."""
+        self._maybe_reload()
+        return bool(text) and text.strip() in self._index.answers
+
+    def answer(self, intent: str, airline: Optional[str] = None) -> str:
+        self._maybe_reload()
+        spec = self._index.data["intents"][intent]
+        if airline and airline in spec.get("specific", {}):
+            return spec["specific"][airline]
+        return spec.get("default", "Let me help you with that.")
+
+    def intents(self) -> Tuple[str, ...]:
+        return tuple(self._index.data["intents"])
+
+
+faq_store = FAQStore()
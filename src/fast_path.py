@@ -0,0 +1,71 @@
+import os
+import threading
+from typing import Optional
+
+from src.faq_store import faq_store
+from src.prerouter import GENERAL_AGENT, prerouter
+
+FAQ_FAST_PATH_ENABLED = os.getenv("FAQ_FAST_PATH_ENABLED", "true").lower() == "true"
+FAQ_FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAQ_FAST_PATH_MIN_CONFIDENCE", "0.8"))
+# share of the message's words the FAQ match has to account for, so "I lost my luggage, who do I
+# contact?" isn't answered with the baggage policy just because it says "luggage"
+FAQ_FAST_PATH_MIN_COVERAGE = float(os.getenv("FAQ_FAST_PATH_MIN_COVERAGE", "0.8"))
+
+
+class FAQFastPath:
+    """Answers clear-cut FAQ questions from the FAQ store without any model call.
+
+    A message qualifies when the pre-router confidently sends it to the
+    customer-service agent and the FAQ matcher finds an intent with at least
+    `min_confidence`, whose keywords (with airline names and neutral words)
+    make up at least `min_coverage` of the message. Everything else goes
+    through the agents as usual.
+    """
+
+    def __init__(self, enabled: bool = FAQ_FAST_PATH_ENABLED, min_confidence: float = FAQ_FAST_PATH_MIN_CONFIDENCE,
+                 min_coverage: float = FAQ_FAST_PATH_MIN_COVERAGE):
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.min_coverage = min_coverage
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def answer(self, message: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+
+        reply = None
+        decision = prerouter.classify(message)
+        if decision.route == GENERAL_AGENT and decision.confidence >= prerouter.min_confidence:
+            match = faq_store.match(message)
+            if (match.intent is not None and match.confidence >= self.min_confidence
+                    and match.coverage >= self.min_coverage):
+                reply = {
+                    "type": "customer_service",
+                    "success": True,
+                    "message": faq_store.answer(match.intent, match.airline),
+                    "login": False,
+                    "data": None
+                }
+
+        with self._lock:
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return reply
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "min_confidence": self.min_confidence,
+            "min_coverage": self.min_coverage,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+faq_fast_path = FAQFastPath()
@@ -0,0 +1,207 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+
+from src import metrics
+
+# hedge model calls that are slow to produce their first token (off by default)
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+# seconds to wait for the primary's first chunk before the backup is asked too; a role can set hedge_deadline.
+# Empty (the default) waits for the primary model's measured p95 time to first chunk (see src.model_registry)
+HEDGE_DEADLINE = float(os.getenv("HEDGE_DEADLINE") or 0) or None
+# at most this share of model calls over the last HEDGE_WINDOW_SECONDS may fire a backup request
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+HEDGE_WINDOW_SECONDS = float(os.getenv("HEDGE_WINDOW_SECONDS", "300"))
+# "provider:model" asked when the primary is late; provider is gemini or groq
+HEDGE_BACKUP = os.getenv("HEDGE_BACKUP", "gemini:gemini-2.0-flash")
+# threads running sync model calls while the caller waits on the deadline
+HEDGE_THREADS = int(os.getenv("HEDGE_THREADS", "32"))
+
+_END = object()
+
+
+def backup_model(spec: str = HEDGE_BACKUP):
+    """The agno model for HEDGE_BACKUP, or None when its provider has no API key."""
+    provider, _, model_id = spec.partition(":")
+    provider = provider.lower()
+    if provider == "gemini":
+        if not os.getenv("GEMINI_API_KEY"):
+            return None
+        from agno.models.google import Gemini
+        return Gemini(id=model_id or "gemini-2.0-flash", api_key=os.getenv("GEMINI_API_KEY"))
+    if provider == "groq":
+        from agno.models.groq import Groq
+        return Groq(id=model_id or "llama-3.1-8b-instant", api_key=os.getenv("GROQ_API_KEY"))
+    raise ValueError(f"Unknown HEDGE_BACKUP provider {provider!r}, expected gemini or groq")
+
+
+def _close(iterator):
+    close = getattr(iterator, "close", None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+class Hedger:
+    """Races a late primary model call against a backup, within a budget of backup calls.
+
+    The primary gets `deadline` seconds to return (or, when streaming, to
+    yield its first chunk). After that the backup is started too, and the
+    first to answer wins. A losing stream is closed as soon as it yields and
+    a losing async call is cancelled. If the winner failed, the other call's
+    result is used instead. Sync calls run in a thread pool with a copy of
+    the caller's context, so context variables such as the cassette scope
+    still apply.
+    """
+
+    def __init__(self, enabled: bool = HEDGE_ENABLED, max_ratio: float = HEDGE_MAX_RATIO,
+                 window_seconds: float = HEDGE_WINDOW_SECONDS):
+        self.enabled = enabled
+        self.max_ratio = max_ratio
+        self.window_seconds = window_seconds
+        self._calls = deque()          # (monotonic time, hedged)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.counts = Counter()
+
+    def __deepcopy__(self, memo):
+        return self   # agno deep-copies models; the budget stays shared
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=HEDGE_THREADS, thread_name_prefix="hedge")
+            return self._executor
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _start(self):
+        with self._lock:
+            self._prune()
+            self._calls.append([time.monotonic(), False])
+            self.counts["calls"] += 1
+            return self._calls[-1]
+
+    def _may_hedge(self, role: str, call) -> bool:
+        """Marks `call` as hedged if that keeps backups within max_ratio of recent calls."""
+        with self._lock:
+            self._prune()
+            hedged = sum(1 for _, h in self._calls if h)
+            allowed = hedged + 1 <= self.max_ratio * len(self._calls)
+            call[1] = allowed
+            self.counts["hedged" if allowed else "over_budget"] += 1
+        if not allowed:
+            metrics.count(metrics.LLM_HEDGES, role, "over_budget")
+        return allowed
+
+    def _won(self, role: str, outcome: str):
+        with self._lock:
+            self.counts[f"won_by_{outcome}"] += 1
+        metrics.count(metrics.LLM_HEDGES, role, outcome)
+
+    def stream(self, role: str, primary: Callable[[], Iterator], backup: Callable[[], Iterator],
+               deadline: float) -> Tuple[Iterator, bool]:
+        """Runs `primary()`, hedged with `backup()`, racing to the first chunk; returns (chunks, from_backup)."""
+
+        def first_chunk(open_stream):
+            iterator = iter(open_stream())
+            return iterator, next(iterator, _END)
+
+        def close_loser(future):
+            if not future.exception():
+                _close(future.result()[0])
+
+        def chunks(iterator, chunk):
+            if chunk is not _END:
+                yield chunk
+                yield from iterator
+
+        call = self._start()
+        first = self._pool().submit(contextvars.copy_context().run, first_chunk, primary)
+        try:
+            return chunks(*first.result(timeout=deadline)), False
+        except FutureTimeout:
+            pass
+        if not self._may_hedge(role, call):
+            return chunks(*first.result()), False
+        second = self._pool().submit(contextvars.copy_context().run, first_chunk, backup)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = first if first in done else second
+        if winner.exception() is not None:
+            winner = second if winner is first else first
+        loser = second if winner is first else first
+        loser.add_done_callback(close_loser)
+        self._won(role, "backup" if winner is second else "primary")
+        return chunks(*winner.result()), winner is second
+
+    async def acall(self, role: str, primary: Callable[[], Awaitable], backup: Callable[[], Awaitable],
+                    deadline: float, discard: Optional[Callable[[Any], Awaitable]] = None) -> Tuple[Any, bool]:
+        """Awaits `primary()`, hedged with `backup()`; a loser that finished anyway is passed to `discard`."""
+        call = self._start()
+        first = asyncio.ensure_future(primary())
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if done or not self._may_hedge(role, call):
+            return await first, False
+        second, winner = asyncio.ensure_future(backup()), None
+        try:
+            done, pending = await asyncio.wait({first, second}, return_when=FIRST_COMPLETED)
+            winner = done.pop()
+            if winner.exception() is not None and pending:
+                winner = pending.pop()
+                await asyncio.wait({winner})
+        finally:
+            for task in (first, second):
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif discard and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+        self._won(role, "backup" if winner is second else "primary")
+        return winner.result(), winner is second
+
+    async def astream(self, role: str, primary: Callable[[], AsyncIterator], backup: Callable[[], AsyncIterator],
+                      deadline: float) -> Tuple[AsyncIterator, bool]:
+        async def first_chunk(open_stream):
+            iterator = open_stream().__aiter__()
+            try:
+                return iterator, await iterator.__anext__()
+            except StopAsyncIteration:
+                return iterator, _END
+
+        async def chunks(iterator, chunk):
+            if chunk is not _END:
+                yield chunk
+                async for chunk in iterator:
+                    yield chunk
+
+        async def close(result):
+            aclose = getattr(result[0], "aclose", None)
+            if aclose:
+                await aclose()
+
+        winner_result, from_backup = await self.acall(role, lambda: first_chunk(primary),
+                                                      lambda: first_chunk(backup), deadline, discard=close)
+        return chunks(*winner_result), from_backup
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._prune()
+            recent = len(self._calls)
+            hedged = sum(1 for _, h in self._calls if h)
+            return {"enabled": self.enabled, "backup": HEDGE_BACKUP, "deadline": HEDGE_DEADLINE or "p95",
+                    "max_ratio": self.max_ratio, "recent_ratio": round(hedged / recent, 4) if recent else 0.0,
+                    **self.counts}
+
+
+hedger = Hedger()
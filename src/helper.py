@@ -1,22 +1,149 @@
 from amadeus import Client, ResponseError
 from typing import Optional, List
 from agno.tools import tool
-from src.instructions import FAQ_data
+from src.faq_store import faq_store
+from src.cache import TTLCache
+from src.http_client import BackendClient
+from src.result_store import result_store
+from src.passthrough import passthrough
+from src import metrics
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import contextvars
+import hashlib
+import time
 import os
 import re
-import requests
 
 load_dotenv()
 amadeus_api_key = os.getenv("AMADEUS_API_KEY")
 amadeus_api_secret = os.getenv("AMADEUS_API_SECRET")
 BASE_URL = os.getenv("BASE_URL")
+backend = BackendClient(BASE_URL)              # pooled keep-alive session for the backend API
 amadeus = Client(
     client_id=amadeus_api_key,
-    client_secret=amadeus_api_secret
+    client_secret=amadeus_api_secret,
+    # the SDK reads AMADEUS_HOST/AMADEUS_PORT itself but takes AMADEUS_SSL as a truthy string
+    ssl=os.getenv("AMADEUS_SSL", "true").lower() == "true",
 )
 
-@tool
+flight_search_cache = TTLCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "300")),
+    stale_ttl=float(os.getenv("SEARCH_CACHE_STALE", "600")),
+    name="search_flights",
+)
+
+
+def _search_cache_key(params: dict) -> tuple:
+    normalized = {}
+    for k, v in params.items():
+        if isinstance(v, str) and k not in ("departureDate", "returnDate"):
+            v = ",".join(sorted(part.strip().upper() for part in v.split(",")))
+        normalized[k] = v
+    return tuple(sorted(normalized.items()))
+
+
+def fetch_flight_offers(params: dict) -> dict:
+    """Amadeus flight-offers search through the shared cache; returns {"data": [...], "dictionaries": {...}, "result": {...}}.
+
+    `result` is the parsed Amadeus body, as the frontend expects it in a reply's data.
+    """
+    def load():
+        started = time.perf_counter()
+        status = None
+        try:
+            response = amadeus.shopping.flight_offers_search.get(**params)
+            status = response.status_code
+        except ResponseError as e:
+            status = getattr(e.response, "status_code", None)
+            raise
+        finally:
+            metrics.observe_http("amadeus", "GET", "/v2/shopping/flight-offers", status, time.perf_counter() - started)
+        return {"data": response.data, "dictionaries": (response.result or {}).get("dictionaries") or {},
+                "result": response.result}
+
+    return flight_search_cache.get_or_load(_search_cache_key(params), load)
+
+
+# flexible search: most Amadeus queries one call may fan out to (routes x days)
+FLEX_SEARCH_MAX_QUERIES = int(os.getenv("FLEX_SEARCH_MAX_QUERIES", "14"))
+# queries in flight at once, shared by all flexible searches so they can't flood Amadeus
+FLEX_SEARCH_CONCURRENCY = int(os.getenv("FLEX_SEARCH_CONCURRENCY", "4"))
+# offers fetched per route and day; only the cheapest of them is kept
+FLEX_SEARCH_OFFERS_PER_QUERY = int(os.getenv("FLEX_SEARCH_OFFERS_PER_QUERY", "3"))
+_flex_executor = ThreadPoolExecutor(max_workers=FLEX_SEARCH_CONCURRENCY, thread_name_prefix="flex-search")
+
+
+def fan_out_flight_offers(queries: List[dict]) -> list:
+    """Runs fetch_flight_offers for every params dict on the flex-search pool.
+
+    Returns (response, error) per query, in order; a failed query doesn't fail the others.
+    """
+    def run(params):
+        try:
+            return fetch_flight_offers(params), None
+        except Exception as e:
+            return None, e
+
+    # each query gets its own copy of the caller's context so cassettes and metrics follow it
+    futures = [_flex_executor.submit(contextvars.copy_context().run, run, params) for params in queries]
+    return [future.result() for future in futures]
+
+
+def _date_range(start: str, end: Optional[str]) -> List[str]:
+    first = date.fromisoformat(start)
+    last = date.fromisoformat(end) if end else first
+    if last < first:
+        raise ValueError("departureDateTo is before departureDateFrom")
+    return [(first + timedelta(days=n)).isoformat() for n in range((last - first).days + 1)]
+
+
+def _codes(codes) -> List[str]:
+    if isinstance(codes, str):
+        codes = codes.split(",")
+    return list(dict.fromkeys(code.strip().upper() for code in codes if code and code.strip()))
+
+
+def _offer_price(offer: dict) -> float:
+    price = offer.get("price", {})
+    return float(price.get("grandTotal") or price.get("total"))
+
+
+bookings_cache = TTLCache(
+    maxsize=int(os.getenv("BOOKINGS_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("BOOKINGS_CACHE_TTL", "60")),
+    name="bookings",
+)
+BOOKINGS_CACHE_MAX_PER_USER = int(os.getenv("BOOKINGS_CACHE_MAX_PER_USER", "200"))
+
+
+def _bookings_cache_key(access_token: str) -> str:
+    # never keep raw tokens in memory as dict keys
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+
+def fetch_bookings(access_token: str) -> dict:
+    """The user's bookings from /booking/my-bookings as {"bookings": [...], "by_ref": {bookingRef: booking}}.
+
+    Cached briefly per token so "show my bookings" followed by a cancel costs
+    one backend call. Users with more than BOOKINGS_CACHE_MAX_PER_USER bookings
+    are not cached.
+    """
+    def load():
+        response = backend.get("/booking/my-bookings", headers={"Authorization": f"Bearer {access_token}"})
+        response.raise_for_status()
+        bookings = response.json().get("data", {}).get("bookings", [])
+        return {"bookings": bookings, "by_ref": {b.get("bookingRef"): b for b in bookings}}
+
+    return bookings_cache.get_or_load(
+        _bookings_cache_key(access_token),
+        load,
+        cacheable=lambda value: len(value["bookings"]) <= BOOKINGS_CACHE_MAX_PER_USER,
+    )
+
+@tool(stop_after_tool_call=passthrough("search_flights"))
 def search_flights(
     originLocationCode: str,
     destinationLocationCode: str,
@@ -51,8 +178,8 @@ def search_flights(
             "max": max,
         }
         params = {k: v for k, v in params.items() if v is not None}
-        response = amadeus.shopping.flight_offers_search.get(**params)
-        results = response.data
+        response = fetch_flight_offers(params)
+        results = response["data"]
 
         if not results:
             return {
@@ -85,7 +212,8 @@ def search_flights(
             "success": True,
             "message": output.strip(),
             "login": False,
-            "data": response.body
+            # the full offers stay server-side; /chat swaps the id back in
+            "data": result_store.put(response["result"])
         }
 
     except ResponseError as e :
@@ -106,7 +234,149 @@ def search_flights(
             "data": None
         }
 
-@tool
+@tool(stop_after_tool_call=passthrough("search_flights_flexible"))
+def search_flights_flexible(
+    originLocationCodes: List[str],
+    destinationLocationCodes: List[str],
+    departureDateFrom: str,
+    departureDateTo: Optional[str] = None,
+    max: int = 3,
+    adults: int = 1,
+    travelClass: Optional[str] = None,
+    currencyCode: Optional[str] = None,
+    nonStop: Optional[bool] = None,
+    maxPrice: Optional[int] = None
+) -> dict:
+    """
+    description : when user is flexible on the date or the airports, e.g. "cheapest day next week to DXB or DOH". one call searches every origin/destination/day combination, use it instead of calling search_flights once per day or airport
+    input : originLocationCodes and destinationLocationCodes as lists of IATA codes, departureDateFrom and departureDateTo (YYYY-MM-DD, both included)
+    returns : json with the cheapest fare per route and day and the cheapest options overall
+    """
+    try:
+        origins = _codes(originLocationCodes)
+        destinations = _codes(destinationLocationCodes)
+        days = _date_range(departureDateFrom, departureDateTo)
+    except (ValueError, TypeError, AttributeError):
+        return {
+            "type": "search_flights",
+            "success": False,
+            "message": "❌ Please give the dates as YYYY-MM-DD, with the last date on or after the first one.",
+            "login": False,
+            "data": None
+        }
+
+    routes = [(o, d) for o in origins for d in destinations if o != d]
+    if not routes or len(routes) * len(days) > FLEX_SEARCH_MAX_QUERIES:
+        return {
+            "type": "search_flights",
+            "success": False,
+            "message": (
+                f"❌ That would be {len(routes) * len(days)} searches; I can compare up to {FLEX_SEARCH_MAX_QUERIES} "
+                "route and day combinations at once. Please narrow the dates or the airports."
+                if routes else "❌ Please give at least one origin and one different destination."
+            ),
+            "login": False,
+            "data": None
+        }
+
+    try:
+        cells = [(o, d, day) for o, d in routes for day in days]
+        queries = []
+        for o, d, day in cells:
+            params = {
+                "originLocationCode": o,
+                "destinationLocationCode": d,
+                "departureDate": day,
+                "adults": adults,
+                "travelClass": travelClass,
+                "nonStop": nonStop,
+                "currencyCode": currencyCode,
+                "maxPrice": maxPrice,
+                "max": FLEX_SEARCH_OFFERS_PER_QUERY,
+            }
+            queries.append({k: v for k, v in params.items() if v is not None})
+
+        cheapest = {}
+        failed = []
+        dictionaries = {}
+        for cell, (response, error) in zip(cells, fan_out_flight_offers(queries)):
+            if error is not None:
+                failed.append(cell)
+                continue
+            offers = response["data"] or []
+            if offers:
+                cheapest[cell] = min(offers, key=_offer_price)
+            for name, entries in response.get("dictionaries", {}).items():
+                dictionaries.setdefault(name, {}).update(entries)
+
+        span = days[0] if len(days) == 1 else f"{days[0]} to {days[-1]}"
+        if not cheapest:
+            if len(failed) == len(cells):
+                return {
+                    "type": "search_flights",
+                    "success": False,
+                    "message": "❌ Sorry, we're having trouble accessing flight data at the moment. Please try again later.",
+                    "login": False,
+                    "data": None
+                }
+            return {
+                "type": "search_flights",
+                "success": True,
+                "message": f"No flights found from {', '.join(origins)} to {', '.join(destinations)} on {span}.",
+                "login": False,
+                "data": None
+            }
+
+        ranked = sorted(cheapest.items(), key=lambda item: _offer_price(item[1]))
+        currency = currencyCode or ranked[0][1].get("price", {}).get("currency") or "USD"
+        output = f"✈️ Cheapest fares per day, {span} ({currency}):\n\n"
+        for o, d in routes:
+            prices = [
+                f"{day[5:]} {cheapest[(o, d, day)]['price']['total']}" if (o, d, day) in cheapest
+                else f"{day[5:]} {'?' if (o, d, day) in failed else '—'}"
+                for day in days
+            ]
+            output += f"{o} → {d}: " + " | ".join(prices) + "\n"
+
+        output += "\nCheapest options:\n"
+        for i, ((o, d, day), offer) in enumerate(ranked[:max], start=1):
+            segments = offer['itineraries'][0]['segments']
+            flight_number = segments[0]['carrierCode'] + segments[0]['number']
+            dep_time = segments[0]['departure']['at'].replace("T", " ")[11:16]
+            stops = "non-stop" if len(segments) == 1 else f"{len(segments) - 1} stop(s)"
+            output += f"{i}. {o} → {d} on {day}: {flight_number} at {dep_time}, {stops}, {currency} {offer['price']['total']}\n"
+        if failed:
+            output += "\nCouldn't check: " + ", ".join(f"{o} → {d} on {day}" for o, d, day in failed) + "\n"
+
+        body = {
+            "meta": {"count": len(ranked), "routes": [f"{o}-{d}" for o, d in routes], "dates": days},
+            # one offer per route and day, cheapest first, in the same shape as a search_flights result
+            "data": [offer for _, offer in ranked],
+            "dictionaries": dictionaries,
+            "matrix": {
+                f"{o}-{d}": {day: cheapest[(o, d, day)]['price']['total'] if (o, d, day) in cheapest else None
+                             for day in days}
+                for o, d in routes
+            },
+        }
+        return {
+            "type": "search_flights",
+            "success": True,
+            "message": output.strip(),
+            "login": False,
+            "data": result_store.put(body)
+        }
+
+    except Exception:
+        return {
+            "type": "search_flights",
+            "success": False,
+            "message": "❌ An unexpected error occurred while searching for flights.",
+            "login": False,
+            "data": None
+        }
+
+@tool(stop_after_tool_call=passthrough("booked_flight"))
 def booked_flight(access_token: str) -> dict:
     """
     description : when user wants see its booked flights or perform cancelation  
@@ -123,11 +393,8 @@ def booked_flight(access_token: str) -> dict:
             "data": None
         }
 
-    headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        response = requests.get(f"{BASE_URL}/booking/my-bookings", headers=headers)
-        response.raise_for_status()
-        all_bookings = response.json().get("data", {}).get("bookings", [])
+        all_bookings = fetch_bookings(access_token)["bookings"]
         confirmed = [b for b in all_bookings if b.get("status") == "confirmed"]
 
         if not confirmed:
@@ -171,7 +438,7 @@ def booked_flight(access_token: str) -> dict:
             "data": None
         }
 
-@tool
+@tool(stop_after_tool_call=passthrough("cancel_flight"))
 def cancel_flight(access_token: str, bookingRef: str) -> dict:
     """
     describtion : it cancels flights that is already booked 
@@ -199,11 +466,11 @@ def cancel_flight(access_token: str, bookingRef: str) -> dict:
 
     headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        booking_lookup = requests.get(f"{BASE_URL}/booking/my-bookings", headers=headers)
-        booking_lookup.raise_for_status()
-        bookings = booking_lookup.json().get("data", {}).get("bookings", [])
-
-        match = next((b for b in bookings if b["bookingRef"] == bookingRef), None)
+        match = fetch_bookings(access_token)["by_ref"].get(bookingRef)
+        if not match:
+            # the booking may be newer than the cached list
+            bookings_cache.invalidate(_bookings_cache_key(access_token))
+            match = fetch_bookings(access_token)["by_ref"].get(bookingRef)
         if not match:
             return {
                 "type": "cancel_flight",
@@ -223,7 +490,9 @@ def cancel_flight(access_token: str, bookingRef: str) -> dict:
                 "data": None
             }
 
-        cancel_response = requests.post(f"{BASE_URL}/booking/{booking_id}/cancel", headers=headers)
+        cancel_response = backend.post(f"/booking/{booking_id}/cancel", headers=headers)
+        # the cached list is out of date whether or not the cancel went through
+        bookings_cache.invalidate(_bookings_cache_key(access_token))
         cancel_response.raise_for_status()
 
         return {
@@ -244,7 +513,7 @@ def cancel_flight(access_token: str, bookingRef: str) -> dict:
         }
 
 
-@tool
+@tool(stop_after_tool_call=passthrough("update_user_profile"))
 def update_user_profile(
     access_token: str,
     firstName: Optional[str] = None,
@@ -296,7 +565,7 @@ def update_user_profile(
     clean_payload = {k: v for k, v in payload.items() if v is not None}
 
     try:
-        response = requests.patch(f"{BASE_URL}/users/profile", json=clean_payload, headers=headers)
+        response = backend.patch("/users/profile", json=clean_payload, headers=headers)
         data = response.json()
 
         if response.status_code >= 400:
@@ -335,7 +604,7 @@ def is_strong_password(pw: str) -> bool:
             re.search(r"[0-9]", pw) and
             re.search(r"[^A-Za-z0-9]", pw)
         )
-@tool
+@tool(stop_after_tool_call=passthrough("change_user_password"))
 def change_user_password(access_token: str, oldPassword: str, newPassword: str) -> dict:
     """description : it changes user password from old password to new password  
     input : access_token,oldpassword,newpassword 
@@ -371,7 +640,7 @@ def change_user_password(access_token: str, oldPassword: str, newPassword: str)
     }
 
     try:
-        response = requests.put(f"{BASE_URL}/users/change-password", json=payload, headers=headers)
+        response = backend.put("/users/change-password", json=payload, headers=headers)
         data = response.json()
 
         if response.status_code >= 400:
@@ -401,14 +670,14 @@ def change_user_password(access_token: str, oldPassword: str, newPassword: str)
         }
 
 
-@tool
+@tool(stop_after_tool_call=passthrough("request_password_reset"))
 def request_password_reset(email: str) -> dict:
     """description : it requests password reset where a mail will be sent to user mail  with code to reset the password 
     input : mail **mandatory**
     returns : json with confirmation that the code sent to user or error occurred """
     payload = {"email": email}
     try:
-        response = requests.post(f"{BASE_URL}/users/request-password-reset", json=payload)
+        response = backend.post("/users/request-password-reset", json=payload)
         data = response.json()
 
         if response.status_code >= 400:
@@ -438,7 +707,7 @@ def request_password_reset(email: str) -> dict:
         }
 
 
-@tool
+@tool(stop_after_tool_call=passthrough("reset_password_with_code"))
 def reset_password_with_code(code: str, newPassword: str) -> dict:
     """description : when user wants to reset password, they give you code and new password to reset it  
     input : code,newpassword
@@ -458,7 +727,7 @@ def reset_password_with_code(code: str, newPassword: str) -> dict:
     }
 
     try:
-        response = requests.post(f"{BASE_URL}/users/reset-password", json=payload)
+        response = backend.post("/users/reset-password", json=payload)
         data = response.json()
 
         if response.status_code >= 400:
@@ -489,44 +758,25 @@ def reset_password_with_code(code: str, newPassword: str) -> dict:
          #############################################################
          # --------------------Customer Service----------------------
          #############################################################
-@tool
+def match_faq(query: str):
+    """Returns (intent, airline, confidence) for a customer-service question.
+
+    confidence is the winning intent's share of all keyword scores, so it is
+    1.0 when a single intent matched; intent is None when nothing matched.
+    """
+    match = faq_store.match(query)
+    return match.intent, match.airline, match.confidence
+
+
+def faq_answer(intent: str, airline: Optional[str] = None) -> str:
+    return faq_store.answer(intent, airline)
+
+
+@tool(stop_after_tool_call=passthrough("customer_service"))
 def customer_service(query: str) -> dict:
     try:
-        normalized_query = query.lower()
-        matched_airline = None
-
-        airline_keywords = {
-            "emirates": "emirates",
-            "qatar": "qatar airways",
-            "qatar airways": "qatar airways",
-            "saudi": "saudi airlines",
-            "saudi airlines": "saudi airlines",
-            "etihad": "etihad",
-            "flydubai": "flydubai"
-        }
-
-        for key in airline_keywords:
-            if key in normalized_query:
-                matched_airline = airline_keywords[key]
-                break
-
-        if any(word in normalized_query for word in ["laptop", "bag", "personal item", "carry-on", "cabin bag", "hand luggage"]):
-            intent = "baggage policy"
-        elif any(word in normalized_query for word in ["refund", "money back", "cancel my ticket"]):
-            intent = "refund rules"
-        elif any(word in normalized_query for word in ["reschedul", "change", "change my ticket", "change flight", "modify booking"]):
-            intent = "rescheduling"
-        elif any(word in normalized_query for word in ["excess", "extra weight", "too heavy", "overweight", "bag too heavy"]):
-            intent = "excess baggage"
-        elif any(word in normalized_query for word in ["visa", "travel document", "entry permit"]):
-            intent = "visa requirements"
-        elif any(word in normalized_query for word in ["check-in", "check in", "boarding pass", "when can I check"]):
-            intent = "check-in policy"
-        elif any(word in normalized_query for word in ["pet", "dog", "cat", "animal", "bring my pet"]):
-            intent = "pet policy"
-        elif any(word in normalized_query for word in ["meal", "food", "vegetarian", "special meal", "kosher", "halal"]):
-            intent = "meal options"
-        else:
+        intent, matched_airline, _ = match_faq(query)
+        if intent is None:
             return {
                 "type": "customer_service",
                 "success": False,
@@ -535,16 +785,10 @@ def customer_service(query: str) -> dict:
                 "data": None
             }
 
-        faq_data = FAQ_data
-        if matched_airline and matched_airline in faq_data[intent].get("specific", {}):
-            reply = faq_data[intent]["specific"][matched_airline]
-        else:
-            reply = faq_data[intent].get("default", "Let me help you with that.")
-
         return {
             "type": "customer_service",
             "success": True,
-            "message": reply,
+            "message": faq_answer(intent, matched_airline),
             "login": False,
             "data": None
         }
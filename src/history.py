@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+from agno.memory.v2.memory import Memory
+from agno.memory.v2.summarizer import SessionSummarizer
+from agno.models.message import Message
+from agno.storage.session.agent import AgentSession
+
+from src.background import QueueWorker
+from src.cache import TTLCache
+from src.passthrough import parse_envelope
+from src.storage import session_storage, shared_memory_database
+
+# replayed history is cut to this many (estimated) tokens, summary included
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+# the newest turns are always replayed as they were
+HISTORY_VERBATIM_TURNS = int(os.getenv("HISTORY_VERBATIM_TURNS", "2"))
+# how many runs agno hands to the budget; older ones only live on in the summary
+HISTORY_MAX_RUNS = int(os.getenv("HISTORY_MAX_RUNS", "10"))
+# how many runs a session keeps in storage; every write serializes all of them
+HISTORY_STORED_RUNS = int(os.getenv("HISTORY_STORED_RUNS", "50"))
+# tool results in older turns are cut to this many characters
+HISTORY_TOOL_CHARS = int(os.getenv("HISTORY_TOOL_CHARS", "240"))
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+
+
+def estimate_tokens(message: Message) -> int:
+    """Rough token count (4 characters per token) of a message's content and tool calls."""
+    size = len(message.get_content_string() or "")
+    if message.tool_calls:
+        size += len(json.dumps(message.tool_calls, default=str))
+    return size // 4 + 4
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + " …"
+
+
+def condense(message: Message, limit: int = HISTORY_TOOL_CHARS) -> Message:
+    """Copy of `message` with a tool payload reduced to its envelope type, status and a short message."""
+    if message.role != "tool":
+        return message
+    content = message.get_content_string() or ""
+    if len(content) <= limit:
+        return message
+    envelope = parse_envelope(content.rstrip(","))
+    if envelope is not None:
+        short = {k: envelope[k] for k in ("type", "success")}
+        short["message"] = _truncate(str(envelope.get("message") or ""), limit)
+        if isinstance(envelope.get("data"), str):
+            short["data"] = envelope["data"]  # a flt_ result id
+        content = json.dumps(short, ensure_ascii=False)
+    else:
+        content = _truncate(content, limit)
+    return message.model_copy(update={"content": content})
+
+
+def _turns(messages: List[Message]) -> List[List[Message]]:
+    turns: List[List[Message]] = []
+    for message in messages:
+        if message.role == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def trim_history(messages: List[Message], summary: Optional[str] = None, budget: int = HISTORY_TOKEN_BUDGET,
+                 verbatim_turns: int = HISTORY_VERBATIM_TURNS) -> List[Message]:
+    """Keeps the newest turns verbatim and fills the rest of `budget` with condensed older turns.
+
+    Older turns are dropped oldest-first once the budget is spent; the session
+    summary, when there is one, stands in for them at the start.
+    """
+    system = [m for m in messages if m.role == "system"]
+    turns = _turns([m for m in messages if m.role != "system"])
+    head = []
+    if summary:
+        head.append(Message(role="system", content=f"Summary of the earlier conversation: {summary}"))
+
+    kept: List[List[Message]] = []
+    used = sum(estimate_tokens(m) for m in system + head)
+    for age, turn in enumerate(reversed(turns)):
+        if age >= verbatim_turns:
+            turn = [condense(m) for m in turn]
+            cost = sum(estimate_tokens(m) for m in turn)
+            if used + cost > budget:
+                break
+        else:
+            cost = sum(estimate_tokens(m) for m in turn)
+        kept.append(turn)
+        used += cost
+    return system + head + [m for turn in reversed(kept) for m in turn]
+
+
+class SessionSummaries:
+    """Rolling per-session summaries, updated by a background worker after each reply.
+
+    Each update folds the newest turns into the previous summary, so the
+    summarizer sees a few short messages instead of the whole session. Summaries
+    are kept in their own storage table, which no agent run writes to.
+    """
+
+    def __init__(self, enabled: bool = SUMMARY_ENABLED):
+        self.enabled = enabled
+        self.summarizer: Optional[SessionSummarizer] = None
+        self._storage = None
+        self._cache = TTLCache(maxsize=2048, ttl=60, name="session_summaries")
+        self.worker = QueueWorker("session-summaries", self._handle, maxsize=1000, batch_size=32)
+        self.updates = 0
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = session_storage(table_name="session_summaries")
+        return self._storage
+
+    def _get_summarizer(self) -> SessionSummarizer:
+        if self.summarizer is None:
+            from src.model_registry import role_model
+            self.summarizer = SessionSummarizer(model=role_model("summary"))
+        return self.summarizer
+
+    def get(self, session_id: Optional[str]) -> Optional[str]:
+        if not (self.enabled and session_id):
+            return None
+        entry = self._cache.get_or_load(session_id, lambda: self._read(session_id))
+        return entry.get("summary") if entry else None
+
+    def _read(self, session_id: str) -> dict:
+        session = self.storage.read(session_id)
+        return (session.session_data or {}) if session else {}
+
+    def record(self, session_id: str, user_id: Optional[str], user_message: str, reply: Optional[str]):
+        """Queues a finished turn; never blocks the request."""
+        if self.enabled and session_id and reply:
+            self.worker.submit((session_id, user_id, user_message, reply))
+
+    def _handle(self, batch: list):
+        by_session = {}
+        for session_id, user_id, user_message, reply in batch:
+            by_session.setdefault(session_id, (user_id, []))[1].extend([
+                Message(role="user", content=user_message),
+                Message(role="assistant", content=reply),
+            ])
+        for session_id, (user_id, turns) in by_session.items():
+            self._update(session_id, user_id, turns)
+
+    def _update(self, session_id: str, user_id: Optional[str], turns: List[Message]):
+        previous = self._read(session_id)
+        conversation = list(turns)
+        if previous.get("summary"):
+            conversation.insert(0, Message(role="assistant", content=f"(Summary so far) {previous['summary']}"))
+        result = self._get_summarizer().run(conversation=conversation)
+        if result is None:
+            return
+        data = {"summary": result.summary, "topics": result.topics, "turns": previous.get("turns", 0) + len(turns) // 2}
+        now = int(time.time())
+        self.storage.upsert(AgentSession(
+            session_id=session_id, user_id=user_id, agent_id="session_summaries",
+            session_data=data, created_at=now, updated_at=now,
+        ))
+        self._cache.set(session_id, data)
+        self.updates += 1
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "updates": self.updates, "worker": self.worker.stats()}
+
+
+session_summaries = SessionSummaries()
+
+
+class BudgetedMemory(Memory):
+    """agno Memory whose replayed history fits HISTORY_TOKEN_BUDGET.
+
+    Agents and teams ask for up to HISTORY_MAX_RUNS runs; the newest
+    HISTORY_VERBATIM_TURNS turns are kept as they were, older tool payloads are
+    condensed and whatever still does not fit is left to the session summary.
+    """
+
+    def get_messages_from_last_n_runs(self, session_id: str, *args, **kwargs) -> List[Message]:
+        messages = super().get_messages_from_last_n_runs(session_id, *args, **kwargs)
+        if not messages:
+            return messages
+        return trim_history(messages, summary=session_summaries.get(session_id))
+
+    def add_run(self, session_id: str, run) -> None:
+        super().add_run(session_id, run)
+        # agno re-reads the session from storage at the start of every run, so runs and team
+        # context of other sessions are dead weight that each write would serialize again
+        runs = self.runs[session_id][-HISTORY_STORED_RUNS:] if HISTORY_STORED_RUNS > 0 else self.runs[session_id]
+        self.runs = {session_id: runs}
+        if self.team_context:
+            self.team_context = {k: v for k, v in self.team_context.items() if k == session_id}
+
+
+_memory: Optional[BudgetedMemory] = None
+_memory_lock = threading.Lock()
+
+
+def session_memory() -> BudgetedMemory:
+    """A new BudgetedMemory over the shared users_memory database.
+
+    Each agent or team instance needs its own: agno keeps the current
+    session's runs on the Memory object and serializes them on every write.
+    """
+    return BudgetedMemory(db=shared_memory_database(table_name="users_memory"))
+
+
+def shared_memory() -> BudgetedMemory:
+    """One BudgetedMemory for scripts that only read user memories, built on first use."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = session_memory()
+        return _memory
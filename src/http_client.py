@@ -0,0 +1,146 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src import metrics
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
+
+# only these are retried; a retried POST could cancel or reset twice
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = (502, 503, 504)
+
+# (connect, read) seconds per endpoint template, anything else uses the defaults
+ENDPOINT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "/booking/my-bookings": (HTTP_CONNECT_TIMEOUT, 8.0),
+    "/booking/{id}/cancel": (HTTP_CONNECT_TIMEOUT, 20.0),
+    "/users/request-password-reset": (HTTP_CONNECT_TIMEOUT, 15.0),
+}
+
+_ID_SEGMENT = re.compile(r"/(?:[0-9a-fA-F]{24}|\d+|[0-9a-fA-F-]{36})(?=/|$)")
+
+
+def endpoint_of(path: str) -> str:
+    """Path template used for timeouts and metrics, e.g. /booking/{id}/cancel."""
+    return _ID_SEGMENT.sub("/{id}", path.split("?", 1)[0])
+
+
+class _EndpointStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, dict] = {}
+        self.in_flight = 0
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def finish(self, method: str, endpoint: str, started: float, status: Optional[int]):
+        elapsed = time.perf_counter() - started
+        error = status is None or status >= 500
+        metrics.observe_http("backend", method, endpoint, status, elapsed)
+        with self._lock:
+            self.in_flight -= 1
+            row = self.endpoints.setdefault(f"{method} {endpoint}", {"requests": 0, "errors": 0, "seconds": 0.0})
+            row["requests"] += 1
+            row["errors"] += error
+            row["seconds"] += elapsed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "endpoints": {
+                    name: {**row, "avg_ms": round(row["seconds"] / row["requests"] * 1000, 1), "seconds": round(row["seconds"], 3)}
+                    for name, row in self.endpoints.items()
+                },
+            }
+
+
+def _timeout_for(path: str) -> Tuple[float, float]:
+    return ENDPOINT_TIMEOUTS.get(endpoint_of(path), (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+
+
+class BackendClient:
+    """Shared keep-alive session for the backend API with per-endpoint timeouts.
+
+    Idempotent requests are retried on connection errors and 502/503/504 with
+    jittered exponential backoff; other methods are sent exactly once.
+    """
+
+    def __init__(self, base_url: Optional[str], pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES):
+        self.base_url = (base_url or "").rstrip("/")
+        self.pool_size = pool_size
+        retry_options = dict(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            backoff_factor=HTTP_BACKOFF,
+            raise_on_status=False,
+        )
+        try:
+            retry = Retry(backoff_jitter=HTTP_BACKOFF, **retry_options)
+        except TypeError:  # urllib3 < 2 has no backoff_jitter
+            retry = Retry(**retry_options)
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self._stats = _EndpointStats()
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        method = method.upper()
+        kwargs.setdefault("timeout", _timeout_for(path))
+        started = self._stats.start()
+        status = None
+        try:
+            response = self.session.request(method, self.base_url + path, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self._stats.finish(method, endpoint_of(path), started, status)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, **kwargs)
+
+    def stats(self) -> dict:
+        pools = []
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": pool.host,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "available": pool.pool.qsize() if pool.pool is not None else 0,
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+            })
+        return {"pool_size": self.pool_size, "pools": pools, **self._stats.snapshot()}
+
+    def close(self):
+        self.session.close()
+
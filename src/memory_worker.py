@@ -0,0 +1,160 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from agno.memory.v2.db.base import MemoryDb
+from agno.memory.v2.db.schema import MemoryRow
+from agno.memory.v2.manager import MemoryManager
+from agno.models.message import Message
+
+from src.background import QueueWorker
+from src.storage import shared_memory_database
+
+MEMORY_WORKER_ENABLED = os.getenv("MEMORY_WORKER_ENABLED", "true").lower() == "true"
+# a new memory whose word set is at least this similar to a stored one is skipped
+MEMORY_DEDUP_THRESHOLD = float(os.getenv("MEMORY_DEDUP_THRESHOLD", "0.8"))
+MEMORY_BATCH_SIZE = int(os.getenv("MEMORY_BATCH_SIZE", "16"))
+
+# turns that carry credentials are never sent to the memory model
+_SENSITIVE = re.compile(r"\b(password|passcode|code|otp|token)\b", re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(_WORD.findall((text or "").lower()))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _text(row: MemoryRow) -> str:
+    return (row.memory or {}).get("memory", "")
+
+
+class _StagedMemoryDb(MemoryDb):
+    """Reads from the real db, keeps the memory manager's writes until they are applied."""
+
+    def __init__(self, db: MemoryDb):
+        self.db = db
+        self.upserts: Dict[str, MemoryRow] = {}
+        self.deletes: List[str] = []
+
+    def create(self) -> None:
+        self.db.create()
+
+    def memory_exists(self, memory: MemoryRow) -> bool:
+        return memory.id in self.upserts or self.db.memory_exists(memory)
+
+    def read_memories(self, user_id: Optional[str] = None, limit: Optional[int] = None,
+                      sort: Optional[str] = None) -> List[MemoryRow]:
+        return self.db.read_memories(user_id, limit, sort)
+
+    def upsert_memory(self, memory: MemoryRow) -> Optional[MemoryRow]:
+        self.upserts[memory.id] = memory
+        return memory
+
+    def delete_memory(self, memory_id: str) -> None:
+        self.upserts.pop(memory_id, None)
+        self.deletes.append(memory_id)
+
+    def drop_table(self) -> None:
+        self.upserts.clear()
+        self.deletes.clear()
+        self.db.drop_table()
+
+    def table_exists(self) -> bool:
+        return self.db.table_exists()
+
+    def clear(self) -> bool:
+        self.upserts.clear()
+        self.deletes.clear()
+        return self.db.clear()
+
+
+class UserMemoryWorker:
+    """Extracts user memories from finished turns on a background queue.
+
+    Turns are grouped per user so one model call covers every queued message
+    of that user. The memory manager's writes are staged, near-duplicates of
+    stored memories are dropped, and the rest is written in one pass. Agents
+    only read memories (add_memory_references), so no request waits on this.
+    """
+
+    def __init__(self, enabled: bool = MEMORY_WORKER_ENABLED, threshold: float = MEMORY_DEDUP_THRESHOLD):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.manager: Optional[MemoryManager] = None
+        self._db: Optional[MemoryDb] = None
+        self._lock = threading.Lock()
+        self.worker = QueueWorker("user-memories", self._handle, maxsize=1000, batch_size=MEMORY_BATCH_SIZE)
+        self.counts = {"skipped_sensitive": 0, "added": 0, "updated": 0, "deleted": 0, "duplicates": 0}
+
+    @property
+    def db(self) -> MemoryDb:
+        if self._db is None:
+            self._db = shared_memory_database(table_name="users_memory")
+        return self._db
+
+    def _get_manager(self) -> MemoryManager:
+        if self.manager is None:
+            from src.model_registry import role_model
+            self.manager = MemoryManager(model=role_model("memory"))
+        return self.manager
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counts[name] += n
+
+    def record(self, user_id: Optional[str], user_message: str):
+        """Queues a finished turn's user message; never blocks the request."""
+        if not (self.enabled and user_id and user_message):
+            return
+        if _SENSITIVE.search(user_message):
+            self._count("skipped_sensitive")
+            return
+        self.worker.submit((user_id, user_message))
+
+    def _handle(self, batch: list):
+        by_user: Dict[str, List[str]] = {}
+        for user_id, user_message in batch:
+            by_user.setdefault(user_id, []).append(user_message)
+        for user_id, messages in by_user.items():
+            self._extract(user_id, messages)
+
+    def _extract(self, user_id: str, messages: List[str]):
+        existing = self.db.read_memories(user_id=user_id)
+        staged = _StagedMemoryDb(self.db)
+        self._get_manager().create_or_update_memories(
+            messages=[Message(role="user", content=m) for m in messages],
+            existing_memories=[{"memory_id": row.id, "memory": _text(row)} for row in existing],
+            user_id=user_id,
+            db=staged,
+            delete_memories=True,
+            clear_memories=False,
+        )
+        self._apply(staged, existing)
+
+    def _apply(self, staged: _StagedMemoryDb, existing: List[MemoryRow]):
+        known = {row.id: _words(_text(row)) for row in existing}
+        for memory_id in staged.deletes:
+            self.db.delete_memory(memory_id)
+            known.pop(memory_id, None)
+            self._count("deleted")
+        for row in staged.upserts.values():
+            words = _words(_text(row))
+            if any(_jaccard(words, other) >= self.threshold for other_id, other in known.items() if other_id != row.id):
+                self._count("duplicates")
+                continue
+            self._count("updated" if row.id in known else "added")
+            self.db.upsert_memory(row)
+            known[row.id] = words
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        return {"enabled": self.enabled, "dedup_threshold": self.threshold, **counts, "worker": self.worker.stats()}
+
+
+user_memories = UserMemoryWorker()
@@ -0,0 +1,133 @@
+import os
+import time
+from inspect import isgenerator
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+registry = CollectorRegistry()
+
+_FAST = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_SLOW = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+CHAT_LATENCY = Histogram("chat_request_seconds", "End-to-end chat latency by endpoint and response type",
+                         ["endpoint", "type"], buckets=_SLOW, registry=registry)
+ROUTER_LATENCY = Histogram("router_decision_seconds", "Time to pick a member agent, local pre-router or LLM router",
+                           ["by"], buckets=_FAST + _SLOW[5:], registry=registry)
+MEMBER_LATENCY = Histogram("member_agent_seconds", "Member agent run time", ["agent"],
+                           buckets=_SLOW, registry=registry)
+TOOL_CALLS = Counter("tool_calls_total", "Tool calls by outcome (success, failure envelope, error)",
+                     ["tool", "outcome"], registry=registry)
+TOOL_LATENCY = Histogram("tool_call_seconds", "Tool call duration", ["tool"], buckets=_FAST + _SLOW[5:],
+                         registry=registry)
+HTTP_LATENCY = Histogram("outbound_http_seconds", "Outbound HTTP calls to Amadeus and the backend API",
+                         ["target", "method", "endpoint", "status"], buckets=_FAST + _SLOW[5:], registry=registry)
+LLM_CALLS = Counter("llm_calls_total", "Model calls", ["model"], registry=registry)
+LLM_LATENCY = Histogram("llm_call_seconds", "Model call duration", ["model"], buckets=_SLOW, registry=registry)
+LLM_TOKENS = Counter("llm_tokens_total", "Model tokens by kind (prompt, completion)", ["model", "kind"],
+                     registry=registry)
+LLM_HEDGES = Counter("llm_hedges_total", "Late model calls raced against the backup, by winner or over_budget",
+                     ["role", "outcome"], registry=registry)
+RATE_LIMITED = Counter("rate_limit_total", "Requests queued or rejected by the rate limiter, by scope",
+                       ["scope", "outcome"], registry=registry)
+AGENT_OUTPUT = Counter("agent_output_total", "How the reply envelope was obtained from a run", ["outcome"],
+                       registry=registry)
+
+
+_enabled = METRICS_ENABLED
+
+
+def set_enabled(flag: bool):
+    global _enabled
+    _enabled = flag
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def status_class(status: Optional[int]) -> str:
+    return f"{status // 100}xx" if status else "error"
+
+
+def observe(histogram: Histogram, seconds: float, *labels):
+    if _enabled:
+        histogram.labels(*labels).observe(seconds)
+
+
+def count(counter: Counter, *labels, amount: float = 1):
+    if _enabled:
+        counter.labels(*labels).inc(amount)
+
+
+def observe_http(target: str, method: str, endpoint: str, status: Optional[int], seconds: float):
+    observe(HTTP_LATENCY, seconds, target, method, endpoint, status_class(status))
+
+
+def _timed_iter(iterator, histogram: Histogram, label: str, started: float):
+    try:
+        yield from iterator
+    finally:
+        observe(histogram, time.perf_counter() - started, label)
+
+
+def tool_hook(function_name: str, function_call, arguments: dict):
+    """agno tool hook recording each tool's duration and outcome."""
+    started = time.perf_counter()
+    try:
+        result = function_call(**arguments)
+    except Exception:
+        count(TOOL_CALLS, function_name, "error")
+        observe(TOOL_LATENCY, time.perf_counter() - started, function_name)
+        raise
+    observe(TOOL_LATENCY, time.perf_counter() - started, function_name)
+    failed = isinstance(result, dict) and result.get("success") is False
+    count(TOOL_CALLS, function_name, "failure" if failed else "success")
+    return result
+
+
+def member_hook(function_name: str, function_call, arguments: dict):
+    """Team tool hook timing the member run behind forward_task_to_member."""
+    started = time.perf_counter()
+    result = function_call(**arguments)
+    if function_name != "forward_task_to_member":
+        return result
+    agent = str(arguments.get("member_id") or "unknown")
+    if isgenerator(result):
+        return _timed_iter(result, MEMBER_LATENCY, agent, started)
+    observe(MEMBER_LATENCY, time.perf_counter() - started, agent)
+    return result
+
+
+def _observe_messages(model: str, messages, router: bool):
+    decision = 0.0
+    for message in messages or []:
+        if message.role != "assistant" or message.metrics is None or getattr(message, "from_history", False):
+            continue
+        m = message.metrics
+        count(LLM_CALLS, model)
+        count(LLM_TOKENS, model, "prompt", amount=m.input_tokens or 0)
+        count(LLM_TOKENS, model, "completion", amount=m.output_tokens or 0)
+        if m.time is not None:
+            observe(LLM_LATENCY, m.time, model)
+            decision += m.time
+    if router and decision:
+        observe(ROUTER_LATENCY, decision, "llm")
+
+
+def observe_run(response):
+    """Model calls and tokens of a finished team or agent run, and the LLM router's decision time."""
+    if not _enabled or response is None:
+        return
+    members = getattr(response, "member_responses", None) or []
+    is_team = hasattr(response, "member_responses")
+    _observe_messages(getattr(response, "model", None) or "unknown", getattr(response, "messages", None), router=is_team)
+    for member in members:
+        _observe_messages(getattr(member, "model", None) or "unknown", getattr(member, "messages", None), router=False)
+
+
+def render() -> tuple:
+    """(body, content type) for the /metrics endpoint."""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,409 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from agno.models.groq import Groq
+from agno.models.response import ModelResponse
+
+from src.hedging import HEDGE_DEADLINE, backup_model, hedger
+
+# JSON (inline or a file path) overriding DEFAULT_ROLES per role
+MODEL_ROLES = os.getenv("MODEL_ROLES", "")
+# latency and errors are judged over this many seconds of recent calls
+MODEL_WINDOW_SECONDS = float(os.getenv("MODEL_WINDOW_SECONDS", "300"))
+# a model needs this many calls in the window before it can be judged slow or failing
+MODEL_MIN_SAMPLES = int(os.getenv("MODEL_MIN_SAMPLES", "10"))
+MODEL_MAX_ERROR_RATE = float(os.getenv("MODEL_MAX_ERROR_RATE", "0.2"))
+
+# role -> candidate models in order of preference, the role's max_tokens and its p95 budget in seconds.
+# Per-model keys (reasoning_format, reasoning_effort, max_tokens) apply only when that model is used,
+# since Groq rejects reasoning options for models that don't reason.
+DEFAULT_ROLES: Dict[str, dict] = {
+    "router": {
+        "models": [{"id": "llama-3.3-70b-versatile"}, {"id": "llama-3.1-8b-instant"}],
+        "max_tokens": 256,
+        "p95_budget": 3.0,
+    },
+    "flight": {
+        "models": [{"id": "qwen-qwq-32b", "reasoning_format": "hidden"}, {"id": "llama-3.3-70b-versatile"}],
+        "max_tokens": 2048,
+        "p95_budget": 8.0,
+    },
+    "user": {
+        "models": [{"id": "qwen-qwq-32b", "reasoning_format": "hidden"}, {"id": "llama-3.3-70b-versatile"}],
+        "max_tokens": 1024,
+        "p95_budget": 8.0,
+    },
+    "general": {
+        "models": [{"id": "qwen-qwq-32b", "reasoning_format": "hidden"}, {"id": "llama-3.1-8b-instant"}],
+        "max_tokens": 1024,
+        "p95_budget": 6.0,
+    },
+    "single": {
+        "models": [{"id": "llama-3.3-70b-versatile"}, {"id": "llama-3.1-8b-instant"}],
+        "max_tokens": 2048,
+        "p95_budget": 8.0,
+    },
+    # background workers (src.history, src.memory_worker); nobody waits on them, so the budgets are loose
+    "summary": {
+        "models": [{"id": "qwen-qwq-32b", "reasoning_format": "hidden"}, {"id": "llama-3.3-70b-versatile"}],
+        "max_tokens": 1024,
+        "p95_budget": 20.0,
+    },
+    "memory": {
+        "models": [{"id": "qwen-qwq-32b", "reasoning_format": "hidden"}, {"id": "llama-3.3-70b-versatile"}],
+        "max_tokens": 1024,
+        "p95_budget": 20.0,
+    },
+}
+
+
+@dataclass
+class ModelChoice:
+    id: str
+    max_tokens: Optional[int] = None
+    request_params: Dict[str, Any] = field(default_factory=dict)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def _load_roles(source: str) -> Dict[str, dict]:
+    roles = {name: dict(config) for name, config in DEFAULT_ROLES.items()}
+    if not source:
+        return roles
+    if not source.lstrip().startswith("{"):
+        with open(source, encoding="utf-8") as f:
+            source = f.read()
+    for name, config in json.loads(source).items():
+        roles[name] = {**roles.get(name, {}), **config}
+    return roles
+
+
+class ModelRegistry:
+    """Picks the model for each agent role and keeps rolling latency and error stats per model.
+
+    A role lists its models in order of preference. The first one whose p95
+    and error rate over the last MODEL_WINDOW_SECONDS are within the role's
+    budget is used; a model with fewer than MODEL_MIN_SAMPLES recent calls
+    counts as healthy, so a demoted model gets traffic again once its slow
+    calls have aged out. When every model is over budget the fastest one wins.
+    """
+
+    def __init__(self, roles: Optional[Dict[str, dict]] = None):
+        self.roles = roles if roles is not None else _load_roles(MODEL_ROLES)
+        self._calls: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self._first_chunks: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self._lock = threading.Lock()
+        self._current: Dict[str, str] = {}
+        self.switches = 0
+
+    def __deepcopy__(self, memo):
+        return self   # agno deep-copies models; every copy reports to the same registry
+
+    def configure(self, roles: Dict[str, dict]):
+        with self._lock:
+            self.roles = {**self.roles, **roles}
+
+    def record(self, model_id: str, seconds: float, ok: bool = True):
+        now = time.monotonic()
+        with self._lock:
+            calls = self._calls.setdefault(model_id, deque(maxlen=500))
+            calls.append((now, seconds, ok))
+
+    def record_first_chunk(self, model_id: str, seconds: float):
+        """Time from a streamed call's start to its first chunk, which the hedge deadline is based on."""
+        now = time.monotonic()
+        with self._lock:
+            self._first_chunks.setdefault(model_id, deque(maxlen=500)).append((now, seconds, True))
+
+    def first_chunk_p95(self, model_id: str) -> Tuple[float, int]:
+        """(p95 seconds to the first chunk, samples) over the window."""
+        with self._lock:
+            window = self._window(model_id, self._first_chunks)
+        return _percentile([seconds for _, seconds, _ in window], 0.95), len(window)
+
+    def _window(self, model_id: str, series: Optional[dict] = None) -> List[Tuple[float, float, bool]]:
+        calls = (self._calls if series is None else series).get(model_id)
+        if not calls:
+            return []
+        cutoff = time.monotonic() - MODEL_WINDOW_SECONDS
+        while calls and calls[0][0] < cutoff:
+            calls.popleft()
+        return list(calls)
+
+    def _health(self, model_id: str) -> Tuple[float, float, int]:
+        """(p95 seconds, error rate, samples) over the window."""
+        window = self._window(model_id)
+        if not window:
+            return 0.0, 0.0, 0
+        p95 = _percentile([seconds for _, seconds, ok in window if ok] or [0.0], 0.95)
+        errors = sum(1 for _, _, ok in window if not ok)
+        return p95, errors / len(window), len(window)
+
+    def choose(self, role: str) -> ModelChoice:
+        config = self.roles[role]
+        models = [m if isinstance(m, dict) else {"id": m} for m in config["models"]]
+        budget = float(config.get("p95_budget", 10.0))
+        with self._lock:
+            picked, fastest = None, None
+            for model in models:
+                p95, error_rate, samples = self._health(model["id"])
+                if samples < MODEL_MIN_SAMPLES or (p95 <= budget and error_rate <= MODEL_MAX_ERROR_RATE):
+                    picked = model
+                    break
+                score = p95 if error_rate <= MODEL_MAX_ERROR_RATE else float("inf")
+                if fastest is None or score < fastest[0]:
+                    fastest = (score, model)
+            picked = picked or fastest[1]
+            if self._current.get(role) not in (None, picked["id"]):
+                self.switches += 1
+            self._current[role] = picked["id"]
+        params = {k: picked[k] for k in ("reasoning_format", "reasoning_effort") if picked.get(k)}
+        return ModelChoice(picked["id"], picked.get("max_tokens", config.get("max_tokens")), params)
+
+    def model(self, role: str, **kwargs) -> "RoleModel":
+        """A Groq model for `role` that re-picks its model id on every call."""
+        choice = self.choose(role)
+        return RoleModel(id=choice.id, role=role, registry=self, max_tokens=choice.max_tokens,
+                         request_params=choice.request_params or None, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for model_id in list(self._calls):
+                window = self._window(model_id)
+                p95, error_rate, samples = self._health(model_id)
+                latencies = [seconds for _, seconds, ok in window if ok]
+                first_chunks = [seconds for _, seconds, _ in self._window(model_id, self._first_chunks)]
+                models[model_id] = {"calls": samples, "p50": round(_percentile(latencies, 0.5), 3),
+                                    "p95": round(p95, 3), "error_rate": round(error_rate, 4),
+                                    "first_chunk_p95": round(_percentile(first_chunks, 0.95), 3)}
+            roles = {role: {"current": self._current.get(role),
+                            "models": [m["id"] if isinstance(m, dict) else m for m in config["models"]],
+                            "max_tokens": config.get("max_tokens"), "p95_budget": config.get("p95_budget")}
+                     for role, config in self.roles.items()}
+        return {"roles": roles, "models": models, "switches": self.switches}
+
+
+class _Chunks:
+    """Puts a stream's chunks back together into the ModelResponse a plain call would have been parsed into."""
+
+    def __init__(self, model):
+        self.model = model
+        self.response = ModelResponse(role="assistant")
+        self._content: List[str] = []
+        self._tool_calls: List[Any] = []
+
+    def add(self, chunk):
+        delta = self.model.parse_provider_response_delta(chunk)
+        if delta.content is not None:
+            self._content.append(delta.content)
+        if delta.thinking is not None:
+            self.response.thinking = (self.response.thinking or "") + delta.thinking
+        if delta.tool_calls:
+            self._tool_calls.extend(delta.tool_calls)
+        if delta.citations is not None:
+            self.response.citations = delta.citations
+        if delta.provider_data:
+            self.response.provider_data = {**(self.response.provider_data or {}), **delta.provider_data}
+        if delta.response_usage is not None:
+            self.response.response_usage = delta.response_usage
+
+    def result(self) -> ModelResponse:
+        if self._content:
+            self.response.content = "".join(self._content)
+        if self._tool_calls:
+            self.response.tool_calls = self.model.parse_tool_calls(self._tool_calls)
+        return self.response
+
+
+@dataclass
+class RoleModel(Groq):
+    """Groq model bound to a registry role: picks the model before each call and reports how it went.
+
+    With HEDGE_ENABLED, a call whose first chunk is late past the role's
+    deadline is raced against the HEDGE_BACKUP model (see src.hedging). Plain
+    calls are hedged as streams too, so the race is always to the first
+    chunk and the loser can be closed; the winner's chunks are then put back
+    together into one response. The response is parsed by whichever model
+    produced it.
+    """
+
+    role: str = "single"
+    registry: Optional[ModelRegistry] = None
+    _backup: Any = field(default=None, init=False, repr=False)
+    _answered_by: Any = field(default=None, init=False, repr=False)
+
+    def _pick(self):
+        choice = self.registry.choose(self.role)
+        self.id = choice.id
+        self.max_tokens = choice.max_tokens
+        self.request_params = choice.request_params or None
+        self._answered_by = None
+
+    def _hedge(self):
+        """(backup model, deadline) when this call may be hedged, else None.
+
+        The deadline is the role's hedge_deadline, else HEDGE_DEADLINE, else the
+        model's p95 time to first chunk; until MODEL_MIN_SAMPLES first chunks
+        are in, the role's p95_budget.
+        """
+        if not hedger.enabled:
+            return None
+        if self._backup is None:
+            self._backup = backup_model() or False
+        if not self._backup:
+            return None
+        config = self.registry.roles[self.role]
+        deadline = config.get("hedge_deadline", HEDGE_DEADLINE)
+        if deadline is None:
+            p95, samples = self.registry.first_chunk_p95(self.id)
+            deadline = p95 if samples >= MODEL_MIN_SAMPLES else config.get("p95_budget", 10.0)
+        return self._backup, float(deadline)
+
+    def _parser(self, from_backup: bool):
+        return self._backup if from_backup else super(RoleModel, self)
+
+    def _timed(self, model_id: str, call):
+        started = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            self.registry.record(model_id, time.perf_counter() - started, ok=False)
+            raise
+        self.registry.record(model_id, time.perf_counter() - started, ok=True)
+        return result
+
+    async def _atimed(self, model_id: str, call):
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except Exception:
+            self.registry.record(model_id, time.perf_counter() - started, ok=False)
+            raise
+        self.registry.record(model_id, time.perf_counter() - started, ok=True)
+        return result
+
+    def _timed_stream(self, model_id: str, open_stream):
+        # a stream closed early (the losing side of a hedge) isn't recorded, but its connection is closed
+        started = time.perf_counter()
+        stream = None
+        try:
+            stream = open_stream()
+            for i, chunk in enumerate(stream):
+                if i == 0:
+                    self.registry.record_first_chunk(model_id, time.perf_counter() - started)
+                yield chunk
+        except GeneratorExit:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            raise
+        except Exception:
+            self.registry.record(model_id, time.perf_counter() - started, ok=False)
+            raise
+        self.registry.record(model_id, time.perf_counter() - started, ok=True)
+
+    async def _atimed_stream(self, model_id: str, open_stream):
+        started = time.perf_counter()
+        stream = open_stream()
+        first = True
+        try:
+            async for chunk in stream:
+                if first:
+                    self.registry.record_first_chunk(model_id, time.perf_counter() - started)
+                    first = False
+                yield chunk
+        except GeneratorExit:
+            aclose = getattr(stream, "aclose", None)
+            if aclose:
+                await aclose()
+            raise
+        except Exception:
+            self.registry.record(model_id, time.perf_counter() - started, ok=False)
+            raise
+        self.registry.record(model_id, time.perf_counter() - started, ok=True)
+
+    def _streams(self, backup, *args, **kwargs):
+        primary = partial(self._timed_stream, self.id, lambda: Groq.invoke_stream(self, *args, **kwargs))
+        return primary, partial(self._timed_stream, backup.id, lambda: backup.invoke_stream(*args, **kwargs))
+
+    def _astreams(self, backup, *args, **kwargs):
+        primary = partial(self._atimed_stream, self.id, lambda: Groq.ainvoke_stream(self, *args, **kwargs))
+        return primary, partial(self._atimed_stream, backup.id, lambda: backup.ainvoke_stream(*args, **kwargs))
+
+    def invoke(self, *args, **kwargs):
+        self._pick()
+        hedge = self._hedge()
+        if hedge is None:
+            return self._timed(self.id, lambda: Groq.invoke(self, *args, **kwargs))
+        backup, deadline = hedge
+        chunks, from_backup = hedger.stream(self.role, *self._streams(backup, *args, **kwargs), deadline)
+        response = _Chunks(self._parser(from_backup))
+        for chunk in chunks:
+            response.add(chunk)
+        return response.result()
+
+    async def ainvoke(self, *args, **kwargs):
+        self._pick()
+        hedge = self._hedge()
+        if hedge is None:
+            return await self._atimed(self.id, lambda: Groq.ainvoke(self, *args, **kwargs))
+        backup, deadline = hedge
+        chunks, from_backup = await hedger.astream(self.role, *self._astreams(backup, *args, **kwargs), deadline)
+        response = _Chunks(self._parser(from_backup))
+        async for chunk in chunks:
+            response.add(chunk)
+        return response.result()
+
+    def invoke_stream(self, *args, **kwargs):
+        self._pick()
+        hedge = self._hedge()
+        if hedge is None:
+            yield from self._timed_stream(self.id, lambda: Groq.invoke_stream(self, *args, **kwargs))
+            return
+        backup, deadline = hedge
+        chunks, from_backup = hedger.stream(self.role, *self._streams(backup, *args, **kwargs), deadline)
+        self._answered_by = backup if from_backup else None
+        yield from chunks
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        self._pick()
+        hedge = self._hedge()
+        if hedge is None:
+            async for chunk in self._atimed_stream(self.id, lambda: Groq.ainvoke_stream(self, *args, **kwargs)):
+                yield chunk
+            return
+        backup, deadline = hedge
+        chunks, from_backup = await hedger.astream(self.role, *self._astreams(backup, *args, **kwargs), deadline)
+        self._answered_by = backup if from_backup else None
+        async for chunk in chunks:
+            yield chunk
+
+    def parse_provider_response(self, response, **kwargs):
+        if isinstance(response, ModelResponse):
+            return response   # a hedged plain call, already put together by _Chunks
+        if self._answered_by is not None:
+            return self._answered_by.parse_provider_response(response, **kwargs)
+        return super().parse_provider_response(response, **kwargs)
+
+    def parse_provider_response_delta(self, response):
+        if self._answered_by is not None:
+            return self._answered_by.parse_provider_response_delta(response)
+        return super().parse_provider_response_delta(response)
+
+
+model_registry = ModelRegistry()
+
+
+def role_model(role: str) -> RoleModel:
+    """The model for an agent role, from the shared registry."""
+    return model_registry.model(role, api_key=os.getenv("GROQ_API_KEY"))
@@ -0,0 +1,159 @@
+import importlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+from uuid import uuid4
+
+from agno.models.message import Message
+from agno.run.team import TeamRunResponse
+
+from src import metrics
+
+# which orchestrator serves /chat: "team" (router team with member agents) or "single" (one agent)
+ORCHESTRATOR = os.getenv("ORCHESTRATOR", "team").lower()
+# import the orchestrator's module in the background at startup instead of on the first /chat
+ORCHESTRATOR_PRELOAD = os.getenv("ORCHESTRATOR_PRELOAD", "true").lower() == "true"
+
+# name -> factory building one orchestrator instance, or "module:function" imported on first use
+ORCHESTRATORS: Dict[str, Union[str, Callable[[], Any]]] = {
+    "team": "src.chatbot_1:build_router_agent",
+    "single": "src.chatbot:build_agent",
+}
+_resolved: Dict[str, Callable[[], Any]] = {}
+_lock = threading.Lock()
+
+
+def register_orchestrator(name: str, factory: Union[str, Callable[[], Any]]):
+    """Adds an orchestrator selectable with ORCHESTRATOR; `factory` may be a "module:function" path."""
+    with _lock:
+        ORCHESTRATORS[name.lower()] = factory
+        _resolved.pop(name.lower(), None)
+
+
+def orchestrator_factory(name: str = None) -> Callable[[], Any]:
+    """The factory for `name` (default ORCHESTRATOR), importing its module if needed."""
+    name = (name or ORCHESTRATOR).lower()
+    with _lock:
+        if name in _resolved:
+            return _resolved[name]
+        if name not in ORCHESTRATORS:
+            raise ValueError(f"Unknown ORCHESTRATOR {name!r}, expected one of {sorted(ORCHESTRATORS)}")
+        factory = ORCHESTRATORS[name]
+        if isinstance(factory, str):
+            module, _, function = factory.partition(":")
+            factory = getattr(importlib.import_module(module), function)
+        _resolved[name] = factory
+        return factory
+
+
+def build_orchestrator():
+    """A fresh instance of the configured orchestrator; AgentPool's factory."""
+    return orchestrator_factory()()
+
+
+def _target(orchestrator, member_name: str = None):
+    if member_name is None:
+        return orchestrator
+    # a single-agent orchestrator has no members and answers pre-routed messages itself
+    return next((m for m in getattr(orchestrator, "members", None) or [] if m.name == member_name), orchestrator)
+
+
+def _member_reply(response) -> Optional[str]:
+    # what agno's forward_task_to_member hands back to the team: the content, or the tool results
+    if response is None:
+        return None
+    if isinstance(response.content, str) and response.content.strip():
+        return response.content
+    results = [str(tool.result) for tool in response.tools or [] if tool.result]
+    return ",".join(results) or None
+
+
+def _member_message(team, message, session_id: Optional[str]):
+    """Loads the team's session and returns `message` with its recent turns appended.
+
+    Members have no storage of their own, so a pre-routed member would
+    otherwise answer a follow-up ("the ref is ABC123") without its context.
+    """
+    if session_id is None or team.storage is None or team.memory is None:
+        return message
+    team.initialize_team(session_id=session_id)
+    team.read_from_storage(session_id=session_id)
+    history = team.memory.get_messages_from_last_n_runs(
+        session_id=session_id, last_n=team.num_history_runs, skip_role=team.system_message_role
+    )
+    lines = []
+    for m in history:
+        text = (m.get_content_string() or "").strip()
+        if text:
+            lines.append(f"{'user' if m.role == 'user' else 'assistant'}: {text}")
+    if not lines:
+        return message
+    context = "\n".join(lines)
+    return message.model_copy(update={
+        "content": f"{message.get_content_string()}\n\n<conversation so far>\n{context}\n</conversation so far>"
+    })
+
+
+def _record_member_run(team, member, message, session_id: Optional[str], user_id: Optional[str]):
+    """Writes a pre-routed member run into the team's session, as if the router had forwarded it."""
+    response = getattr(member, "run_response", None)
+    if session_id is None or team.storage is None or team.memory is None or response is None:
+        return
+    reply = _member_reply(response)
+    run = TeamRunResponse(
+        content=reply,
+        messages=[message, Message(role="assistant", content=reply or "")],
+        run_id=str(uuid4()),
+        team_id=team.team_id,
+        team_name=team.name,
+        session_id=session_id,
+        status=response.status,
+    )
+    team.memory.add_run(session_id=session_id, run=run)
+    team.write_to_storage(session_id=session_id, user_id=user_id)
+
+
+def run_member(team, member_name: str, message, **kwargs):
+    """Runs one member of `team` directly, skipping the router model call.
+
+    The member sees the session's recent turns and its run is written to the
+    team's session, so later turns (pre-routed or not) keep the context.
+    """
+    member = _target(team, member_name)
+    started = time.perf_counter()
+    try:
+        if member is team:
+            return team.run(message, **kwargs)
+        session_id = kwargs.get("session_id")
+        response = member.run(_member_message(team, message, session_id), **kwargs)
+        _record_member_run(team, member, message, session_id, kwargs.get("user_id"))
+        return response
+    finally:
+        metrics.observe(metrics.MEMBER_LATENCY, time.perf_counter() - started, member_name)
+
+
+def run_streaming(team, message, member_name: str = None, **kwargs):
+    """Yields agno run events from the team, or from one member when `member_name` is given.
+
+    A member run gets the same history and session write as `run_member`.
+    agno remembers stream=True on the objects after a streamed run, so the
+    flags are reset afterwards to keep pooled instances usable for plain runs.
+    """
+    target = _target(team, member_name)
+    started = time.perf_counter()
+    try:
+        if target is team:
+            yield from target.run(message, stream=True, stream_intermediate_steps=True, **kwargs)
+        else:
+            session_id = kwargs.get("session_id")
+            yield from target.run(_member_message(team, message, session_id), stream=True,
+                                  stream_intermediate_steps=True, **kwargs)
+            _record_member_run(team, target, message, session_id, kwargs.get("user_id"))
+        metrics.observe_run(getattr(target, "run_response", None))
+    finally:
+        if member_name is not None:
+            metrics.observe(metrics.MEMBER_LATENCY, time.perf_counter() - started, member_name)
+        for agent in [team, *(getattr(team, "members", None) or [])]:
+            agent.stream = None
+            agent.stream_intermediate_steps = False
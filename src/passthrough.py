@@ -0,0 +1,57 @@
+import ast
+import json
+import os
+from typing import Iterable, Optional
+
+from src.streaming import FORWARD_TOOL
+
+# comma-separated tools whose envelope goes straight to the client; the run stops after the call
+# instead of asking the model to restate the result as JSON. Off unless set, e.g. every tool in src/helper.py:
+# search_flights,search_flights_flexible,booked_flight,cancel_flight,update_user_profile,change_user_password,
+# request_password_reset,reset_password_with_code,customer_service
+TOOL_PASSTHROUGH = os.getenv("TOOL_PASSTHROUGH", "")
+PASSTHROUGH_TOOLS = frozenset(name.strip() for name in TOOL_PASSTHROUGH.split(",") if name.strip())
+
+ENVELOPE_KEYS = frozenset({"type", "success", "message", "login", "data"})
+
+
+def passthrough(tool_name: str) -> bool:
+    """Whether `tool_name` ends the run with its own envelope (TOOL_PASSTHROUGH)."""
+    return tool_name in PASSTHROUGH_TOOLS
+
+
+def is_envelope(obj) -> bool:
+    return isinstance(obj, dict) and ENVELOPE_KEYS <= obj.keys() and isinstance(obj["type"], str)
+
+
+def parse_envelope(result: Optional[str]) -> Optional[dict]:
+    # agno stores tool results as str(dict), so this is usually a Python repr
+    if not result:
+        return None
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(result)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        return value if is_envelope(value) else None
+    return None
+
+
+def envelope_from_tools(tools: Iterable) -> Optional[dict]:
+    """Envelope of the run's final tool call when it was a single passthrough tool."""
+    stopped = [t for t in tools if t.tool_name != FORWARD_TOOL and t.stop_after_tool_call]
+    # several stop-after tools in one step means the model combined results; let it answer
+    if len(stopped) != 1:
+        return None
+    last = stopped[0]
+    if last.tool_call_error or not passthrough(last.tool_name):
+        return None
+    return parse_envelope(last.result)
+
+
+def tool_envelope(run_response) -> Optional[dict]:
+    """Passthrough envelope of a team or member RunResponse, or None to use its content."""
+    tools = list(getattr(run_response, "tools", None) or [])
+    for member in getattr(run_response, "member_responses", None) or []:
+        tools.extend(member.tools or [])
+    return envelope_from_tools(tools)
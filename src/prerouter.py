@@ -0,0 +1,95 @@
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from src import metrics
+
+PREROUTER_ENABLED = os.getenv("PREROUTER_ENABLED", "true").lower() == "true"
+PREROUTER_MIN_CONFIDENCE = float(os.getenv("PREROUTER_MIN_CONFIDENCE", "0.6"))
+
+FLIGHT_AGENT = "flight_agent"
+USER_AGENT = "user_agent"
+GENERAL_AGENT = "customer_service_and_chat_agent"
+
+# (route, weight, pattern) — weight is how sure a match alone makes us of the route
+RULES = [
+    (FLIGHT_AGENT, 0.9, r"\b(search|find|look(ing)? for|show me|any|cheapest)\b.{0,40}\bflights?\b"),
+    (FLIGHT_AGENT, 0.9, r"\bflights?\s+from\s+\w+.{0,30}\bto\b"),
+    (FLIGHT_AGENT, 0.8, r"(?-i:\b[A-Z]{3}\s*(to|-|→)\s*[A-Z]{3}\b)"),
+    (FLIGHT_AGENT, 0.9, r"\bmy\s+(upcoming\s+)?(bookings?|booked flights?|reservations?|trips?)\b"),
+    (FLIGHT_AGENT, 0.9, r"\bcancel\b.{0,20}\b(booking|reservation)\b"),
+    (FLIGHT_AGENT, 0.7, r"\bcancel\b.{0,20}\bflight\b"),
+    (USER_AGENT, 0.95, r"\bpassword\b"),
+    (USER_AGENT, 0.9, r"\breset code\b"),
+    (USER_AGENT, 0.9, r"\b(update|change|edit|set)\b.{0,20}\b(profile|phone( number)?|first name|last name|birth ?date|country|gender|preferred (language|airlines?|cabin class))\b"),
+    (GENERAL_AGENT, 0.95, r"^\s*(hi|hello|hey|salam|good (morning|afternoon|evening)|thanks?( you)?|how are you)\b[\s!.?]*$"),
+    (GENERAL_AGENT, 0.8, r"\b(policy|policies|allowance|rules)\b"),
+    (GENERAL_AGENT, 0.8, r"\b(refund|money back|visa|check[- ]?in|baggage|luggage|carry[- ]on|overweight|excess|pets?|dog|cat|meals?|vegetarian|halal|kosher)\b"),
+]
+
+
+@dataclass
+class RouteDecision:
+    route: Optional[str]
+    confidence: float
+    rule: Optional[str] = None
+
+
+class PreRouter:
+    """Picks the team member for obvious messages without asking the router LLM.
+
+    Every rule that matches votes for its route with its weight. Confidence is
+    the best route's weight minus the runner-up's, so a message that looks like
+    two things at once ("refund if I cancel my flight") falls back to the LLM.
+    """
+
+    def __init__(self, rules=RULES, min_confidence: float = PREROUTER_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self._rules = [(route, weight, re.compile(pattern, re.IGNORECASE)) for route, weight, pattern in rules]
+        self._lock = threading.Lock()
+        self.local_hits = {FLIGHT_AGENT: 0, USER_AGENT: 0, GENERAL_AGENT: 0}
+        self.llm_fallbacks = 0
+
+    def classify(self, message: str) -> RouteDecision:
+        scores, reasons = {}, {}
+        for route, weight, pattern in self._rules:
+            if weight > scores.get(route, 0.0) and pattern.search(message):
+                scores[route] = weight
+                reasons[route] = pattern.pattern
+        if not scores:
+            return RouteDecision(None, 0.0)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best, best_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return RouteDecision(best, round(best_score - runner_up, 3), reasons[best])
+
+    def route(self, message: str) -> Optional[str]:
+        """Returns the member name to dispatch to, or None to use the LLM router."""
+        started = time.perf_counter()
+        decision = self.classify(message) if PREROUTER_ENABLED else RouteDecision(None, 0.0)
+        metrics.observe(metrics.ROUTER_LATENCY, time.perf_counter() - started, "local")
+        with self._lock:
+            if decision.route and decision.confidence >= self.min_confidence:
+                self.local_hits[decision.route] += 1
+                return decision.route
+            self.llm_fallbacks += 1
+            return None
+
+    def stats(self) -> dict:
+        total = sum(self.local_hits.values()) + self.llm_fallbacks
+        return {
+            "enabled": PREROUTER_ENABLED,
+            "min_confidence": self.min_confidence,
+            "decisions": total,
+            "local_hits": dict(self.local_hits),
+            "local_hit_rate": {route: round(hits / total, 3) if total else 0.0 for route, hits in self.local_hits.items()},
+            "llm_fallbacks": self.llm_fallbacks,
+            "router_calls_saved_rate": round(sum(self.local_hits.values()) / total, 3) if total else 0.0,
+        }
+
+
+prerouter = PreRouter()
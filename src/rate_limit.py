@@ -0,0 +1,260 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from src import metrics
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# requests per minute and burst size for each scope; 0 per minute turns the scope off
+RATE_LIMIT_USER_PER_MINUTE = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "20"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "5"))
+RATE_LIMIT_SESSION_PER_MINUTE = float(os.getenv("RATE_LIMIT_SESSION_PER_MINUTE", "12"))
+RATE_LIMIT_SESSION_BURST = float(os.getenv("RATE_LIMIT_SESSION_BURST", "4"))
+RATE_LIMIT_GLOBAL_PER_MINUTE = float(os.getenv("RATE_LIMIT_GLOBAL_PER_MINUTE", "600"))
+RATE_LIMIT_GLOBAL_BURST = float(os.getenv("RATE_LIMIT_GLOBAL_BURST", "30"))
+# seconds an over-limit request may queue before it gets a 429
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "5"))
+# optional JSON file overriding the settings above, re-read when it changes
+RATE_LIMITS_FILE = os.getenv("RATE_LIMITS_FILE", "")
+RATE_LIMITS_RELOAD_INTERVAL = float(os.getenv("RATE_LIMITS_RELOAD_INTERVAL", "2"))
+
+SCOPES = ("user", "session", "global")
+
+
+class RateLimited(Exception):
+    """Raised when a request is over its limit past its queueing deadline; carries Retry-After in seconds."""
+
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(f"{scope} rate limit exceeded, retry after {retry_after}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+@dataclass
+class Limit:
+    per_minute: float
+    burst: float
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60
+
+
+def default_limits() -> dict:
+    return {
+        "enabled": RATE_LIMIT_ENABLED,
+        "max_wait": RATE_LIMIT_MAX_WAIT,
+        "user": {"per_minute": RATE_LIMIT_USER_PER_MINUTE, "burst": RATE_LIMIT_USER_BURST},
+        "session": {"per_minute": RATE_LIMIT_SESSION_PER_MINUTE, "burst": RATE_LIMIT_SESSION_BURST},
+        "global": {"per_minute": RATE_LIMIT_GLOBAL_PER_MINUTE, "burst": RATE_LIMIT_GLOBAL_BURST},
+    }
+
+
+class _Bucket:
+    """Token bucket that may go into debt: a negative balance is the queue of reserved requests."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, limit: Limit, now: float):
+        self.tokens = limit.burst
+        self.updated = now
+
+    def refill(self, limit: Limit, now: float):
+        self.tokens = min(limit.burst, self.tokens + (now - self.updated) * limit.rate)
+        self.updated = now
+
+    def reserve(self, limit: Limit, now: float) -> float:
+        """Takes a token and returns how long until it is actually covered."""
+        self.refill(limit, now)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / limit.rate)
+
+
+class RateLimiter:
+    """Token buckets per user_id, per session_id and for the whole server.
+
+    A request over its user or session limit waits for its token when that
+    comes within `max_wait`, otherwise it is refused with RateLimited. The
+    global bucket is handed out by priority: queued requests from logged-in
+    users (with an access token) go before anonymous ones, and /chat/batch
+    items after both, first come first served within each. Limits can be changed with `configure()` or by editing
+    RATE_LIMITS_FILE; existing buckets pick up the new rates right away.
+    """
+
+    def __init__(self, path: str = RATE_LIMITS_FILE, reload_interval: float = RATE_LIMITS_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = None
+        self._checked_at = 0.0
+        self.reloads = 0
+        self._buckets: Dict[str, Dict[str, _Bucket]] = {"user": {}, "session": {}}
+        self._global: Optional[_Bucket] = None
+        self._queue = []               # (priority, seq, future) waiting for a global token
+        self._seq = itertools.count()
+        self._wake_handle = None
+        self._swept_at = time.monotonic()
+        self.counts = Counter()
+        self.configure({})
+        self._maybe_reload()
+
+    def configure(self, settings: dict):
+        """Applies `settings` (same shape as RATE_LIMITS_FILE) over the env defaults."""
+        merged = default_limits()
+        for key, value in settings.items():
+            merged[key] = {**merged[key], **value} if isinstance(merged.get(key), dict) else value
+        self.enabled = bool(merged["enabled"])
+        self.max_wait = float(merged["max_wait"])
+        self.limits = {scope: Limit(float(merged[scope]["per_minute"]), max(1.0, float(merged[scope]["burst"])))
+                       for scope in SCOPES}
+        self.settings = merged
+
+    def _maybe_reload(self):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding="utf-8") as f:
+                settings = json.load(f)
+            self.configure(settings)
+        except (OSError, ValueError, KeyError, TypeError):
+            return     # keep the current limits if the file is missing or invalid
+        self._mtime = mtime
+        self.reloads += 1
+
+    def _count(self, scope: str, outcome: str):
+        self.counts[f"{scope}_{outcome}"] += 1
+        metrics.count(metrics.RATE_LIMITED, scope, outcome)
+
+    def _sweep(self, now: float):
+        # a bucket that has refilled to its burst is the same as no bucket
+        if now - self._swept_at < 60:
+            return
+        self._swept_at = now
+        for scope, buckets in self._buckets.items():
+            limit = self.limits[scope]
+            for key in [k for k, b in buckets.items() if b.tokens + (now - b.updated) * limit.rate >= limit.burst]:
+                del buckets[key]
+
+    def _reserve_keyed(self, scope: str, key: str, now: float) -> Optional[Tuple[_Bucket, float]]:
+        limit = self.limits[scope]
+        if limit.per_minute <= 0:
+            return None
+        bucket = self._buckets[scope].get(key)
+        if bucket is None:
+            bucket = self._buckets[scope][key] = _Bucket(limit, now)
+        wait = bucket.reserve(limit, now)
+        if wait > self.max_wait:
+            bucket.tokens += 1
+            self._count(scope, "rejected")
+            raise RateLimited(scope, max(1, math.ceil(wait)))
+        if wait > 0:
+            self._count(scope, "queued")
+        return bucket, wait
+
+    def _wake(self):
+        """Hands global tokens to queued requests in priority order, then sleeps until the next token."""
+        self._wake_handle = None
+        limit = self.limits["global"]
+        if limit.per_minute <= 0:
+            # the global limit was turned off while requests were queued
+            for _, _, future in self._queue:
+                if not future.done():
+                    future.set_result(None)
+            self._queue = []
+            return
+        now = time.monotonic()
+        self._global.refill(limit, now)
+        while self._queue and self._global.tokens >= 1:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                self._global.tokens -= 1
+                future.set_result(None)
+        self._queue = [item for item in self._queue if not item[2].done()]
+        heapq.heapify(self._queue)
+        if self._queue:
+            delay = (1 - self._global.tokens) / limit.rate
+            self._wake_handle = asyncio.get_running_loop().call_later(max(delay, 0.001), self._wake)
+
+    async def _take_global(self, priority: int, deadline: float):
+        limit = self.limits["global"]
+        if limit.per_minute <= 0:
+            return
+        now = time.monotonic()
+        if self._global is None:
+            self._global = _Bucket(limit, now)
+        self._global.refill(limit, now)
+        if not self._queue and self._global.tokens >= 1:
+            self._global.tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        self._count("global", "queued")
+        if self._wake_handle is None:
+            self._wake()
+        try:
+            await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self._count("global", "rejected")
+            backlog = len(self._queue) + 1
+            raise RateLimited("global", max(1, math.ceil(backlog / max(limit.rate, 1e-6))))
+
+    async def admit(self, user_id: str, session_id: str, logged_in: bool = False):
+        """Waits until the request is within every limit; raises RateLimited when it can't be in time."""
+        self._maybe_reload()
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        self._sweep(now)
+        deadline = now + self.max_wait
+        reserved = []
+        try:
+            for scope, key in (("user", user_id), ("session", session_id)):
+                reservation = self._reserve_keyed(scope, key, now)
+                if reservation is not None:
+                    reserved.append(reservation)
+            wait = max([wait for _, wait in reserved] or [0.0])
+            if wait:
+                await asyncio.sleep(wait)
+            await self._take_global(0 if logged_in else 1, deadline)
+        except BaseException:
+            # a refused or cancelled request gives its reservations back
+            for bucket, _ in reserved:
+                bucket.tokens += 1
+            raise
+        self.counts["admitted"] += 1
+
+    async def admit_batch(self, max_wait: float):
+        """Admits one /chat/batch item: global bucket only, queued behind interactive requests."""
+        self._maybe_reload()
+        if not self.enabled:
+            return
+        await self._take_global(2, time.monotonic() + max_wait)
+        self.counts["batch_admitted"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "file": self.path or None,
+            "reloads": self.reloads,
+            "settings": self.settings,
+            "tracked_users": len(self._buckets["user"]),
+            "tracked_sessions": len(self._buckets["session"]),
+            "global_waiting": sum(1 for item in self._queue if not item[2].done()),
+            **self.counts,
+        }
+
+
+rate_limiter = RateLimiter()
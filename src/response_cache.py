@@ -0,0 +1,128 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src.cache import TTLCache
+from src.faq_store import faq_store
+from src.prerouter import GENERAL_AGENT, prerouter
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+# token-set Jaccard similarity for near-duplicate hits; 0 disables near-duplicate matching
+RESPONSE_CACHE_NEAR_DUP = float(os.getenv("RESPONSE_CACHE_NEAR_DUP", "0.8"))
+
+CACHEABLE_TYPES = {"customer_service"}
+
+# anything pointing at the conversation or at account data makes the answer user-specific
+_CONTEXTUAL = re.compile(
+    r"\b(it|that|this|these|those|above|previous|earlier|again|same|booking|bookings|booked|"
+    r"password|profile|account|email|phone|ref|reference|cancel\w*|"
+    r"also|instead|then|they|them|their|what about|how about)\b|@|\d{3,}",
+    re.IGNORECASE,
+)
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+_BUCKET_LIMIT = 64
+
+
+def normalize(message: str) -> str:
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", message.lower())).strip()
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class ResponseCache:
+    """Cross-session cache of replies to generic, user-independent questions.
+
+    Only messages without an access token, routed to the customer-service agent
+    and matching an FAQ topic, with no reference to the conversation or account,
+    are looked up or stored. The agents see the session history, so a reply is
+    stored only if its message is an FAQ answer word for word; anything the
+    model wrote itself (greetings, thanks, a reworded answer) may be personal
+    and is never shared. Clear FAQ questions are answered by the FAQ fast path
+    first; the cache keeps the agent's answer to the ones it isn't sure about.
+    Near-duplicates are searched among cached questions with the same FAQ
+    intent and airline.
+    """
+
+    def __init__(self, enabled: bool = RESPONSE_CACHE_ENABLED, near_dup: float = RESPONSE_CACHE_NEAR_DUP):
+        self.enabled = enabled
+        self.near_dup = near_dup
+        self._cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, name="responses")
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.near_dup_hits = 0
+        self.skipped = 0
+
+    def _bucket_for(self, message: str, access_token: Optional[str]):
+        """FAQ (intent, airline) bucket when the message is stateless, else None."""
+        if not self.enabled or access_token or _CONTEXTUAL.search(message):
+            return None
+        decision = prerouter.classify(message)
+        if decision.route != GENERAL_AGENT or decision.confidence < prerouter.min_confidence:
+            return None
+        match = faq_store.match(message)
+        return (match.intent, match.airline) if match.intent else None
+
+    def lookup(self, message: str, access_token: Optional[str] = None) -> Optional[dict]:
+        bucket = self._bucket_for(message, access_token)
+        if bucket is None:
+            with self._lock:
+                self.skipped += 1
+            return None
+
+        key = normalize(message)
+        reply = self._cache.get(key)
+        if reply is not None or not self.near_dup:
+            return reply
+
+        words = frozenset(key.split())
+        with self._lock:
+            candidates = list(self._buckets.get(bucket, ()))
+        best, best_score = None, self.near_dup
+        for candidate in candidates:
+            score = _jaccard(words, frozenset(candidate.split()))
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best is None:
+            return None
+        reply = self._cache.get(best)
+        if reply is not None:
+            with self._lock:
+                self.near_dup_hits += 1
+        return reply
+
+    def store(self, message: str, access_token: Optional[str], reply: dict):
+        if reply.get("type") not in CACHEABLE_TYPES or not reply.get("success") or reply.get("data") is not None:
+            return
+        if not faq_store.is_answer(reply.get("message")):
+            return
+        bucket = self._bucket_for(message, access_token)
+        if bucket is None:
+            return
+
+        key = normalize(message)
+        self._cache.set(key, reply)
+        with self._lock:
+            keys = self._buckets.setdefault(bucket, OrderedDict())
+            keys[key] = None
+            keys.move_to_end(key)
+            while len(keys) > _BUCKET_LIMIT:
+                keys.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "near_dup_threshold": self.near_dup,
+            "near_dup_hits": self.near_dup_hits,
+            "skipped_stateful": self.skipped,
+            **self._cache.stats(),
+        }
+
+
+response_cache = ResponseCache()
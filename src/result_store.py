@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+from src.cache import TTLCache
+
+RESULT_STORE_TTL = float(os.getenv("RESULT_STORE_TTL", "900"))
+RESULT_STORE_SIZE = int(os.getenv("RESULT_STORE_SIZE", "512"))
+RESULT_ID_PREFIX = "flt_"
+
+
+class ResultStore:
+    """Keeps large tool payloads (Amadeus offers) server-side under a short result id.
+
+    Tools hand the model only the id; `attach` swaps it back for the payload
+    in the final reply, so the model never has to copy the payload token by token.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(maxsize=RESULT_STORE_SIZE, ttl=RESULT_STORE_TTL, name="results")
+
+    def put(self, payload: Any) -> str:
+        # derived from the payload, so a replayed conversation sends the model the same ids as the recording
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        result_id = RESULT_ID_PREFIX + digest[:16]
+        self._cache.set(result_id, payload)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Any]:
+        return self._cache.get(result_id)
+
+    @staticmethod
+    def result_id_of(data: Any) -> Optional[str]:
+        if isinstance(data, dict):
+            data = data.get("result_id")
+        if isinstance(data, str) and data.strip().startswith(RESULT_ID_PREFIX):
+            return data.strip()
+        return None
+
+    def attach(self, reply: dict) -> dict:
+        """Replaces a result id in reply["data"] with the stored payload (None if it expired)."""
+        result_id = self.result_id_of(reply.get("data")) if isinstance(reply, dict) else None
+        if result_id is None:
+            return reply
+        payload = self.get(result_id)
+        if isinstance(payload, str):
+            # the frontend gets the flights as an object, never as a JSON string
+            try:
+                payload = json.loads(payload)
+            except ValueError:
+                pass
+        return {**reply, "data": payload}
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+result_store = ResultStore()
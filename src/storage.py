@@ -0,0 +1,305 @@
+import functools
+import hashlib
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from agno.memory.v2.db.base import MemoryDb
+from agno.memory.v2.db.schema import MemoryRow
+from agno.storage.base import Storage
+from agno.storage.session import Session
+
+if TYPE_CHECKING:  # sqlalchemy is imported on first use, it is a large share of the app's import time
+    from sqlalchemy.engine import Engine
+
+# sqlite (default), postgres or redis; more can be added with register_backend()
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+STORAGE_DIR = os.getenv("STORAGE_DIR", "tmp")
+# sessions are spread over this many files by session_id, memories by user_id
+STORAGE_SHARDS = int(os.getenv("STORAGE_SHARDS", "1"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DATABASE_URL = os.getenv("DATABASE_URL")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+SESSION_DB = "session_memory"
+MEMORY_DB = "User_preferences_memory"
+
+_engines: Dict[str, "Engine"] = {}
+_engines_lock = threading.Lock()
+
+
+def shard_of(key: Optional[str], shards: int) -> int:
+    """Stable shard index for a session or user id; identical in every worker process."""
+    if shards <= 1 or not key:
+        return 0
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=4).digest(), "big") % shards
+
+
+def sqlite_engine(path: str, busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS) -> "Engine":
+    """Shared engine for one SQLite file with WAL, a busy timeout and synchronous=NORMAL.
+
+    WAL lets readers run alongside the single writer, and the busy timeout makes
+    a writer wait for the lock instead of failing with "database is locked".
+    """
+    from sqlalchemy import create_engine, event
+
+    path = os.path.abspath(path)
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is not None:
+            return engine
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        engine = create_engine(
+            f"sqlite:///{path}",
+            connect_args={"timeout": busy_timeout_ms / 1000, "check_same_thread": False},
+        )
+
+        @event.listens_for(engine, "connect")
+        def _configure(dbapi_connection, _record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        _engines[path] = engine
+        return engine
+
+
+def _bind(db, engine: "Engine"):
+    # agno's SQLite classes ignore db_engine and open an in-memory database instead,
+    # so the shared engine is swapped in after construction
+    from sqlalchemy import inspect
+    from sqlalchemy.orm import scoped_session, sessionmaker
+
+    if db.db_engine is not engine:
+        db.db_engine = engine
+        db.inspector = inspect(engine)
+        if hasattr(db, "SqlSession"):
+            db.SqlSession = sessionmaker(bind=engine)
+        if hasattr(db, "Session"):
+            db.Session = scoped_session(sessionmaker(bind=engine))
+    # agno creates the table lazily from whichever run gets there first, and neither
+    # the inspector nor the table metadata it uses are thread-safe, so those calls
+    # are serialized per handle
+    lock = threading.RLock()
+    for name in ("create", "table_exists", "get_table"):
+        method = getattr(db, name, None)
+        if method is None:
+            continue
+        setattr(db, name, functools.partial(_locked, lock, method))
+    return db
+
+
+def _locked(lock, method, *args, **kwargs):
+    with lock:
+        return method(*args, **kwargs)
+
+
+def _shard_path(directory: str, name: str, index: int, shards: int) -> str:
+    suffix = f"_{index}" if shards > 1 else ""
+    return os.path.join(directory, f"{name}{suffix}.db")
+
+
+class ShardedStorage(Storage):
+    """Session storage spread over several backends by a hash of session_id."""
+
+    def __init__(self, shards: List[Storage], mode: Optional[str] = "agent"):
+        self.shards = shards
+        super().__init__(mode)
+        self.mode = mode
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @mode.setter
+    def mode(self, value):
+        self._mode = "agent" if value is None else value
+        for shard in getattr(self, "shards", ()):
+            shard.mode = value
+
+    def _for(self, session_id: Optional[str]) -> Storage:
+        return self.shards[shard_of(session_id, len(self.shards))]
+
+    def create(self) -> None:
+        for shard in self.shards:
+            shard.create()
+
+    def read(self, session_id: str, user_id: Optional[str] = None) -> Optional[Session]:
+        return self._for(session_id).read(session_id, user_id)
+
+    def get_all_session_ids(self, user_id: Optional[str] = None, agent_id: Optional[str] = None) -> List[str]:
+        return [sid for shard in self.shards for sid in shard.get_all_session_ids(user_id, agent_id)]
+
+    def get_all_sessions(self, user_id: Optional[str] = None, entity_id: Optional[str] = None) -> List[Session]:
+        return [s for shard in self.shards for s in shard.get_all_sessions(user_id, entity_id)]
+
+    def get_recent_sessions(self, user_id: Optional[str] = None, entity_id: Optional[str] = None,
+                            limit: Optional[int] = 2) -> List[Session]:
+        sessions = [s for shard in self.shards for s in shard.get_recent_sessions(user_id, entity_id, limit)]
+        sessions.sort(key=lambda s: s.updated_at or s.created_at or 0, reverse=True)
+        return sessions[:limit] if limit else sessions
+
+    def upsert(self, session: Session) -> Optional[Session]:
+        return self._for(session.session_id).upsert(session)
+
+    def delete_session(self, session_id: Optional[str] = None):
+        return self._for(session_id).delete_session(session_id)
+
+    def drop(self) -> None:
+        for shard in self.shards:
+            shard.drop()
+
+    def upgrade_schema(self) -> None:
+        for shard in self.shards:
+            shard.upgrade_schema()
+
+
+class ShardedMemoryDb(MemoryDb):
+    """User memory spread over several backends by a hash of user_id."""
+
+    def __init__(self, shards: List[MemoryDb]):
+        self.shards = shards
+
+    def _for(self, user_id: Optional[str]) -> MemoryDb:
+        return self.shards[shard_of(user_id, len(self.shards))]
+
+    def create(self) -> None:
+        for shard in self.shards:
+            shard.create()
+
+    def memory_exists(self, memory: MemoryRow) -> bool:
+        return self._for(memory.user_id).memory_exists(memory)
+
+    def read_memories(self, user_id: Optional[str] = None, limit: Optional[int] = None,
+                      sort: Optional[str] = None) -> List[MemoryRow]:
+        if user_id is not None:
+            return self._for(user_id).read_memories(user_id, limit, sort)
+        rows = [row for shard in self.shards for row in shard.read_memories(None, limit, sort)]
+        return rows[:limit] if limit else rows
+
+    def upsert_memory(self, memory: MemoryRow) -> Optional[MemoryRow]:
+        return self._for(memory.user_id).upsert_memory(memory)
+
+    def delete_memory(self, memory_id: str) -> None:
+        # only the id is known here, and deleting a missing row is a no-op
+        for shard in self.shards:
+            shard.delete_memory(memory_id)
+
+    def drop_table(self) -> None:
+        for shard in self.shards:
+            shard.drop_table()
+
+    def table_exists(self) -> bool:
+        return all(shard.table_exists() for shard in self.shards)
+
+    def clear(self) -> bool:
+        return all([shard.clear() for shard in self.shards])
+
+
+def _sqlite_storage(table_name: str, directory: str, shard: int, shards: int) -> Storage:
+    from agno.storage.sqlite import SqliteStorage
+    engine = sqlite_engine(_shard_path(directory, SESSION_DB, shard, shards))
+    return _bind(SqliteStorage(table_name=table_name, db_engine=engine), engine)
+
+
+def _sqlite_memory(table_name: str, directory: str, shard: int, shards: int) -> MemoryDb:
+    from agno.memory.v2.db.sqlite import SqliteMemoryDb
+    engine = sqlite_engine(_shard_path(directory, MEMORY_DB, shard, shards))
+    return _bind(SqliteMemoryDb(table_name=table_name, db_engine=engine), engine)
+
+
+def _postgres_storage(table_name: str, directory: str, shard: int, shards: int) -> Storage:
+    # needs sqlalchemy's postgres driver (psycopg); the database handles concurrency, so no shards
+    from agno.storage.postgres import PostgresStorage
+    return PostgresStorage(table_name=table_name, db_url=DATABASE_URL)
+
+
+def _postgres_memory(table_name: str, directory: str, shard: int, shards: int) -> MemoryDb:
+    from agno.memory.v2.db.postgres import PostgresMemoryDb
+    return PostgresMemoryDb(table_name=table_name, db_url=DATABASE_URL)
+
+
+def _redis_options() -> dict:
+    url = urlparse(REDIS_URL)
+    return {
+        "host": url.hostname or "localhost",
+        "port": url.port or 6379,
+        "db": int(url.path.lstrip("/") or 0),
+        "password": url.password,
+    }
+
+
+def _redis_storage(table_name: str, directory: str, shard: int, shards: int) -> Storage:
+    from agno.storage.redis import RedisStorage
+    return RedisStorage(prefix=table_name, **_redis_options())
+
+
+def _redis_memory(table_name: str, directory: str, shard: int, shards: int) -> MemoryDb:
+    from agno.memory.v2.db.redis import RedisMemoryDb
+    return RedisMemoryDb(prefix=table_name, **_redis_options())
+
+
+# name -> (session storage factory, memory db factory, supports sharding)
+BACKENDS: Dict[str, tuple] = {
+    "sqlite": (_sqlite_storage, _sqlite_memory, True),
+    "postgres": (_postgres_storage, _postgres_memory, False),
+    "redis": (_redis_storage, _redis_memory, False),
+}
+
+
+def register_backend(name: str, storage_factory: Callable[..., Storage],
+                     memory_factory: Callable[..., MemoryDb], shardable: bool = False):
+    """Adds a backend selectable with STORAGE_BACKEND.
+
+    Factories are called as factory(table_name, directory, shard, shards).
+    """
+    BACKENDS[name.lower()] = (storage_factory, memory_factory, shardable)
+
+
+def _backend(backend: Optional[str]) -> tuple:
+    name = (backend or STORAGE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]
+
+
+def session_storage(table_name: str = "agent_sessions", backend: Optional[str] = None,
+                    directory: str = STORAGE_DIR, shards: int = STORAGE_SHARDS) -> Storage:
+    """Agent/team session storage for the configured backend, sharded by session_id."""
+    factory, _, shardable = _backend(backend)
+    if not shardable or shards <= 1:
+        return factory(table_name, directory, 0, 1)
+    return ShardedStorage([factory(table_name, directory, i, shards) for i in range(shards)])
+
+
+def memory_database(table_name: str = "users_memory", backend: Optional[str] = None,
+                    directory: str = STORAGE_DIR, shards: int = STORAGE_SHARDS) -> MemoryDb:
+    """User memory database for the configured backend, sharded by user_id."""
+    _, factory, shardable = _backend(backend)
+    if not shardable or shards <= 1:
+        return factory(table_name, directory, 0, 1)
+    return ShardedMemoryDb([factory(table_name, directory, i, shards) for i in range(shards)])
+
+
+_shared: Dict[tuple, object] = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_handle(key: tuple, build: Callable[[], object]):
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = build()
+        return _shared[key]
+
+
+def shared_session_storage(table_name: str = "agent_sessions") -> Storage:
+    """The process-wide session_storage(table_name); one handle however many orchestrators use it."""
+    return _shared_handle(("sessions", table_name), lambda: session_storage(table_name=table_name))
+
+
+def shared_memory_database(table_name: str = "users_memory") -> MemoryDb:
+    """The process-wide memory_database(table_name), shared by the agents and the memory worker."""
+    return _shared_handle(("memories", table_name), lambda: memory_database(table_name=table_name))
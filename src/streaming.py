@@ -0,0 +1,70 @@
+import json
+from typing import List, Optional
+
+FORWARD_TOOL = "forward_task_to_member"
+
+
+def sse(event: dict) -> str:
+    """One server-sent event; the `event:` line carries the event name."""
+    return f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+class StreamTranslator:
+    """Turns agno team/agent run events into the /chat/stream progress events.
+
+    Emits `routed`, `tool_started`, `tool_finished` and `token` events and keeps
+    the text needed to build the final envelope. Member content is bubbled up
+    by the team and then repeated as the team's own result, so team content is
+    only streamed when no member has streamed anything. Completed member tool
+    calls are kept in `tools`; once a stop-after (passthrough) tool has run, the
+    team's restatement of its raw result is not streamed either.
+    """
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.tools: List = []
+        self._member_streamed = False
+        self._tool_stopped = False
+        self._team_tokens: List[str] = []
+        self._completed: Optional[str] = None
+        self._team_completed: Optional[str] = None
+
+    def translate(self, event) -> List[dict]:
+        name = getattr(event, "event", "")
+        tool = getattr(event, "tool", None)
+
+        if name == "TeamToolCallStarted" and tool is not None and tool.tool_name == FORWARD_TOOL:
+            return [{"event": "routed", "agent": (tool.tool_args or {}).get("member_id"), "by": "router"}]
+        if name == "ToolCallStarted" and tool is not None:
+            return [{"event": "tool_started", "tool": tool.tool_name}]
+        if name == "ToolCallCompleted" and tool is not None:
+            self.tools.append(tool)
+            self._tool_stopped = self._tool_stopped or bool(tool.stop_after_tool_call)
+            return [{"event": "tool_finished", "tool": tool.tool_name, "error": bool(tool.tool_call_error)}]
+
+        content = getattr(event, "content", None)
+        if name == "RunResponseContent" and isinstance(content, str) and content:
+            self._member_streamed = True
+            self.tokens.append(content)
+            return [{"event": "token", "content": content}]
+        if name == "TeamRunResponseContent" and isinstance(content, str) and content:
+            self._team_tokens.append(content)
+            if not (self._member_streamed or self._tool_stopped):
+                self.tokens.append(content)
+                return [{"event": "token", "content": content}]
+            return []
+
+        if name == "RunCompleted" and isinstance(content, str):
+            self._completed = content
+        elif name == "TeamRunCompleted" and isinstance(content, str):
+            self._team_completed = content
+        elif name in ("RunError", "TeamRunError"):
+            raise RuntimeError(content or name)
+        return []
+
+    def final_content(self) -> str:
+        """The complete reply text, as /chat would have received it in response.content."""
+        for candidate in (self._team_completed, self._completed):
+            if candidate:
+                return candidate
+        return "".join(self.tokens) or "".join(self._team_tokens)